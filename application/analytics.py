@@ -1,15 +1,114 @@
-from datetime import timedelta, datetime
+from datetime import datetime, date, timedelta
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter, attrgetter
+import heapq
 import sqlite3
-from .database import get_all_log_data, get_periods, get_all_habits
+from .database import (
+    iter_checkoffs,
+    iter_periodicity_and_checkoffs,
+    iter_all_checkoffs,
+    iter_checkoffs_between,
+    iter_all_checkoffs_between,
+    get_periods,
+    get_streak_state,
+    get_latest_log_id,
+    save_streak_state,
+    iter_log_data,
+    iter_log_data_after,
+    get_last_streak_point,
+    save_streak_points,
+    get_completed_periods,
+    get_checkoff_days,
+    get_all_habit_name_and_id,
+    get_habit_name,
+)
+from .streaks import (
+    delta_hour_daily,
+    delta_hour_weekly,
+    delta_hour_monthly,
+    step_daily,
+    step_weekly,
+    step_monthly,
+    streak_steps,
+    streak_delta_hours,
+    periodicities,
+    choice_for_periodicity,
+    fold_streak,
+    StreakResult,
+)
+from .timestamps import parse_checkoff, to_storage
+from .records import StreakPoint, LeaderboardEntry
+from .instrumentation import instrumented
+
+# define the list with the streaks the leaderboard can be ranked by
+choice_for_leaderboard = ["maximum", "current"]
+
+# define the list with the engines to calculate streaks and the selected engine ("numpy" requires numpy to be installed)
+choice_for_streak_engine = ["python", "numpy"]
+streak_engine = "python"
+
+
+def set_streak_engine(engine: str) -> None:
+    """This function selects the engine which calculates the streaks from all checkoffs of a habit at runtime.
+    "python" applies the step functions to every checkoff, "numpy" calculates the streaks with array operations.
 
-# define the list with different periodicites and assign it with the default values
-choice_for_periodicity = ["daily", "weekly", "monthly"]
+    Args:
+        engine (str): name of the engine ("python" or "numpy")
+
+    Raises:
+        ValueError: if the engine is unknown
+        ImportError: if the engine "numpy" is selected, but numpy isn't installed
+    """
+    global streak_engine
+
+    # import the vectorized engine (and numpy) only when it is selected, so the start of the application stays fast:
+    from . import vectorized
+
+    if engine not in choice_for_streak_engine:
+        raise ValueError(f"Unknown streak engine {engine}, choose one of {choice_for_streak_engine}.")
+    if engine == "numpy" and vectorized.np is None:
+        raise ImportError("The streak engine numpy requires numpy to be installed.")
+    streak_engine = engine
+
+
+def fold_checkoffs(periodicity: str, checkoffs) -> tuple:
+    """This function calculates the streak of a habit from all of its checkoffs with the selected streak_engine.
+    The engine "python" parses and folds the checkoffs one by one, so a stream of checkoffs is calculated with constant memory.
+    The engine "numpy" needs all checkoffs at once and reads a stream into a list first.
+
+    Args:
+        periodicity (str): periodicity of the habit (a registered periodicity, e.g. "daily", "weekly" or "monthly")
+        checkoffs (iterable): checkoffs as strings or integer seconds in chronological order ["YYYY-MM-DD hh:mm:ss"]
+
+    Returns:
+        tuple: starting_date, current streak, maximum streak and status (starting_date, count, count_max, status)
+    """
+    if streak_engine == "numpy":
+        from . import vectorized
+        checkoffs = checkoffs if isinstance(checkoffs, list) else list(checkoffs)
+        return vectorized.fold_streak_vectorized(periodicity, checkoffs, streak_delta_hours[periodicity])
+    return fold_streak(streak_steps[periodicity], map(parse_checkoff, checkoffs), streak_delta_hours[periodicity])
 
-# define the timespan in hours which has to be between two checkoffs and assign it with default 4 hours
-delta_hour_daily = delta_hour_weekly = delta_hour_monthly = 4
 
+def remember_last(checkoffs, last: list):
+    """This function yields the checkoffs of a stream and stores the latest yielded checkoff in last[0],
+    so the last checkoff is known after the stream was consumed without keeping the other checkoffs.
 
-def convert_date_and_time_for_calculation(db: sqlite3.Connection, habit_id: int) -> list:
+    Args:
+        checkoffs (iterable): checkoffs in chronological order
+        last (list): list with a single item, which is replaced by every checkoff
+
+    Yields:
+        str or int: the checkoffs
+    """
+    for checkoff in checkoffs:
+        last[0] = checkoff
+        yield checkoff
+
+
+@instrumented
+def convert_date_and_time_for_calculation(db: sqlite3.Connection, habit_id: int, user_id=None) -> list:
     """This function converts the data from a specific Habit id of the connected database (habit_log) from a string into a datetime-format. 
     The respective data in datetime-format will be stored in a list, which will be returned by the function. 
     To improve calculation, a datetime way back in the past is stored in the first index.
@@ -17,26 +116,19 @@ def convert_date_and_time_for_calculation(db: sqlite3.Connection, habit_id: int)
     Parameters:
         db (sqlite3.Connection): Connection to Database
         habit_id (int) : id of the individual habit
+        user_id (int, optional): only the checkoffs of this user (multi-tenant databases only). Defaults to None (any user).
 
     Returns:
         list: A list with the Data of the connected database (habit_log) in Datetime-Format [datetime.datetime(YYYY, MM, DD, hh, mm)]
     """
 
-    # define variable (list) and store all log data in it:
-    check_streak = get_all_log_data(db, habit_id)
-
-    # define variable for formatting the date to be stored in the list:
-    date_formatter = "%Y-%m-%d %X"
-
     # define variable and appends datetime far in the past to the list:
     date_start = datetime.fromtimestamp(639093601)
     date_list_calculate = [date_start]
 
-    # convert string data of the habit_logs in datetime-format and appends it to the list:
-    for i in check_streak:
-        date_string = i[3]
-        date_original = datetime.strptime(date_string, date_formatter)
-        date_list_calculate.append(date_original)
+    # convert all checkoffs of the habit in chronological order in datetime-format and appends them to the list
+    # (the checkoffs are streamed, so only the list of datetimes is kept in memory):
+    date_list_calculate.extend(map(parse_checkoff, iter_checkoffs(db, habit_id, user_id=user_id)))
 
     # returns the list:
     return date_list_calculate
@@ -55,11 +147,12 @@ def calc_streak_daily(
         same day, the habit is considered to be already checked off in the respective timespan (status=2). If none of the above, the
         habit is considered to be broken (status=3). The status will be returned with the current strike (bool_max_count=False). 
         With bool_max_count=True, the maximum streak will be returned only.
+        The calculation itself is done by the step function step_daily and doesn't access the database.
 
     Args:
-        db (sqlite3.Connection): Connection to Database
-        habit_id (int): id of the individual habit
-        parse_date (list): list of the log_data in datetime format
+        db (sqlite3.Connection): Connection to Database (not used, kept for compatibility)
+        habit_id (int): id of the individual habit (not used, kept for compatibility)
+        parse_date (list): list of the log_data in datetime format, as returned by convert_date_and_time_for_calculation
         bool_max_count (bool): if True: Function will return the maximum streak, if False: Function will return current streak
         delta_hours (int, optional): Time between the respective checkoffs to be considered as a streak in hours. Defaults to delta_hour_daily.
 
@@ -67,57 +160,8 @@ def calc_streak_daily(
         int: maximum of streaks if bool_max_count == True, else current streak and status
     """
 
-    # define count variable (current count) and count_max (maximum count) and assign them to 0:
-    count = count_max = 0
-
-    # define status variable and assign it to 0 to later check the status of the checkoff (done in time / obsolete / broken the habit):
-    status = 0
-
-    # get the log data from the database of a certain habit for further calculation:
-    dataset_of_habit_log = get_all_log_data(db, habit_id)
-
-    # define the starting date and set it to the first index of the list parse_date (a datetime far in the past):
-    starting_date = parse_date[0]
-
-    # iterates over the length of the dataset of habit logs:
-    for idx in range(len(dataset_of_habit_log)):
-
-        # checks if checkoff is on the day after the last checkoff and delta_hours hours are between the checkoffs:
-        if parse_date[idx + 1].date() - starting_date.date() == timedelta(
-            days=1
-        ) and parse_date[idx + 1] - starting_date >= timedelta(hours=delta_hours):
-
-            # increase counter by 1:
-            count += 1
-            # set status to 1 (checked off in time):
-            status = 1
-
-            # set starting_date to the datetime of the next index:
-            starting_date = parse_date[idx + 1]
-
-        # checks if there are less than delta_hours hours between the checkoffs or if its still the same day:
-        elif parse_date[idx + 1] - starting_date < timedelta(hours=4) or parse_date[
-            idx + 1
-        ].date() - starting_date.date() == timedelta(days=0):
-
-            # set status to 2 (checked off already in expected time):
-            status = 2
-
-        # else the habit was broken:
-        else:
-
-            # set count back to 1:
-            count = 1
-
-            # set status to 3 (broken the habit):
-            status = 3 if starting_date != parse_date[0] else 1
-
-            # set starting_date to the datetime of the next index:
-            starting_date = parse_date[idx + 1]
-
-        # checks if current count is greater equal the maximum count, if so, update the max_count value:
-        if count >= count_max:
-            count_max = count
+    # calculate the streak of all checkoffs (the first index of parse_date is a datetime far in the past):
+    _, count, count_max, status = fold_streak(step_daily, parse_date[1:], delta_hours)
 
     # returns the maximum streak or the current count and status, depending on the bool_max_count value:
     return count_max if bool_max_count == True else count, status
@@ -137,12 +181,13 @@ def calc_streak_weekly(
         respective timespan (status=2). If none of the above, the habit is considered to be broken (status=3). 
         The status will be returned with the current strike (bool_max_count=False). 
         With bool_max_count=True, the maximum streak will be returned only.
+        The calculation itself is done by the step function step_weekly and doesn't access the database.
 
 
     Args:
-        db (sqlite3.Connection): Connection to Database
-        habit_id (int): id of the individual habit
-        parse_date (list): list of the log_data in datetime format
+        db (sqlite3.Connection): Connection to Database (not used, kept for compatibility)
+        habit_id (int): id of the individual habit (not used, kept for compatibility)
+        parse_date (list): list of the log_data in datetime format, as returned by convert_date_and_time_for_calculation
         bool_max_count (bool): if True: Function will return the maximum streak, if False: Function will return current streak
         delta_hours (int, optional): Time between the respective checkoffs to be considered as a streak in hours. Defaults to delta_hour_weekly.
         
@@ -150,342 +195,505 @@ def calc_streak_weekly(
         int: maximum of streaks if bool_max_count == True, else current streak and status
     """
 
-    # define count variable (current count) and count_max (maximum count) and assign them to 0:
-    count = count_max = 0
+    # calculate the streak of all checkoffs (the first index of parse_date is a datetime far in the past):
+    _, count, count_max, status = fold_streak(step_weekly, parse_date[1:], delta_hours)
 
-    # define status variable and assign it to 0 to later check the status of the checkoff (done in time / obsolete / broken the habit):
-    status = 0
+    # returns the maximum streak or the current count and status, depending on the bool_max_count value:
+    return count_max if bool_max_count == True else count, status
 
-    # get the log data from the database of a certain habit for further calculation:
-    dataset_of_habit_log = get_all_log_data(db, habit_id)
 
-    # define the starting date and set it to the first index of the list parse_date (a datetime far in the past):
-    starting_date = parse_date[0]
+def calc_streak_monthly(
+    db: sqlite3.Connection,
+    habit_id: int,
+    parse_date: list,
+    bool_max_count: bool,
+    delta_hours=delta_hour_monthly,
+) -> int:
+    """This function calculates the respective streaks for mothly habits. 
+        The calculation consideres checked off in time if the checkoff is in the next month and a timespan 
+        greater than delta_hours is between the checkoffs (status=1). If there isn't a difference of delta_hours between two 
+        checkoffs or the checkoffs happen the same month, the habit is considered to be already checked off in the 
+        respective timespan (status=2). If none of the above, the habit is considered to be broken (status=3). 
+        The status will be returned with the current strike (bool_max_count=False). 
+        With bool_max_count=True, the maximum streak will be returned only.
+        The calculation itself is done by the step function step_monthly and doesn't access the database.
+
+
+    Args:
+        db (sqlite3.Connection): Connection to Database (not used, kept for compatibility)
+        habit_id (int): id of the individual habit (not used, kept for compatibility)
+        parse_date (list): list of the log_data in datetime format, as returned by convert_date_and_time_for_calculation
+        bool_max_count (bool): if True: Function will return the maximum streak, if False: Function will return current streak
+        delta_hours (int, optional): Time between the respective checkoffs to be considered as a streak in hours. Defaults to delta_hour_monthly.
+        
+    Returns:
+        int: maximum of streaks if bool_max_count == True, else current streak
+    """
+
+    # calculate the streak of all checkoffs (the first index of parse_date is a datetime far in the past):
+    _, count, count_max, status = fold_streak(step_monthly, parse_date[1:], delta_hours)
+
+    # returns the maximum streak or the current count and status, depending on the bool_max_count value:
+    return count_max if bool_max_count == True else count, status
+
 
-    # iterates over the length of the dataset of habit logs:
-    for idx in range(len(dataset_of_habit_log)):
+@instrumented
+def rebuild_streak_state(db: sqlite3.Connection, habit_id: int, user_id=None, latest_log_id=None) -> tuple:
+    """This function calculates the streak of the habit with habit_id from all of its checkoffs and stores the result
+    as streak state, which is updated by Log.save() with every further checkoff.
+    The periodicity and all checkoffs are read from the database with a single query and the streak is calculated by
+    the step function of the periodicity (daily, weekly or monthly) without any further access to the database.
+    The checkoffs are streamed from the cursor into the step function, so a history of any length is calculated with constant memory.
+    Read-only connections (readers of the ConnectionManager) only calculate the streak, the state is stored by the writer.
+    The state is stored with the latest log id, which is read before the checkoffs. If another connection inserts a log
+    in between, the state has an older log id than the habit log and is rebuilt again the next time it is read.
 
-        # checks if year of staring_date is equal the year of the next checkoff:
-        if starting_date.year == parse_date[idx + 1].year:
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the individual habit
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
+        latest_log_id (int, optional): latest log id of the habit, if it was read already. Defaults to None (read from the database).
 
-            # checks if the week between the two checkoffs has changed, if so, it is considered to be already logged for the period:
-            if (
-                starting_date.isocalendar().week
-                == parse_date[idx + 1].isocalendar().week
-            ):
+    Returns:
+        tuple: current streak, maximum streak and status (count, count_max, status)
+    """
 
-                # set status to 2 (checked off already in expected time):
-                status = 2
+    # get the latest log id of the habit, which is stored with the state:
+    if latest_log_id is None and not getattr(db, "read_only", False):
+        latest_log_id = get_latest_log_id(db, habit_id)
 
-            # checks if the week of checkoff is +1 after the last checkoff and if there are less than delta_hours hours between the checkoffs:
-            elif starting_date.isocalendar().week + 1 == parse_date[
-                idx + 1
-            ].isocalendar().week and parse_date[idx + 1] - starting_date >= timedelta(
-                hours=delta_hours
-            ):
+    # get the periodicity and the stream of the checkoffs of the habit with habid_id from the connected database:
+    periodicity, checkoffs = iter_periodicity_and_checkoffs(db, habit_id, user_id=user_id)
 
-                # increase counter by 1:
-                count += 1
+    # calculate current streak, maximum streak and status of the habit and remember the last checkoff:
+    last_checkoff = [None]
+    starting_date, count, count_max, status = fold_checkoffs(periodicity, remember_last(checkoffs, last_checkoff))
 
-                # set status to 1 (checked off in time):
-                status = 1
+    # store the streak state, if the habit was checked off already and the connection can write:
+    if last_checkoff[0] is not None and not getattr(db, "read_only", False):
+        save_streak_state(db, habit_id, starting_date, count, count_max, status, last_checkoff[0], latest_log_id)
 
-                # set starting_date to the datetime of the next index:
-                starting_date = parse_date[idx + 1]
+    return count, count_max, status
 
-            # checks if week of checkoff +1 is smaller than last checkoff, therefore broke the habit:
-            elif (
-                starting_date.isocalendar().week + 1
-                < parse_date[idx + 1].isocalendar().week
-            ):
-                # set count back to 1:
-                count = 1
 
-                # set status to 3 (broken the habit):
-                status = 3 if starting_date != parse_date[0] else 1
+@instrumented
+def calculation_of_streaks(db: sqlite3.Connection, habit_id: int, bool_max_count=False, user_id=None) -> StreakResult:
+    """A function to improve the arrangement of the program. The streak of the habit with habit_id is read from
+    the stored streak state. Only if the state is missing or stale (it doesn't include the latest log of the habit, e.g.
+    a back-dated checkoff of another process), the streak is calculated from all checkoffs by the function rebuild_streak_state.
+    The result contains current streak, maximum streak, status and last checkoff, so it can be passed to the printers
+    instead of calculating the streak again.
 
-                # set starting_date to the datetime of the next index:
-                starting_date = parse_date[idx + 1]
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the individual habit
+        bool_max_count (bool, optional): if True: result[0] is the maximum streak, if False: result[0] is the current streak. Defaults to False.
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
 
-        # checks if year of starting_date +1 is equal the year of the next checkoff (necessary if new year starts):
-        elif starting_date.year + 1 == parse_date[idx + 1].year:
+    Raises:
+        TypeError: if there is no habit with habit_id (of the user)
 
-            # checks if last and next checkoff are in the same week (if so, checkoff is obsolete):
-            if (
-                starting_date.isocalendar().week
-                == parse_date[idx + 1].isocalendar().week
-            ):
-                # set status to 2 (checked off already in expected time):
-                status = 2
+    Returns:
+        StreakResult: (count, status, current, maximum, last_checkoff, periodicity) of the habit
+    """
 
-            # checks if week of next checkoff is 1 (therefore a new year has started) and there
-            # are less than delta_hours hours between the checkoffs
-            # also checks if starting week plus a timedelta of 7 days is the next week
-            # (considered to be fail safe if a year has different number of weeks (52, 53 e.g)):
-            elif (
-                parse_date[idx + 1].isocalendar().week == 1
-                and parse_date[idx + 1] - starting_date >= timedelta(hours=delta_hours)
-                and (starting_date + timedelta(days=7)).isocalendar().week
-                == parse_date[idx + 1].isocalendar().week
-            ):
+    # get the stored streak state and the latest checkoff of the habit with habid_id from the connected database:
+    periodicity, count, count_max, status, last_log_id, latest_checkoff, latest_log_id = get_streak_state(db, habit_id, user_id)
 
-                # increase count by 1:
-                count += 1
+    # if there is no checkoff, there is no streak:
+    if latest_checkoff is None:
+        count = count_max = status = 0
 
-                # set status to 1 (checked off in time):
-                status = 1
+    # if the state is missing or stale, calculate current streak, maximum streak and status from all checkoffs:
+    elif last_log_id != latest_log_id:
+        count, count_max, status = rebuild_streak_state(db, habit_id, user_id, latest_log_id)
 
-                # set starting_date to the datetime of the next index:
-                starting_date = parse_date[idx + 1]
+    # returns the streak data, the count is the maximum streak (bool_max_count == True) or the current streak.
+    # If the current streak is 0, there hasn't been a habit logged of (status -1):
+    return StreakResult(
+        count=count_max if bool_max_count == True else count,
+        status=status if count != 0 else -1,
+        current=count,
+        maximum=count_max,
+        last_checkoff=latest_checkoff,
+        periodicity=periodicity,
+    )
 
-            # else considered as breaking the habit:
-            else:
 
-                # set count back to 1:
-                count = 1
+@instrumented
+def calculation_of_streaks_between(db: sqlite3.Connection, habit_id: int, start=None, end=None, bool_max_count=False, user_id=None) -> StreakResult:
+    """This function calculates the streak of the habit with habit_id like calculation_of_streaks, but only from the checkoffs
+    from start (inclusive) to end (exclusive), e.g. the streak within a quarter. Only this range of the habit_log is read
+    (through the index on (habit_id, checkoff)), the stored streak state isn't read or changed.
 
-                # set status to 3 (broken the habit):
-                status = 3 if starting_date != parse_date[0] else 1
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the individual habit
+        start (datetime, optional): first time of the range (inclusive). Defaults to None (first checkoff).
+        end (datetime, optional): end of the range (exclusive). Defaults to None (last checkoff).
+        bool_max_count (bool, optional): if True: result[0] is the maximum streak, if False: result[0] is the current streak. Defaults to False.
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
+
+    Raises:
+        TypeError: if there is no habit with habit_id (of the user)
+
+    Returns:
+        StreakResult: (count, status, current, maximum, last_checkoff, periodicity) of the habit within the range
+    """
 
-                # set starting_date to the datetime of the next index:
-                starting_date = parse_date[idx + 1]
+    # get the periodicity of the habit and stream its checkoffs within the range:
+    periodicity = get_periods(db, habit_id, user_id)
+    last_checkoff = [None]
+    checkoffs = remember_last(iter_checkoffs_between(db, habit_id, start, end, user_id=user_id), last_checkoff)
 
-        # else considered as breaking the habit:
-        else:
+    # calculate current streak, maximum streak and status from the checkoffs of the range:
+    _, count, count_max, status = fold_checkoffs(periodicity, checkoffs)
 
-            # set count back to 1:
-            count = 1
+    return StreakResult(
+        count=count_max if bool_max_count == True else count,
+        status=status if count != 0 else -1,
+        current=count,
+        maximum=count_max,
+        last_checkoff=last_checkoff[0],
+        periodicity=periodicity,
+    )
 
-            # set status to 3 (broken the habit):
-            status = 3 if starting_date != parse_date[0] else 1
 
-            # set starting_date to the datetime of the next index:
-            starting_date = parse_date[idx + 1]
+def calculation_of_streaks_as_of(db: sqlite3.Connection, habit_id: int, as_of: datetime, bool_max_count=False, user_id=None) -> StreakResult:
+    """This function calculates the streak of the habit with habit_id as it was at the time as_of, from the checkoffs before as_of.
+    For the streak at the end of a day, as_of is the start of the following day.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the individual habit
+        as_of (datetime): time of the streak (exclusive)
+        bool_max_count (bool, optional): if True: result[0] is the maximum streak, if False: result[0] is the current streak. Defaults to False.
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
+
+    Returns:
+        StreakResult: (count, status, current, maximum, last_checkoff, periodicity) of the habit at the time as_of
+    """
+    return calculation_of_streaks_between(db, habit_id, None, as_of, bool_max_count, user_id)
+
+
+@instrumented
+def calculate_streaks_of_all_between(db: sqlite3.Connection, start=None, end=None, user_id=None) -> list:
+    """This function calculates the ranking of calculate_streaks_of_all from the checkoffs from start (inclusive) to end (exclusive).
+    The range of every habit is read from the index on (habit_id, checkoff) in a single pass.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        start (datetime, optional): first time of the range (inclusive). Defaults to None (no lower bound).
+        end (datetime, optional): end of the range (exclusive). Defaults to None (no upper bound).
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+
+    Returns:
+        list: habits ranked by maximum streak within the range (descending) and id [(habit_id, habit_name, count_max, last_checkoff)]
+    """
+    ranking = streaks_of_rows(iter_all_checkoffs_between(db, start, end, user_id=user_id))
+    ranking.sort(key=itemgetter(2), reverse=True)
+    return ranking
+
+
+def streak_points(periodicity: str, records, starting_date=None, count=0, count_max=0, status=0):
+    """This function yields the streak after every checkoff of a habit in a single pass over its checkoffs.
+    The streak can be continued from a former point by passing its starting_date, count, count_max and status.
+
+    Args:
+        periodicity (str): periodicity of the habit (a registered periodicity, e.g. "daily", "weekly" or "monthly")
+        records (iterable): checkoffs of the habit as CheckoffRecord in chronological order
+        starting_date (datetime, optional): last checkoff that counted for the streak. Defaults to None.
+        count (int, optional): current streak. Defaults to 0.
+        count_max (int, optional): maximum streak. Defaults to 0.
+        status (int, optional): current status. Defaults to 0.
+
+    Yields:
+        tuple: point after the checkoff (log_id, checkoff, count, count_max, status, starting_date)
+    """
+    step, delta_hours = streak_steps[periodicity], streak_delta_hours[periodicity]
+    for record in records:
+        starting_date, count, status = step(starting_date, parse_checkoff(record.checkoff), count, status, delta_hours)
 
         # checks if current count is greater equal the maximum count, if so, update the max_count value:
         if count >= count_max:
             count_max = count
+        yield record.log_id, record.checkoff, count, count_max, status, starting_date
 
-    # returns the maximum streak or the current count and status, depending on the bool_max_count value:
-    return count_max if bool_max_count == True else count, status
 
+def iter_running_streaks(db: sqlite3.Connection, habit_id: int, user_id=None):
+    """This function yields the streak of the habit with habit_id after every checkoff, calculated in a single pass
+    over the streamed checkoffs (without storing them), e.g. to plot the complete streak history.
 
-def calc_streak_monthly(
-    db: sqlite3.Connection,
-    habit_id: int,
-    parse_date: list,
-    bool_max_count: bool,
-    delta_hours=delta_hour_monthly,
-) -> int:
-    """This function calculates the respective streaks for mothly habits. 
-        The calculation consideres checked off in time if the checkoff is in the next month and a timespan 
-        greater than delta_hours is between the checkoffs (status=1). If there isn't a difference of delta_hours between two 
-        checkoffs or the checkoffs happen the same month, the habit is considered to be already checked off in the 
-        respective timespan (status=2). If none of the above, the habit is considered to be broken (status=3). 
-        The status will be returned with the current strike (bool_max_count=False). 
-        With bool_max_count=True, the maximum streak will be returned only.
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the individual habit
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
+
+    Raises:
+        TypeError: if there is no habit with habit_id (of the user)
 
+    Yields:
+        StreakPoint: streak after every checkoff (log_id, checkoff, count, count_max, status)
+    """
+    periodicity = get_periods(db, habit_id, user_id)
+    for point in streak_points(periodicity, iter_log_data(db, habit_id, user_id=user_id)):
+        yield StreakPoint._make(point[:5])
+
+
+@instrumented
+def refresh_streak_history(db: sqlite3.Connection, habit_id: int, user_id=None) -> int:
+    """This function brings the stored streak history of the habit with habit_id up to date. The history is continued
+    from its last stored point with the checkoffs after it, so every checkoff is only calculated once. Saving a log
+    removes the points after it (see Log.save), so checkoffs in the past are calculated again from there.
+    Read-only connections can't store the history, it is calculated by iter_running_streaks instead.
 
     Args:
         db (sqlite3.Connection): Connection to Database
         habit_id (int): id of the individual habit
-        parse_date (list): list of the log_data in datetime format
-        bool_max_count (bool): if True: Function will return the maximum streak, if False: Function will return current streak
-        delta_hours (int, optional): Time between the respective checkoffs to be considered as a streak in hours. Defaults to delta_hour_monthly.
-        
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
+
+    Raises:
+        TypeError: if there is no habit with habit_id (of the user)
+
     Returns:
-        int: maximum of streaks if bool_max_count == True, else current streak
+        int: number of new points of the history, 0 for read-only connections
     """
-    # define count variable (current count) and count_max (maximum count) and assign them to 0:
-    count = count_max = 0
 
-    # define status variable and assign it to 0 to later check the status of the checkoff (done in time / obsolete / broken the habit):
-    status = 0
+    # the user is checked with the periodicity, the history and the checkoffs belong to the habit:
+    periodicity = get_periods(db, habit_id, user_id)
+    if getattr(db, "read_only", False):
+        return 0
+    last = get_last_streak_point(db, habit_id)
+
+    # calculate the complete history or continue it from the last stored point:
+    if last is None:
+        points = streak_points(periodicity, iter_log_data(db, habit_id))
+    else:
+        log_id, checkoff, count, count_max, status, starting_date = last
+        points = streak_points(periodicity, iter_log_data_after(db, habit_id, checkoff, log_id),
+            parse_checkoff(starting_date), count, count_max, status)
 
-    # get the log data from the database of a certain habit for further calculation:
-    dataset_of_habit_log = get_all_log_data(db, habit_id)
+    # store the starting_date of every point in the same format as its checkoff:
+    return save_streak_points(db, habit_id, ((log_id, checkoff, count, count_max, status, to_storage(starting_date, isinstance(checkoff, int)))
+        for log_id, checkoff, count, count_max, status, starting_date in points))
 
-    # define the starting date and set it to the first index of the list parse_date (a datetime far in the past):
-    starting_date = parse_date[0]
 
-    # iterates over the length of the dataset of habit logs:
-    for idx in range(len(dataset_of_habit_log)):
+def default_range(start=None, end=None, days=365) -> tuple:
+    """This function completes the range of the reports: end defaults to the start of tomorrow (today is included)
+    and start defaults to days before end.
 
-        # checks if year of last and next checkoff is the same:
-        if starting_date.year == parse_date[idx + 1].year:
+    Returns:
+        tuple: start and end of the range as datetime (start, end)
+    """
+    end = end or datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    return start or end - timedelta(days=days), end
 
-            # checks if month of last checkoff +1 equals month of next checkoff and if there are less than delta_hours hours between the checkoffs:
-            if parse_date[idx + 1].month == starting_date.month + 1 and parse_date[
-                idx + 1
-            ] - starting_date >= timedelta(hours=delta_hours):
 
-                # increase counter by 1:
-                count += 1
+def count_periods(periodicity: str, first: datetime, end: datetime) -> int:
+    """This function returns the number of periods (e.g. days, weeks or months) from the period of first to the period
+    of the last second before end by the difference of their period ordinals, without iterating over the periods.
 
-                # set status to 1 (checked off in time):
-                status = 1
+    Args:
+        periodicity (str): periodicity of the habit (a registered periodicity, e.g. "daily", "weekly" or "monthly")
+        first (datetime): first time of the range (inclusive)
+        end (datetime): end of the range (exclusive)
 
-                # set starting_date to the datetime of the next index:
-                starting_date = parse_date[idx + 1]
+    Returns:
+        int: number of periods, 0 if the range is empty
+    """
+    if end <= first:
+        return 0
+    ordinal = periodicities[periodicity].ordinal
+    return ordinal(end - timedelta(seconds=1)) - ordinal(first) + 1
 
-            # checks if month of next checkoff equals last checkoff, if so, it is considered to be already logged for the period:
-            elif parse_date[idx + 1].month == starting_date.month:
 
-                # set status to 2 (checked off already in expected time):
-                status = 2
+@instrumented
+def calculate_completion_rates(db: sqlite3.Connection, start=None, end=None, user_id=None) -> list:
+    """This function calculates the completion rate of every habit from start (inclusive) to end (exclusive): the share of its
+    periods (days, weeks or months since the habit was created) with at least one checkoff. The completed periods are counted
+    by GROUP BY in SQL (get_completed_periods), only the number of periods is calculated per habit.
 
-            # checks if month of next checkoff is greater than month of last checkoff + 1 (considered as habit broken):
-            elif parse_date[idx + 1].month > starting_date.month + 1:
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        start (datetime, optional): first time of the range (inclusive). Defaults to 365 days before end.
+        end (datetime, optional): end of the range (exclusive). Defaults to the start of tomorrow.
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
 
-                # set status to 3 (broken the habit):
-                status = 3 if starting_date != parse_date[0] else 1
+    Returns:
+        list: habits ordered by id [(habit_id, habit_name, periodicity, completed_periods, periods, rate)]
+    """
+    start, end = default_range(start, end)
+    rates = []
+    for habit_id, habit_name, periodicity, created, completed in get_completed_periods(db, start, end, user_id):
+        periods = count_periods(periodicity, max(start, parse_checkoff(created)), end)
+        rates.append((habit_id, habit_name, periodicity, completed, periods, completed / periods if periods else 0.0))
+    return rates
 
-                # set count back to 1:
-                count = 1
 
-                # set starting_date to the datetime of the next index:
-                starting_date = parse_date[idx + 1]
+@instrumented
+def calculate_heatmap(db: sqlite3.Connection, start=None, end=None, habit_id=None, user_id=None) -> tuple:
+    """This function calculates the calendar heatmap of the habits: the number of checkoffs of every habit on every day
+    from start (inclusive) to end (exclusive). The days of the checkoffs are calculated and grouped by habit in SQL
+    (get_checkoff_days) and counted per day with a Counter, only the days with checkoffs are filled into the matrix.
 
-        # checks if last checkoff year +1 is the year of the next checkoff and next month=January:
-        elif (
-            starting_date.year + 1 == parse_date[idx + 1].year
-            and parse_date[idx + 1].month == 1
-        ):
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        start (datetime, optional): first day of the heatmap (inclusive). Defaults to 365 days before end.
+        end (datetime, optional): end of the heatmap (exclusive). Defaults to the start of tomorrow.
+        habit_id (int, optional): only the heatmap of this habit. Defaults to None (all habits).
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
 
-            # increase counter by 1
-            count += 1
+    Raises:
+        TypeError: if there is no habit with habit_id (of the user)
 
-            # set status to 1 (checked off in time)
-            status = 1
+    Returns:
+        tuple: days of the columns and a row per habit ordered by id ([date], [(habit_id, habit_name, [checkoffs per day])])
+    """
+    start, end = default_range(start, end)
+    first = start.date()
+    days = [first + timedelta(days=offset) for offset in range(count_periods("daily", start, end))]
+
+    # define a row of zeros for every habit:
+    habits = [(habit_id, get_habit_name(db, habit_id, user_id))] if habit_id is not None else get_all_habit_name_and_id(db, user_id)
+    rows = {row_id: (row_id, habit_name, [0] * len(days)) for row_id, habit_name in sorted(habits)}
+
+    # count the checkoffs per day and fill the days with checkoffs into the rows, the days are returned as ordinals:
+    first_day = first.toordinal()
+    for row_id, checkoff_days in get_checkoff_days(db, start, end, habit_id, user_id):
+        checkoffs = rows[row_id][2]
+        for day, count in Counter(checkoff_days.split(",")).items():
+            offset = int(day) - first_day
+            if 0 <= offset < len(days):
+                checkoffs[offset] = count
+    return days, list(rows.values())
+
+
+@instrumented
+def calculate_streaks_of_all(db: sqlite3.Connection, user_id=None) -> list:
+    """This function calculates the maximum streak and the last checkoff of all habits stored in the connected database.
+    The checkoffs of all habits are read once as a stream ordered by (habit_id, checkoff) and the streak of every habit
+    is calculated in the same pass, so there is no further query per habit.
 
-            # set starting_date to the datetime of the next index
-            starting_date = parse_date[idx + 1]
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
 
-        # checks if last checkoff year +1 is the year of the next checkoff and next month is not january:
-        elif (
-            starting_date.year + 1 == parse_date[idx + 1].year
-            and parse_date[idx + 1].month != 1
-        ):
+    Returns:
+        list: habits ranked by maximum streak (descending) and id [(habit_id, habit_name, count_max, last_checkoff)]
+    """
 
-            # set count back to 1:
-            count = 1
+    # calculate the maximum streak and last checkoff of every habit in a single pass over the checkoffs:
+    ranking = streaks_of_rows(iter_all_checkoffs(db, user_id))
 
-            # set status to 3 (broken the habit):
-            status = 3 if starting_date != parse_date[0] else 1
+    # rank the habits by their maximum streak, habits with the same streak stay ordered by id:
+    ranking.sort(key=itemgetter(2), reverse=True)
+    return ranking
 
-            # set starting_date to the datetime of the next index:
-            starting_date = parse_date[idx + 1]
 
-        # else set starting_date to the datetime of the next index and set count back to 1 (considered first checkoff):
-        else:
-            count = 1
-            status = 1
-            starting_date = parse_date[idx + 1]
+def streaks_of_rows(rows) -> list:
+    """This function calculates the maximum streak and the last checkoff of every habit from rows ordered by (habit_id, checkoff),
+    as they are returned by iter_all_checkoffs.
 
-        # checks if current count is greater equal the maximum count, if so, update the max_count value:
-        if count >= count_max:
-            count_max = count
+    Args:
+        rows (iterable): rows (id, name, periodicity, checkoff), a habit without checkoffs has a single row without checkoff
 
-    # returns the maximum streak or the current count and status, depending on the bool_max_count value:
-    return count_max if bool_max_count == True else count, status
+    Returns:
+        list: habits ordered by id [(habit_id, habit_name, count_max, last_checkoff)]
+    """
+    return [(habit_id, habit_name, count_max, last_checkoff)
+        for habit_id, habit_name, _, _, count_max, last_checkoff in iter_streaks_of_rows(rows)]
 
 
-def calculation_of_streaks(db: sqlite3.Connection, habit_id: int, bool_max_count: bool) -> int:
-    """A function to improve the arrangement of the program. Depending on the habit_id given as argumenent, the 
-    streak is calculated via one of the functions for daily, weekly or monthly habits. 
+def iter_streaks_of_rows(rows):
+    """This function yields the current and the maximum streak and the last checkoff of every habit from rows ordered
+    by (habit_id, checkoff), as they are returned by iter_all_checkoffs. The streak of a habit is yielded as soon as its rows
+    were consumed, so the habits are calculated one after another in a single pass over the rows.
 
     Args:
-        db (sqlite3.Connection): Connection to Database
-        habit_id (int): id of the individual habit
-        bool_max_count (bool): if True: Function will return the maximum streak, if False: Function will return current streak
+        rows (iterable): rows (id, name, periodicity, checkoff), a habit without checkoffs has a single row without checkoff
 
-    Returns:
-        int: maximum of streaks if bool_max_count == True, else current streak
+    Yields:
+        tuple: habit in the order of the rows (habit_id, habit_name, periodicity, count, count_max, last_checkoff)
     """
 
-    # get the periodicity of the habit with habid_id from the connected database and store it in the variable periodicity
-    periodicity = get_periods(db, habit_id)
-
-    # define streak-variable and assign it to 0:
-    respective_streak = 0
-
-    # checks if periodicity of the habit is "daily", "weekly" or "monthly" and calculates according to the bool_max_count:
-    # True: the maximum streak (respective_streak[0])
-    # False: the current streak (respective_streak[0]) and the current status (respective_streak[1]):
-    if periodicity == "daily":
-        respective_streak = calc_streak_daily(
-            db,
-            habit_id,
-            convert_date_and_time_for_calculation(db, habit_id),
-            bool_max_count,
-        )
-
-    elif periodicity == "weekly":
-        respective_streak = calc_streak_weekly(
-            db,
-            habit_id,
-            convert_date_and_time_for_calculation(db, habit_id),
-            bool_max_count,
-        )
-
-    elif periodicity == "monthly":
-        respective_streak = calc_streak_monthly(
-            db,
-            habit_id,
-            convert_date_and_time_for_calculation(db, habit_id),
-            bool_max_count,
-        )
-
-    # returns the respective streak data (count, status).
-    # If respective_streak[0] is 0, there hasn't been a habit logged of (return -1):
-    return respective_streak[0], respective_streak[1] if respective_streak[0] != 0 else -1
-
-
-def calculate_longest_streak_of_all(db: sqlite3.Connection) -> tuple:
-    """This functions calculates the longest streak of all habits stored in the connected database. 
-    Therefore the function calculation_of_streaks is called and executed for every habit.
+    # iterates over the checkoffs of every habit in chronological order:
+    for (habit_id, habit_name, periodicity), rows in groupby(rows, key=itemgetter(0, 1, 2)):
+
+        # stream the checkoffs of the habit (a habit without checkoffs has a single row without checkoff):
+        last_checkoff = [None]
+        checkoffs = remember_last((row[3] for row in rows if row[3] is not None), last_checkoff)
+
+        # calculate the current and the maximum streak of the habit:
+        _, count, count_max, _ = fold_checkoffs(periodicity, checkoffs)
+        yield habit_id, habit_name, periodicity, count, count_max, last_checkoff[0]
+
+
+@instrumented
+def calculate_leaderboard(db: sqlite3.Connection, k=10, by="maximum", normalized=True, periodicity=None, user_id=None) -> list:
+    """This function returns the top k habits by their current or maximum streak. The streaks of all habits are calculated
+    in a single pass over the checkoffs (iter_all_checkoffs) and the top k are selected with a heap (heapq.nlargest),
+    so the habits aren't sorted and no query per habit is needed. Habits without checkoffs aren't ranked.
+    Normalized streaks are compared in days, so a streak of 3 months ranks above a streak of 3 days.
 
     Args:
         db (sqlite3.Connection): Connection to Database
+        k (int, optional): number of habits on the leaderboard. Defaults to 10.
+        by (str, optional): streak the habits are ranked by ("current" or "maximum"). Defaults to "maximum".
+        normalized (bool, optional): if True: rank by the streak in days, if False: rank by the number of periods. Defaults to True.
+        periodicity (str, optional): only the habits with this periodicity. Defaults to None (all periodicities).
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+
+    Raises:
+        ValueError: if by isn't "current" or "maximum"
 
     Returns:
-        tuple: habit_id (as list of ints) and maximum streak (as int) ([1],1)
+        list: top k habits ranked by streak (descending) and id [LeaderboardEntry]
     """
+    if by not in choice_for_leaderboard:
+        raise ValueError(f"Unknown streak {by}, choose one of {choice_for_leaderboard}.")
 
-    # define count_max as variable with maximum streak and assign it to 0:
-    count_max = 0
+    def entries():
+        # yields the streaks of all habits with checkoffs in a single pass over the checkoffs:
+        rows = iter_all_checkoffs(db, user_id, periodicity=periodicity)
+        for habit_id, habit_name, habit_periodicity, count, count_max, last_checkoff in iter_streaks_of_rows(rows):
+            if last_checkoff is not None:
+                streak = count_max if by == "maximum" else count
+                days = round(streak * periodicities[habit_periodicity].days(), 1)
+                yield LeaderboardEntry(habit_id, habit_name, habit_periodicity, streak, days, last_checkoff)
 
-    # define list where the habit_ids with the maximum streaks are stored and assign it as empty list:
-    habit_max_id = []
+    # select the top k with a heap, habits with the same streak stay ordered by id:
+    return heapq.nlargest(k, entries(), key=attrgetter("days" if normalized else "streak"))
 
-    # define list where the data of the habit is stored [(id, name, periodicity, description, created)]:
-    complete_habit_data = get_all_habits(db)
 
-    # iterates over the length of the dataset of all habits:
-    for i in range(len(complete_habit_data)):
+@instrumented
+def calculate_longest_streak_of_all(db: sqlite3.Connection, user_id=None) -> tuple:
+    """This functions calculates the longest streak of all habits stored in the connected database. 
+    Therefore the ranking of all habits is calculated once by the function calculate_streaks_of_all.
 
-        # define variable count_max_individual with the maximum streak of the habit at index i:
-        count_max_individual = calculation_of_streaks(
-            db, complete_habit_data[i][0], True
-        )[0]
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
 
-        # checks if maximum streak of habit at index i is greater than maximum streak:
-        if count_max_individual > count_max:
+    Returns:
+        tuple: habit_id (as list of ints) and maximum streak (as int) ([1],1)
+    """
 
-            # set value for maximum streak to maximum streak of habit at index i:
-            count_max = count_max_individual
+    # define list with the ranking of all habits [(habit_id, habit_name, count_max, last_checkoff)]:
+    return longest_of_ranking(calculate_streaks_of_all(db, user_id))
 
-            # clear the list with the id of the maximum habits that is stored until now:
-            habit_max_id.clear()
 
-            # appends the current habit id to the list of id for maximum habits:
-            habit_max_id.append(complete_habit_data[i][0])
+def longest_of_ranking(ranking: list) -> tuple:
+    """This function returns the habits with the longest streak of a ranking calculated by calculate_streaks_of_all.
 
-        # checks if maximum streak of habit at index i is equal to the maximum streak:
-        elif count_max_individual == count_max:
+    Args:
+        ranking (list): habits ranked by maximum streak [(habit_id, habit_name, count_max, last_checkoff)]
+
+    Returns:
+        tuple: habit_id (as list of ints) and maximum streak (as int) ([1],1)
+    """
 
-            # appends the current habit id to the list of id for maximum habits:
-            habit_max_id.append(complete_habit_data[i][0])
+    # define count_max as variable with maximum streak of the first ranked habit, 0 if there isn't any habit:
+    count_max = ranking[0][2] if ranking else 0
 
     # returns the id of the maximum habit(s) as a list, and returns maximum count as int
-    return habit_max_id, count_max
+    return [habit[0] for habit in ranking if habit[2] == count_max], count_max
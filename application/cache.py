@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from functools import wraps
+import sqlite3
+
+# define the default number of query results which are kept per connection
+default_query_cache_size = 256
+
+
+class QueryCache:
+    """A class to represent a bounded cache of query results with least-recently-used eviction.
+
+    Every result is stored with the tables it was read from, so writing a table only removes the results of that table.
+    The cache also remembers the number of changes of the connection (sqlite3.Connection.total_changes) after the last
+    announced write. If the connection has changed rows without announcing it (e.g. raw INSERT statements), all results are removed
+    before the next result is returned. Writes which aren't announced are only detected until the next announced write.
+    Commits of other connections (e.g. a cron job or the server in another process) change PRAGMA data_version,
+    which is read before every lookup, and remove all results as well.
+
+    Attributes
+    ----------
+    maxsize : int
+        maximum number of results stored in the cache
+    hits : int
+        number of results returned from the cache
+    misses : int
+        number of results read from the database
+
+    Methods
+    -------
+    get(db, key):
+        returns the stored result of the key or None.
+    put(key, tables, result):
+        stores the result of the key which was read from the tables.
+    invalidate(db, tables):
+        removes all results which were read from one of the tables.
+    clear():
+        removes all results.
+    """
+
+    def __init__(self, maxsize=default_query_cache_size):
+        """Constructs all the necessary attributes for the QueryCache object.
+
+        Args:
+            maxsize (int, optional): maximum number of results stored in the cache. Defaults to default_query_cache_size.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.results = OrderedDict()
+        self.known_changes = 0
+        self.known_version = None
+
+
+    def get(self, db: sqlite3.Connection, key: tuple):
+        """
+        Returns the stored result of the key or None, if the key isn't stored.
+        """
+
+        # remove all results, if the connection has changed rows since the last announced write
+        # or another connection has committed to the database since the last lookup:
+        data_version = db.execute("PRAGMA data_version").fetchone()[0]
+        if db.total_changes != self.known_changes or data_version != self.known_version:
+            self.clear()
+            self.known_changes = db.total_changes
+            self.known_version = data_version
+
+        entry = self.results.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        # mark the result as recently used:
+        self.results.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+
+    def put(self, key: tuple, tables: tuple, result) -> None:
+        """
+        Stores the result of the key which was read from the tables and evicts the least recently used result if the cache is full.
+        """
+        self.results[key] = (tables, result)
+        self.results.move_to_end(key)
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+
+
+    def invalidate(self, db: sqlite3.Connection, tables: tuple) -> None:
+        """
+        Removes all results which were read from one of the tables and accepts the changes of the connection so far.
+        """
+        for key in [key for key, entry in self.results.items() if set(entry[0]) & set(tables)]:
+            del self.results[key]
+        self.known_changes = db.total_changes
+
+
+    def clear(self) -> None:
+        """
+        Removes all results.
+        """
+        self.results.clear()
+
+
+class CachedConnection(sqlite3.Connection):
+    """A class to represent a sqlite3 connection with a QueryCache for the read functions of the database module.
+
+    Attributes
+    ----------
+    query_cache : QueryCache
+        cache of the query results of the connection
+    epoch_timestamps : bool
+        True if the database stores timestamps as integer seconds, None until it was read by timestamps_are_epoch
+    read_only : bool
+        True if the connection can't write (readers of the ConnectionManager), so derived states aren't stored
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Constructs the connection (with the arguments of sqlite3.connect) and its QueryCache.
+        """
+        super().__init__(*args, **kwargs)
+        self.query_cache = QueryCache()
+        self.epoch_timestamps = None
+        self.read_only = False
+
+
+def copy_result(result):
+    """This function copies the lists of a cached result (e.g. the list of lists of get_all_habit_name_and_id), so a caller
+    which changes the returned result doesn't change the stored result. Tuples of values and records are immutable and are kept.
+
+    Args:
+        result: result of a read function
+
+    Returns:
+        copy of the result with new lists
+    """
+    if isinstance(result, list):
+        if result and type(result[0]) in (list, tuple):
+            return [copy_result(item) for item in result]
+        return list(result)
+    if type(result) is tuple:
+        return tuple(copy_result(item) for item in result)
+    return result
+
+
+def cached_query(*tables):
+    """This function returns a decorator, which caches the results of a read function of the database module in the
+    QueryCache of the connection. The results are keyed by the function and its arguments and are removed when one of
+    the tables is written. Connections without a QueryCache are queried directly.
+    Keyword arguments are part of the key as well, so a result of a single user isn't returned for another user.
+    Every caller gets its own copy of the lists of a result (copy_result), the stored result isn't changed by callers.
+
+    Args:
+        tables (str): names of the tables the function reads from
+
+    Returns:
+        function: decorator for a function with the connection as first argument
+    """
+
+    def decorator(function):
+
+        @wraps(function)
+        def wrapper(db, *args, **kwargs):
+            cache = getattr(db, "query_cache", None)
+            if cache is None:
+                return function(db, *args, **kwargs)
+
+            # return the stored result or read it from the database and store it:
+            key = (function.__name__,) + args + tuple(sorted(kwargs.items()))
+            result = cache.get(db, key)
+            if result is None:
+                result = function(db, *args, **kwargs)
+                cache.put(key, tables, result)
+            return copy_result(result)
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(db: sqlite3.Connection, *tables) -> None:
+    """This function removes all cached results which were read from one of the tables.
+    It has to be called by every function which writes to the tables.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        tables (str): names of the written tables
+    """
+    cache = getattr(db, "query_cache", None)
+    if cache is not None:
+        cache.invalidate(db, tables)
@@ -0,0 +1,94 @@
+import sqlite3
+from .database import get_all_habit_name_and_id
+
+
+class HabitCatalog:
+    """A class to represent the habits shown in the menus of the CLI, which are kept in memory.
+    The ids and names are loaded once from the database and updated in place when habits are created or deleted,
+    so the choices of the menus don't have to be built from the database for every menu.
+
+    Attributes
+    ----------
+    db : sqlite3.Connection
+        Connection to the database
+    habits : dict
+        names of the habits by their id {id: name}
+
+    Methods
+    -------
+    load():
+        loads the ids and names of all habits from the connected database.
+    add(habit_id, habit_name):
+        adds a habit to the catalog.
+    remove(habit_id):
+        removes a habit from the catalog.
+    is_empty():
+        returns True if there is no habit in the catalog.
+    choices():
+        returns the choices of the habits for the menus of the CLI ['id - name', 'Back'].
+    resolve(choice):
+        returns id and name of the habit of a choice.
+    """
+
+    def __init__(self, db: sqlite3.Connection):
+        """Constructs all the necessary attributes for the HabitCatalog object and loads the habits.
+
+        Args:
+            db (sqlite3.Connection): Connection to Database
+        """
+        self.db = db
+        self.habits = {}
+        self.choice_list = None
+        self.load()
+
+
+    def load(self) -> None:
+        """
+        Loads the ids and names of all habits from the connected database with a single query.
+        """
+        self.habits = {habit_id: habit_name for habit_id, habit_name in get_all_habit_name_and_id(self.db)}
+        self.choice_list = None
+
+
+    def add(self, habit_id: int, habit_name: str) -> None:
+        """
+        Adds a habit to the catalog.
+        """
+        self.habits[int(habit_id)] = habit_name
+        self.choice_list = None
+
+
+    def remove(self, habit_id: int) -> None:
+        """
+        Removes a habit from the catalog.
+        """
+        self.habits.pop(int(habit_id), None)
+        self.choice_list = None
+
+
+    def is_empty(self) -> bool:
+        """
+        Returns True if there is no habit in the catalog.
+        """
+        return len(self.habits) == 0
+
+
+    def choices(self) -> list:
+        """
+        Returns the choices of the habits for the menus of the CLI ['id - name', 'Back'].
+        The list is only built again after the catalog was changed and must not be changed by the caller.
+        """
+        if self.choice_list is None:
+            self.choice_list = [f"{habit_id} - {habit_name}" for habit_id, habit_name in self.habits.items()]
+
+            # append "back" to allow the user to go back to main menu:
+            self.choice_list.append("Back")
+        return self.choice_list
+
+
+    def resolve(self, choice: str) -> tuple:
+        """
+        Returns id (as int) and name of the habit of a choice 'id - name'.
+        """
+        habit_id = int(choice.split(" - ", 1)[0])
+        return habit_id, self.habits[habit_id]
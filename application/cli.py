@@ -1,19 +1,28 @@
 import sqlite3
 import questionary
-from .database import get_periods, get_all_habit_name_and_id, default_habit_data
+from .connection import ConnectionManager
+from .database import default_habit_data
 from .habit import Habit, Log
-from .analytics import choice_for_periodicity
+from .catalog import HabitCatalog
+from .analytics import choice_for_periodicity, calculation_of_streaks
+from .importer import import_habits, import_checkoffs
+from .instrumentation import set_action
 from .printers import (
     print_all_habits,
     print_check_off,
     print_longest_streak_of_given_habit,
     print_with_same_period,
     print_longest_streak_of_all,
+    print_completion_rates,
+    print_heatmap,
+    print_leaderboard,
     print_delete,
+    print_import,
 )
 
 def show_habit_names_in_cli(db: sqlite3.Connection) -> list:
     """Function to call all stored habit_names and habit_ids and concatenate them for printing to the CLI.
+    The habits are loaded with a single query into a HabitCatalog, the CLI itself keeps its catalog during the menu loop.
 
     Args:
         db (sqlite3.Connection): Connection to Database
@@ -22,37 +31,30 @@ def show_habit_names_in_cli(db: sqlite3.Connection) -> list:
         list: List of strings of all stored name and id from connected database ['id - name']
     """
 
-    # define choice_of_habits variable and assign it to a empty list:
-    choice_of_habits = []
-
-    # define list res and append to it habit_name and id:
-    res = [row for row in get_all_habit_name_and_id(db)]
-
-    # iterate over the length of res:
-    for idx in range(len(res)):
-
-        # assign the variables id and name and store to them the respective habit-id and habit-name
-        id = str(get_all_habit_name_and_id(db)[idx][0])
-        name = get_all_habit_name_and_id(db)[idx][1]
+    # return list with id and habit:
+    return list(HabitCatalog(db).choices())
 
-        # assign the variable id_name and assign it as "id - name"
-        id_name = id + " - " + name
 
-        # append the id_name to the list of choice_of_habits
-        choice_of_habits.append(id_name)
+def checkout_connection(manager: ConnectionManager, choice: str):
+    """Function to check out the connection for an action of the main menu. The habits are analyzed with a read-only
+    connection of the pool, all other actions use the writer connection.
 
-    # append "back" to allow the user to go back to main menu:
-    choice_of_habits.append("Back")
+    Args:
+        manager (ConnectionManager): connections to the database
+        choice (str): action chosen in the main menu
 
-    # return list with id and habit:
-    return choice_of_habits
+    Returns:
+        contextmanager: checks out the connection and checks it back in afterwards
+    """
+    return manager.reader() if choice == "Analyze" else manager.writer()
 
 
-def cli(db: sqlite3.Connection) -> None:
+def cli(manager: ConnectionManager) -> None:
     """This function applies the Command Line Interface to let the user interact with the application.
+    A connection is checked out for every action of the main menu and checked back in afterwards.
 
     Args:
-        db (sqlite3.Connection): Connected Database
+        manager (ConnectionManager): connections to the database
     """
 
     # print the welcome screen:
@@ -64,14 +66,21 @@ def cli(db: sqlite3.Connection) -> None:
     # assign the variable main_menu and assign it to True:
     main_menu = True
 
+    # load the ids and names of all habits once with the writer, the catalog is updated when habits are created or deleted:
+    with manager.writer() as db:
+        catalog = HabitCatalog(db)
+
     # if no data stored, ask the user to start from scratch or load data:
-    if len(show_habit_names_in_cli(db)) == 1:
+    if catalog.is_empty():
         choices = (["Start from scratch", "Load default data"])
         choice = questionary.select("There is no data so far. Do you want to start from scratch or load default data?", 
         choices=choices).ask()
 
         # loads default data
-        if choice == "Load default data": default_habit_data(db)
+        if choice == "Load default data":
+            with manager.writer() as db:
+                default_habit_data(db)
+                catalog.load()
 
         # exit application for user use ctrl+c
         elif choice == None: main_menu = False
@@ -81,105 +90,129 @@ def cli(db: sqlite3.Connection) -> None:
     while main_menu:
 
         # ask the user for an action (at least one habit is stored):
-        choices = (["Create a Habit", "Check Off", "Analyze", "Delete", "Exit"]
+        choices = (["Create a Habit", "Check Off", "Analyze", "Delete", "Import", "Exit"]
 
             # ask the user for an action (no habits stored so far):
-            if len(show_habit_names_in_cli(db)) != 1
-            else ["Create a Habit", "Info", "Exit"])
+            if not catalog.is_empty()
+            else ["Create a Habit", "Import", "Info", "Exit"])
         choice = questionary.select("What do you want to do?", choices=choices).ask()
+        set_action(f"menu: {choice}")
+
+        # check out a read-only connection of the pool to analyze the habits and the writer for all other actions:
+        with checkout_connection(manager, choice) as db:
+
+            # if user wants to create a habit, continue with asking for a habit name:
+            if choice == "Create a Habit":
+                habit_name = questionary.text(
+                    "What's the name of your habit?\n",
+                    # make sure the user inserts at least one character:
+                    validate=lambda text: True if len(text) > 0
+                    else "Cannot be empty, please insert a name for your habit.").ask()
+
+                # if user didnt exit by shortcut (->None), continue with asking for a periodicity:
+                if habit_name is not None:
+                    periods = questionary.select("How often do you like to do that habit?\n",
+                        choices=choice_for_periodicity).ask()
+
+                    # if user didnt exit by shortcut (->None), continue with asking for a description:
+                    if periods is not None:
+                        description = questionary.text(
+                            "Give an description to your task (optional)\n").ask()
+
+                # if user didnt exit by shortcut (->None), create a habit with the Habit-class and store it
+                # with the method save():
+                if habit_name and periods and description is not None:
+                    habit = Habit(
+                        db=db,
+                        habit_name=habit_name,
+                        habit_periodicity=periods,
+                        habit_description=description)
+                    habit.save()
+                    catalog.add(habit.habit_id, habit_name)
+
+                    # Confirm to the user that the habit was stored:
+                    text = f'The habit "{habit_name}" has been stored.'
+                    print(text.center(71, "="))
+
+            # if user wants to check off a habit, continue with showing the therefore possible habits and ids:
+            elif choice == "Check Off":
+                if not catalog.is_empty():
+                    habit_name_and_id = questionary.select("Which habit do you want to check off?\n",
+                        choices=catalog.choices()).ask()
+
+                    # if user didnt exit by shortcut (->None) or select "Back"
+                    # create a log with the Log-Class and store it with the method save():
+                    if habit_name_and_id != None and habit_name_and_id != "Back":
+                        habit_id, habit_name = catalog.resolve(habit_name_and_id)
+                        log = Log(db, habit_id=habit_id, habit_name=habit_name)
+                        log.save()
+
+                        # Confirm to the user that the habit was checked off with the streak calculated once:
+                        print_check_off(habit_name, calculation_of_streaks(db, habit_id))
+
+            # if user wants to anaylze the habits, continue with showing the therefore possible actions:
+            elif choice == "Analyze":
+
+                choice = questionary.select("what do you want to analyze?",
+                    choices=[
+                        "List all tracked habits",
+                        "Habits with same periodicity",
+                        "Longest streak of habit",
+                        "Longest streak of all",
+                        "Leaderboard",
+                        "Completion rates",
+                        "Calendar heatmap",
+                        "Back"]).ask()
+                set_action(f"menu: Analyze / {choice}")
+
+                # prints all tracked habits and continue after user presses enter:
+                if choice == "List all tracked habits":
+                    print_all_habits(db)
+                    try:
+                        input("Press enter to continue.")
+                    except KeyboardInterrupt:
+                        print("\nYou have canceled by shortcut.\n\n")
 
-        # if user wants to create a habit, continue with asking for a habit name:
-        if choice == "Create a Habit":
-            habit_name = questionary.text(
-                "What's the name of your habit?\n",
-                # make sure the user inserts at least one character:
-                validate=lambda text: True if len(text) > 0
-                else "Cannot be empty, please insert a name for your habit.").ask()
-
-            # if user didnt exit by shortcut (->None), continue with asking for a periodicity:
-            if habit_name is not None:
-                periods = questionary.select("How often do you like to do that habit?\n",
+                # ask user for periodicity:
+                elif choice == "Habits with same periodicity":
+                    choice = questionary.select("which ones do you wanna see?", 
                     choices=choice_for_periodicity).ask()
 
-                # if user didnt exit by shortcut (->None), continue with asking for a description:
-                if periods is not None:
-                    description = questionary.text(
-                        "Give an description to your task (optional)\n").ask()
-
-            # if user didnt exit by shortcut (->None), create a habit with the Habit-class and store it
-            # with the method save():
-            if habit_name and periods and description is not None:
-                habit = Habit(
-                    db=db,
-                    habit_name=habit_name,
-                    habit_periodicity=periods,
-                    habit_description=description)
-                habit.save()
-
-                # Confirm to the user that the habit was stored:
-                text = f'The habit "{habit_name}" has been stored.'
-                print(text.center(71, "="))
-
-        # if user wants to check off a habit, continue with showing the therefore possible habits and ids:
-        elif choice == "Check Off":
-            if len(show_habit_names_in_cli(db)) != 1:
-                habit_name_and_id = questionary.select("Which habit do you want to check off?\n",
-                    choices=show_habit_names_in_cli(db)).ask()
-
-                # if user didnt exit by shortcut (->None) or select "Back"
-                # create a log with the Log-Class and store it with the method save():
-                if habit_name_and_id != None and habit_name_and_id != "Back":
-                    habit_id, habit_name = habit_name_and_id.split(" - ")
-                    log = Log(db, habit_id=habit_id, habit_name=habit_name)
-                    log.save()
-
-                    # Confirm to the user that the habit was checked off:
-                    print_check_off(db, habit_name, habit_id)
-
-        # if user wants to anaylze the habits, continue with showing the therefore possible actions:
-        elif choice == "Analyze":
-
-            choice = questionary.select("what do you want to analyze?",
-                choices=[
-                    "List all tracked habits",
-                    "Habits with same periodicity",
-                    "Longest streak of habit",
-                    "Longest streak of all",
-                    "Back"]).ask()
-
-            # prints all tracked habits and continue after user presses enter:
-            if choice == "List all tracked habits":
-                print_all_habits(db)
-                try:
-                    input("Press enter to continue.")
-                except KeyboardInterrupt:
-                    print("\nYou have canceled by shortcut.\n\n")
-
-            # ask user for periodicity:
-            elif choice == "Habits with same periodicity":
-                choice = questionary.select("which ones do you wanna see?", 
-                choices=choice_for_periodicity).ask()
-
-                # prints all accordingly tracked habits and continue after user presses enter:
-                if choice != None: print_with_same_period(db, choice)
-
-                # catch the error if the user cancels by shortcut:
-                try:
-                    input("Press enter to continue.")
-                except KeyboardInterrupt:
-                    print("\nYou have canceled by shortcut.\n\n")
+                    # prints all accordingly tracked habits and continue after user presses enter:
+                    if choice != None: print_with_same_period(db, choice)
 
-            # if the user wants to see the longest streak, all habits with ids are shown:
-            elif choice == "Longest streak of habit":
-                habit_name_and_id = questionary.select("Which streak do you want to see?\n",
-                    choices=show_habit_names_in_cli(db)).ask()
+                    # catch the error if the user cancels by shortcut:
+                    try:
+                        input("Press enter to continue.")
+                    except KeyboardInterrupt:
+                        print("\nYou have canceled by shortcut.\n\n")
 
-                # if user didnt exit by shortcut (->None) or selected "Back" the period of the chosen
-                # habit will be retrieved and the longest streak will be shown to the user:
-                if habit_name_and_id != "Back" and habit_name_and_id != None:
-                    habit_id, _ = habit_name_and_id.split(" - ")
-                    periods = get_periods(db, habit_id)
-                    print_longest_streak_of_given_habit(db, habit_id)
+                # if the user wants to see the longest streak, all habits with ids are shown:
+                elif choice == "Longest streak of habit":
+                    habit_name_and_id = questionary.select("Which streak do you want to see?\n",
+                        choices=catalog.choices()).ask()
+
+                    # if user didnt exit by shortcut (->None) or selected "Back" the period of the chosen
+                    # habit will be retrieved and the longest streak will be shown to the user:
+                    if habit_name_and_id != "Back" and habit_name_and_id != None:
+                        habit_id, habit_name = catalog.resolve(habit_name_and_id)
+
+                        # calculate the streak once, a type error is raised if the habit isn't stored in the database:
+                        try:
+                            streak = calculation_of_streaks(db, habit_id, True)
+                        except TypeError:
+                            streak = None
+                        print_longest_streak_of_given_habit(habit_name, streak)
+
+                        # catch the error if the user cancels by shortcut:
+                        try:
+                            input("Press enter to continue.")
+                        except KeyboardInterrupt:
+                            print("\nYou have canceled by shortcut.\n\n")
+
+                # shows the longest streak of all habits to the user:
+                elif choice == "Longest streak of all":
+                    print_longest_streak_of_all(db)
 
                     # catch the error if the user cancels by shortcut:
                     try:
@@ -187,67 +220,121 @@ def cli(db: sqlite3.Connection) -> None:
                     except KeyboardInterrupt:
                         print("\nYou have canceled by shortcut.\n\n")
 
-            # shows the longest streak of all habits to the user:
-            elif choice == "Longest streak of all":
-                print_longest_streak_of_all(db)
+                # ask user for the periodicity and show the top 10 habits by their longest streak in days:
+                elif choice == "Leaderboard":
+                    choice = questionary.select("which ones do you wanna see?",
+                    choices=["All"] + choice_for_periodicity).ask()
 
-                # catch the error if the user cancels by shortcut:
-                try:
-                    input("Press enter to continue.")
-                except KeyboardInterrupt:
-                    print("\nYou have canceled by shortcut.\n\n")
+                    # prints the leaderboard if the user didnt exit by shortcut (->None):
+                    if choice != None: print_leaderboard(db, periodicity=None if choice == "All" else choice)
 
-            # return to the main menu (if not set, pyinstaller throws an error..)
-            main_menu = True
+                    # catch the error if the user cancels by shortcut:
+                    try:
+                        input("Press enter to continue.")
+                    except KeyboardInterrupt:
+                        print("\nYou have canceled by shortcut.\n\n")
 
+                # shows the completion rates of all habits of the last year to the user:
+                elif choice == "Completion rates":
+                    print_completion_rates(db)
 
-        # if user wants to delete date, continue with showing the therefore possible habits and ids:
-        elif choice == "Delete":
+                    # catch the error if the user cancels by shortcut:
+                    try:
+                        input("Press enter to continue.")
+                    except KeyboardInterrupt:
+                        print("\nYou have canceled by shortcut.\n\n")
 
-            habit_name_and_id = questionary.select("Which habit do you want to delete?\n",
-                choices=show_habit_names_in_cli(db)).ask()
+                # if the user wants to see the heatmap, all habits with ids are shown:
+                elif choice == "Calendar heatmap":
+                    habit_name_and_id = questionary.select("Which heatmap do you want to see?\n",
+                        choices=catalog.choices()).ask()
 
-            # if user didnt exit by shortcut (->None) or select "Back" continue with asking what the user wants to delete:
-            if habit_name_and_id != None and habit_name_and_id != "Back":
-                delete_bool = questionary.select("What do you wanna delete?\n",
-                    choices=["All records", "Habit Log", "Back"]).ask()
+                    # if user didnt exit by shortcut (->None) or selected "Back" the heatmap of the last year is shown:
+                    if habit_name_and_id != "Back" and habit_name_and_id != None:
+                        habit_id, _ = catalog.resolve(habit_name_and_id)
+                        print_heatmap(db, habit_id)
 
-                # split the habit id and name to single variables and assign them to Habit and Log classes:
-                if delete_bool != "Back" and delete_bool != None:
-                    habit_id, habit_name = habit_name_and_id.split(" - ")
-                    habit = Habit(db, habit_id=habit_id)
-                    log = Log(db, habit_id=habit_id)
+                        # catch the error if the user cancels by shortcut:
+                        try:
+                            input("Press enter to continue.")
+                        except KeyboardInterrupt:
+                            print("\nYou have canceled by shortcut.\n\n")
 
-                    # if user wants to delete all records, use methods delete() of classes Habit and Log respectively:
-                    if delete_bool == "All records":
-                        log.delete()
-                        habit.delete()
+                # return to the main menu (if not set, pyinstaller throws an error..)
+                main_menu = True
 
-                        # confirm to user the data was deleted:
-                        print_delete(db, habit_name, True)
 
-                    # if user wants to delete the habit log, use method delete() of the class Log:
-                    elif delete_bool == "Habit Log":
-                        log.delete()
+            # if user wants to delete date, continue with showing the therefore possible habits and ids:
+            elif choice == "Delete":
 
-                        # confirm to user the data was deleted:
-                        print_delete(db, habit_name, False)
+                habit_name_and_id = questionary.select("Which habit do you want to delete?\n",
+                    choices=catalog.choices()).ask()
 
-        # prints a short information, if the user hasn't created a habit yet.
-        elif choice == "Info":
-            print("=".center(71, "="))
-            print("To see all the features, please create a habit first.".center(71, "="))
-            print("=".center(71, "="))
+                # if user didnt exit by shortcut (->None) or select "Back" continue with asking what the user wants to delete:
+                if habit_name_and_id != None and habit_name_and_id != "Back":
+                    delete_bool = questionary.select("What do you wanna delete?\n",
+                        choices=["All records", "Habit Log", "Back"]).ask()
+
+                    # split the habit id and name to single variables and assign them to Habit and Log classes:
+                    if delete_bool != "Back" and delete_bool != None:
+                        habit_id, habit_name = catalog.resolve(habit_name_and_id)
+                        habit = Habit(db, habit_id=habit_id)
+                        log = Log(db, habit_id=habit_id)
+
+                        # if user wants to delete all records, use methods delete() of classes Habit and Log respectively:
+                        if delete_bool == "All records":
+                            log.delete()
+                            habit.delete()
+                            catalog.remove(habit_id)
+
+                            # confirm to user the data was deleted:
+                            print_delete(db, habit_name, True)
+
+                        # if user wants to delete the habit log, use method delete() of the class Log:
+                        elif delete_bool == "Habit Log":
+                            log.delete()
+
+                            # confirm to user the data was deleted:
+                            print_delete(db, habit_name, False)
+
+            # if user wants to import habits or checkoffs from a file, continue with asking for the kind and the path of the file:
+            elif choice == "Import":
+                kind = questionary.select("What do you want to import?\n",
+                    choices=["Habits", "Check-offs", "Back"]).ask()
+
+                # if user didnt exit by shortcut (->None) or select "Back" continue with asking for the file:
+                if kind != None and kind != "Back":
+                    path = questionary.path("Which file (.csv or .jsonl) do you want to import?\n",
+                        validate=lambda text: True if text.endswith((".csv", ".jsonl", ".json"))
+                        else "Please insert the path of a .csv or .jsonl file.").ask()
+
+                    # import the file and reload the catalog, so imported habits are shown in the menus:
+                    if path:
+                        try:
+                            if kind == "Habits":
+                                report = import_habits(db, path)
+                                catalog.load()
+                            else:
+                                report = import_checkoffs(db, path)
+                            print_import(kind.lower(), report)
+                        except (OSError, UnicodeDecodeError, ValueError) as error:
+                            print(f"The file couldn't be imported: {error}")
+
+            # prints a short information, if the user hasn't created a habit yet.
+            elif choice == "Info":
+                print("=".center(71, "="))
+                print("To see all the features, please create a habit first.".center(71, "="))
+                print("=".center(71, "="))
 
-            # catch the error if the user cancels by shortcut:
-            try:
-                input("Press enter to continue.")
-            except KeyboardInterrupt:
-                print("\nYou have canceled by shortcut.\n\n")
+                # catch the error if the user cancels by shortcut:
+                try:
+                    input("Press enter to continue.")
+                except KeyboardInterrupt:
+                    print("\nYou have canceled by shortcut.\n\n")
 
-        # if user chooses Exit or use shortcut ctrl+c in the main menu, a goodbye message will be shown and the application will be closed:
-        elif choice == "Exit" or choice == None:
-            print("=".center(71, "="))
-            print(" Bye, see you next time! ".center(69, "="))
-            print("=".center(71, "="))
-            main_menu = False
+            # if user chooses Exit or use shortcut ctrl+c in the main menu, a goodbye message will be shown and the application will be closed:
+            elif choice == "Exit" or choice == None:
+                print("=".center(71, "="))
+                print(" Bye, see you next time! ".center(69, "="))
+                print("=".center(71, "="))
+                main_menu = False
@@ -0,0 +1,334 @@
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from .connection import ConnectionManager
+from .database import get_all_habits, get_habits_same_periods, get_all_habit_name_and_id, iter_streak_history
+from .habit import Log
+from .analytics import (
+    choice_for_periodicity,
+    calculation_of_streaks,
+    calculation_of_streaks_between,
+    calculate_streaks_of_all,
+    refresh_streak_history,
+    calculate_completion_rates,
+    calculate_heatmap,
+    calculate_leaderboard,
+    choice_for_leaderboard,
+)
+from .importer import import_habits, import_checkoffs, parse_timestamp, default_chunk_size
+from .timestamps import format_checkoff
+from .instrumentation import set_action
+
+
+class CommandError(Exception):
+    """A class to represent an error of a headless command, which is reported as JSON with exit code 1.
+    """
+
+
+class UnknownHabitError(CommandError):
+    """A class to represent the error of a command, which refers to a habit that isn't stored.
+    """
+
+
+def resolve_habit(db: sqlite3.Connection, habit: str, user_id=None) -> tuple:
+    """This function resolves the id or the name of a habit given on the command line.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit (str): id or name of the habit
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+
+    Raises:
+        UnknownHabitError: if there is no habit with the id or name
+        CommandError: if there is more than one habit with the name
+
+    Returns:
+        tuple: id and name of the habit (habit_id, habit_name)
+    """
+    habits = get_all_habit_name_and_id(db, user_id)
+    if habit.isdigit():
+        matches = [(habit_id, habit_name) for habit_id, habit_name in habits if habit_id == int(habit)]
+    else:
+        matches = [(habit_id, habit_name) for habit_id, habit_name in habits if habit_name == habit]
+    if not matches:
+        raise UnknownHabitError(f"There is no habit {habit!r}.")
+    if len(matches) > 1:
+        raise CommandError(f"The name {habit!r} is used by more than one habit, use its id.")
+    return matches[0]
+
+
+def streak_to_dict(habit_id: int, habit_name: str, streak) -> dict:
+    """This function converts the StreakResult of a habit into a dict, which can be written as JSON.
+    """
+    return {
+        "habit_id": habit_id,
+        "habit_name": habit_name,
+        "periodicity": streak.periodicity,
+        "current": streak.current,
+        "maximum": streak.maximum,
+        "status": streak.status,
+        "last_checkoff": format_checkoff(streak.last_checkoff) if streak.last_checkoff is not None else None,
+    }
+
+
+def command_checkout(db: sqlite3.Connection, args: argparse.Namespace) -> dict:
+    """This function checks off a habit (now or at the given time) and returns its streak.
+    """
+    habit_id, habit_name = resolve_habit(db, args.habit, args.user)
+    try:
+        log_date = parse_timestamp(args.at) if args.at else datetime.now().replace(microsecond=0)
+    except (ValueError, OverflowError, OSError) as error:
+        raise CommandError(f"Invalid timestamp {args.at!r}: {error}")
+    Log(db, habit_id=habit_id, habit_name=habit_name, log_date=log_date).save()
+    return {"checkoff": str(log_date), "streak": streak_to_dict(habit_id, habit_name, calculation_of_streaks(db, habit_id))}
+
+
+def command_streak(db: sqlite3.Connection, args: argparse.Namespace) -> dict:
+    """This function returns current streak, maximum streak, status and last checkoff of a habit.
+    With --start or --end, the streak is calculated from the checkoffs within this range only.
+    """
+    user_id = args.user
+    habit_id, habit_name = resolve_habit(db, args.habit, user_id)
+    start, end = getattr(args, "start", None), getattr(args, "end", None)
+    if start is None and end is None:
+        return streak_to_dict(habit_id, habit_name, calculation_of_streaks(db, habit_id, user_id=user_id))
+    try:
+        start, end = [parse_timestamp(bound) if bound else None for bound in (start, end)]
+    except (ValueError, OverflowError, OSError) as error:
+        raise CommandError(f"Invalid timestamp: {error}")
+    return streak_to_dict(habit_id, habit_name, calculation_of_streaks_between(db, habit_id, start, end, user_id=user_id))
+
+
+def command_longest(db: sqlite3.Connection, args: argparse.Namespace) -> dict:
+    """This function returns the habits with the longest streak of all and the ranking of all habits by their longest streak.
+    The longest streak and its habits are taken from the complete ranking, --limit only shortens the ranking which is returned.
+    """
+    if getattr(args, "workers", None):
+        from .parallel import calculate_streaks_of_all_parallel
+        ranking = calculate_streaks_of_all_parallel(db, args.workers, user_id=args.user)
+    else:
+        ranking = calculate_streaks_of_all(db, args.user)
+    longest = ranking[0][2] if ranking else 0
+    habit_ids = [habit_id for habit_id, _, count_max, _ in ranking if count_max == longest and longest > 0]
+    ranking = ranking[:args.limit] if args.limit is not None else ranking
+    return {
+        "longest_streak": longest,
+        "habit_ids": habit_ids,
+        "ranking": [
+            {"habit_id": habit_id, "habit_name": habit_name, "longest_streak": count_max,
+             "last_checkoff": format_checkoff(last_checkoff) if last_checkoff is not None else None}
+            for habit_id, habit_name, count_max, last_checkoff in ranking],
+    }
+
+
+def command_leaderboard(db: sqlite3.Connection, args: argparse.Namespace) -> dict:
+    """This function returns the top habits by their current or maximum streak, compared in days or in periods.
+    """
+    leaderboard = calculate_leaderboard(db, args.limit, args.by, not args.periods, args.periodicity, args.user)
+    return {
+        "by": args.by,
+        "unit": "periods" if args.periods else "days",
+        "leaderboard": [
+            {"rank": rank, "habit_id": entry.habit_id, "habit_name": entry.habit_name, "periodicity": entry.periodicity,
+             "streak": entry.streak, "days": entry.days, "last_checkoff": format_checkoff(entry.last_checkoff)}
+            for rank, entry in enumerate(leaderboard, 1)],
+    }
+
+
+def command_history(db: sqlite3.Connection, args: argparse.Namespace) -> dict:
+    """This function returns the streak of a habit after every checkoff from the stored streak history, which is refreshed first.
+    """
+    habit_id, habit_name = resolve_habit(db, args.habit, args.user)
+    refresh_streak_history(db, habit_id, args.user)
+    return {
+        "habit_id": habit_id,
+        "habit_name": habit_name,
+        "history": [{"checkoff": format_checkoff(checkoff), "current": count, "maximum": count_max, "status": status}
+            for _, checkoff, count, count_max, status in iter_streak_history(db, habit_id, user_id=args.user)],
+    }
+
+
+def parse_range(args: argparse.Namespace) -> tuple:
+    """This function parses the options --start and --end of a command, which are None if they aren't given.
+    """
+    try:
+        return tuple(parse_timestamp(bound) if bound else None for bound in (args.start, args.end))
+    except (ValueError, OverflowError, OSError) as error:
+        raise CommandError(f"Invalid timestamp: {error}")
+
+
+def command_completion(db: sqlite3.Connection, args: argparse.Namespace) -> dict:
+    """This function returns the completed periods, the periods and the completion rate of all habits (by default of the last year).
+    """
+    start, end = parse_range(args)
+    return {
+        "habits": [{"habit_id": habit_id, "habit_name": habit_name, "periodicity": periodicity,
+            "completed": completed, "periods": periods, "rate": round(rate, 4)}
+            for habit_id, habit_name, periodicity, completed, periods, rate in calculate_completion_rates(db, start, end, args.user)],
+    }
+
+
+def command_heatmap(db: sqlite3.Connection, args: argparse.Namespace) -> dict:
+    """This function returns the checkoffs per day of a habit or of all habits (by default of the last year).
+    """
+    habit_id = resolve_habit(db, args.habit, args.user)[0] if args.habit else None
+    start, end = parse_range(args)
+    days, rows = calculate_heatmap(db, start, end, habit_id, args.user)
+    return {
+        "days": [day.isoformat() for day in days],
+        "habits": [{"habit_id": row_id, "habit_name": habit_name, "checkoffs": checkoffs} for row_id, habit_name, checkoffs in rows],
+    }
+
+
+def command_list(db: sqlite3.Connection, args: argparse.Namespace) -> dict:
+    """This function returns all habits or the habits with the given periodicity.
+    """
+    if args.periodicity:
+        habits = [{"name": name, "periodicity": args.periodicity, "description": description, "created": format_checkoff(created)}
+            for name, description, created in get_habits_same_periods(db, args.periodicity, args.user)]
+    else:
+        habits = [{"habit_id": habit_id, "name": name, "periodicity": periodicity, "description": description, "created": format_checkoff(created)}
+            for habit_id, name, periodicity, description, created in get_all_habits(db, args.user)]
+    return {"habits": habits}
+
+
+def command_import(db: sqlite3.Connection, args: argparse.Namespace) -> dict:
+    """This function imports habits or checkoffs from a CSV or JSONL file and returns the report of the import.
+    """
+    importer = import_habits if args.kind == "habits" else import_checkoffs
+    try:
+        report = importer(db, args.path, args.chunk_size, args.user)
+    except (OSError, UnicodeDecodeError, ValueError) as error:
+        raise CommandError(f"The file couldn't be imported: {error}")
+    return {
+        "imported": report.imported,
+        "rejected": [{"line": line, "reason": reason} for line, reason in report.rejected],
+        "seconds": round(report.seconds, 6),
+        "rows_per_second": round(report.rows_per_second(), 1),
+    }
+
+
+def non_negative_int(value: str) -> int:
+    """This function parses an option of the command line, which has to be an integer of at least 0 (e.g. --limit).
+
+    Raises:
+        argparse.ArgumentTypeError: if the value isn't an integer or is negative
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} isn't an integer")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} is negative")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """This function builds the parser of the headless commands.
+
+    Returns:
+        argparse.ArgumentParser: parser with the subcommands checkout, streak, longest, list and import
+    """
+    parser = argparse.ArgumentParser(prog="main.py",
+        description="Habit Tracking Application. Without a command the interactive menu is started.")
+    parser.add_argument("--db", default="main.db", help="name of the database (default: main.db)")
+    parser.add_argument("--indent", type=int, default=None, help="indent the JSON output")
+    parser.add_argument("--profile", action="store_const", const="table", default=None,
+        help="write the SQL statements, calls, rows and durations per action as table to stderr at exit")
+    parser.add_argument("--profile-json", action="store_const", const="json", dest="profile",
+        help="write the same summary as JSON to stderr at exit")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    checkout = commands.add_parser("checkout", help="check off a habit")
+    checkout.add_argument("habit", help="id or name of the habit")
+    checkout.add_argument("--at", help='time of the checkoff "YYYY-MM-DD hh:mm:ss" or unix time (default: now)')
+    checkout.set_defaults(function=command_checkout)
+
+    streak = commands.add_parser("streak", help="show the streak of a habit")
+    streak.add_argument("habit", help="id or name of the habit")
+    streak.add_argument("--start", help='only checkoffs from this time "YYYY-MM-DD hh:mm:ss" (inclusive)')
+    streak.add_argument("--end", help='only checkoffs before this time "YYYY-MM-DD hh:mm:ss", e.g. the streak as of a date')
+    streak.set_defaults(function=command_streak, read_only=True)
+
+    longest = commands.add_parser("longest", help="show the longest streak of all habits")
+    longest.add_argument("--limit", type=non_negative_int, default=None, help="number of habits in the ranking")
+    longest.add_argument("--workers", type=int, default=None, help="calculate the streaks with worker processes")
+    longest.set_defaults(function=command_longest, read_only=True)
+
+    leaderboard = commands.add_parser("leaderboard", help="show the top habits by their streak in days")
+    leaderboard.add_argument("--limit", type=non_negative_int, default=10, help="number of habits on the leaderboard (default: 10)")
+    leaderboard.add_argument("--by", choices=choice_for_leaderboard, default="maximum", help="rank by the maximum or the current streak")
+    leaderboard.add_argument("--periodicity", choices=choice_for_periodicity, help="only habits with this periodicity")
+    leaderboard.add_argument("--periods", action="store_true", help="compare the number of periods instead of days")
+    leaderboard.set_defaults(function=command_leaderboard, read_only=True)
+
+    history = commands.add_parser("history", help="show the streak of a habit after every checkoff")
+    history.add_argument("habit", help="id or name of the habit")
+    history.set_defaults(function=command_history)
+
+    completion = commands.add_parser("completion", help="show the completion rate of all habits")
+    completion.add_argument("--start", help='first time of the range "YYYY-MM-DD hh:mm:ss" (default: 365 days before end)')
+    completion.add_argument("--end", help='end of the range "YYYY-MM-DD hh:mm:ss" (default: the start of tomorrow)')
+    completion.set_defaults(function=command_completion, read_only=True)
+
+    heatmap = commands.add_parser("heatmap", help="show the checkoffs per day of a habit or of all habits")
+    heatmap.add_argument("habit", nargs="?", help="id or name of the habit (default: all habits)")
+    heatmap.add_argument("--start", help='first day of the heatmap "YYYY-MM-DD" (default: 365 days before end)')
+    heatmap.add_argument("--end", help='end of the heatmap "YYYY-MM-DD" (default: the start of tomorrow)')
+    heatmap.set_defaults(function=command_heatmap, read_only=True)
+
+    habits = commands.add_parser("list", help="list the habits")
+    habits.add_argument("--periodicity", choices=choice_for_periodicity, help="only habits with this periodicity")
+    habits.set_defaults(function=command_list, read_only=True)
+
+    importer = commands.add_parser("import", help="import habits or checkoffs from a .csv or .jsonl file")
+    importer.add_argument("kind", choices=["habits", "checkoffs"])
+    importer.add_argument("path", help="path of the .csv or .jsonl file")
+    importer.add_argument("--chunk-size", type=int, default=default_chunk_size, help="rows per transaction")
+    importer.set_defaults(function=command_import)
+
+    # the server is started by main.py, the defaults of the options are defined by the module server:
+    server = commands.add_parser("serve", help="serve the habits and streaks as JSON over HTTP")
+    server.add_argument("--host", help="address the server listens on (default: 127.0.0.1)")
+    server.add_argument("--port", type=int, help="port the server listens on (default: 8080)")
+    server.add_argument("--workers", type=int, help="number of worker threads and read-only connections (default: 8)")
+    server.set_defaults(function=None)
+
+    # every command can be scoped to the habits of a single user of a multi-tenant database:
+    for command in commands.choices.values():
+        command.add_argument("--user", type=int, help="only the habits of this user (multi-tenant databases only)")
+    return parser
+
+
+def run_command(args: argparse.Namespace, output=sys.stdout) -> int:
+    """This function runs a headless command and writes its result as JSON. Errors of the command and expected errors of the
+    database, the file system or invalid values are written as JSON {"error": message} instead of a traceback.
+    Commands which only read (read_only) check out a read-only connection, all other commands check out the writer.
+    The interactive CLI (questionary and beautifultable) isn't imported.
+
+    Args:
+        args (argparse.Namespace): arguments of the command line parsed by the parser of build_parser
+        output (file, optional): file the JSON is written to. Defaults to sys.stdout.
+
+    Returns:
+        int: exit code (0 if the command succeeded, 1 if it failed)
+    """
+    set_action(f"command: {args.command}")
+    try:
+        manager = ConnectionManager(args.db, pool_size=1)
+        try:
+            with manager.reader() if getattr(args, "read_only", False) else manager.writer() as db:
+                result = args.function(db, args)
+        finally:
+            manager.close()
+        exit_code = 0
+    except CommandError as error:
+        result = {"error": str(error)}
+        exit_code = 1
+    except (sqlite3.Error, OSError, ValueError, OverflowError) as error:
+        result = {"error": f"{type(error).__name__}: {error}"}
+        exit_code = 1
+    output.write(json.dumps(result, indent=args.indent) + "\n")
+    return exit_code
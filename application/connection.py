@@ -0,0 +1,196 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from .database import create_connection
+from .cache import CachedConnection, default_query_cache_size
+from .instrumentation import trace_connection
+
+# define the default settings of the connections (cache_size in KiB if negative, mmap_size in bytes, busy_timeout in ms):
+default_cache_size = -16000
+default_mmap_size = 64 * 1024 * 1024
+default_synchronous = "NORMAL"
+default_busy_timeout = 5000
+default_pool_size = 4
+
+# define the allowed values of the pragma synchronous:
+choice_for_synchronous = ["OFF", "NORMAL", "FULL", "EXTRA"]
+
+
+def configure_connection(db: sqlite3.Connection, cache_size=default_cache_size, mmap_size=default_mmap_size,
+        synchronous=default_synchronous, busy_timeout=default_busy_timeout) -> None:
+    """This function applies the pragmas for the page cache, memory mapped I/O, the synchronous mode and the busy timeout
+    to a connection.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        cache_size (int, optional): pages of the page cache, or KiB if negative. Defaults to default_cache_size.
+        mmap_size (int, optional): bytes of the database which are memory mapped, 0 disables memory mapping. Defaults to default_mmap_size.
+        synchronous (str, optional): synchronous mode ("OFF", "NORMAL", "FULL" or "EXTRA"). Defaults to default_synchronous.
+        busy_timeout (int, optional): milliseconds to wait for a lock of another connection. Defaults to default_busy_timeout.
+
+    Raises:
+        ValueError: if synchronous isn't a valid synchronous mode
+    """
+    synchronous = str(synchronous).upper()
+    if synchronous not in choice_for_synchronous:
+        raise ValueError(f"Unknown synchronous mode {synchronous}, choose one of {choice_for_synchronous}.")
+
+    db.execute(f"PRAGMA cache_size = {int(cache_size)}")
+    db.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    db.execute(f"PRAGMA synchronous = {synchronous}")
+    db.execute(f"PRAGMA busy_timeout = {int(busy_timeout)}")
+
+
+class ConnectionManager:
+    """A class to represent the connections to a database: a single writer connection in WAL mode and a bounded pool
+    of read-only connections. In WAL mode readers don't block the writer and the writer doesn't block readers.
+
+    The writer keeps the query cache of create_connection, because every write of the application is announced to it.
+    The readers don't cache query results, because they can't see which rows the writer has changed.
+    Connections are checked out and checked back in, preferably with the context managers writer() and reader().
+
+    Attributes
+    ----------
+    name : str
+        name of the database
+    pool_size : int
+        maximum number of read-only connections
+    settings : dict
+        pragmas applied to every connection (cache_size, mmap_size, synchronous, busy_timeout)
+
+    Methods
+    -------
+    writer():
+        context manager which checks out the writer connection and checks it back in.
+    reader(timeout=None):
+        context manager which checks out a read-only connection and checks it back in.
+    checkout_reader(timeout=None):
+        returns a read-only connection of the pool, blocks while all connections are checked out.
+    checkin_reader(db):
+        returns a read-only connection to the pool.
+    close():
+        closes all connections.
+    """
+
+    def __init__(self, name="main.db", pool_size=default_pool_size, cache_size=default_cache_size,
+            mmap_size=default_mmap_size, synchronous=default_synchronous, busy_timeout=default_busy_timeout,
+            epoch_timestamps=False, query_cache_size=default_query_cache_size):
+        """Constructs the writer connection (which creates and migrates the database) and the empty pool of readers.
+
+        Args:
+            name (str, optional): Name of the Database. Defaults to "main.db".
+            pool_size (int, optional): maximum number of read-only connections. Defaults to default_pool_size.
+            cache_size (int, optional): pages of the page cache, or KiB if negative. Defaults to default_cache_size.
+            mmap_size (int, optional): bytes of the database which are memory mapped. Defaults to default_mmap_size.
+            synchronous (str, optional): synchronous mode of the connections. Defaults to default_synchronous.
+            busy_timeout (int, optional): milliseconds to wait for a lock. Defaults to default_busy_timeout.
+            epoch_timestamps (bool, optional): if True: timestamps are stored as integer seconds. Defaults to False.
+            query_cache_size (int, optional): maximum number of query results cached by the writer. Defaults to default_query_cache_size.
+
+        Raises:
+            ValueError: if pool_size is smaller than 1 or synchronous isn't a valid synchronous mode
+        """
+        if pool_size < 1:
+            raise ValueError("The pool needs at least one reader connection.")
+        self.name = name
+        self.pool_size = pool_size
+        self.settings = {"cache_size": cache_size, "mmap_size": mmap_size, "synchronous": synchronous, "busy_timeout": busy_timeout}
+
+        # create the writer connection, which is shared by threads under the writer lock:
+        self.writer_connection = create_connection(name, epoch_timestamps, query_cache_size, check_same_thread=False)
+        try:
+            configure_connection(self.writer_connection, **self.settings)
+            self.writer_connection.execute("PRAGMA journal_mode = WAL")
+        except (ValueError, sqlite3.Error):
+            self.writer_connection.close()
+            raise
+        self.writer_lock = threading.RLock()
+
+        # define the pool of idle readers, readers are opened on demand until pool_size readers are checked out:
+        self.idle_readers = queue.LifoQueue()
+        self.available_readers = threading.BoundedSemaphore(pool_size)
+        self.closed = False
+
+
+    @contextmanager
+    def writer(self):
+        """
+        Checks out the writer connection for the calling thread and checks it back in afterwards.
+        """
+        with self.writer_lock:
+            yield self.writer_connection
+
+
+    @contextmanager
+    def reader(self, timeout=None):
+        """
+        Checks out a read-only connection and checks it back in afterwards.
+        """
+        db = self.checkout_reader(timeout)
+        try:
+            yield db
+        finally:
+            self.checkin_reader(db)
+
+
+    def checkout_reader(self, timeout=None) -> sqlite3.Connection:
+        """
+        Returns a read-only connection of the pool and opens a new one if no idle connection is left and the pool isn't full.
+        Blocks while all connections are checked out and raises TimeoutError if none is returned within timeout seconds.
+        """
+        if not self.available_readers.acquire(timeout=timeout):
+            raise TimeoutError(f"No reader connection was checked in within {timeout} seconds.")
+        try:
+            return self.idle_readers.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self.open_reader()
+        except BaseException:
+            self.available_readers.release()
+            raise
+
+
+    def checkin_reader(self, db: sqlite3.Connection) -> None:
+        """
+        Returns a read-only connection to the pool, an open read transaction is finished first.
+        The connection is closed instead, if the manager was closed in the meantime.
+        """
+        if self.closed:
+            db.close()
+        else:
+            if db.in_transaction:
+                db.rollback()
+            self.idle_readers.put(db)
+        self.available_readers.release()
+
+
+    def open_reader(self) -> sqlite3.Connection:
+        """
+        Opens a read-only connection to the database with the settings of the manager.
+        """
+        uri = Path(self.name).resolve().as_uri() + "?mode=ro"
+        db = trace_connection(sqlite3.connect(uri, uri=True, check_same_thread=False, factory=CachedConnection))
+
+        # readers don't cache query results and don't store streak states, but remember the format of the timestamps like the writer:
+        db.query_cache = None
+        db.read_only = True
+        configure_connection(db, **self.settings)
+        db.execute("PRAGMA query_only = ON")
+        return db
+
+
+    def close(self) -> None:
+        """
+        Closes the idle readers and the writer connection. Readers which are checked out are closed by their checkin.
+        """
+        self.closed = True
+        while True:
+            try:
+                self.idle_readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self.writer_lock:
+            self.writer_connection.close()
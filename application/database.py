@@ -1,154 +1,894 @@
 import sqlite3
-from datetime import datetime
+from datetime import datetime, date
+from itertools import chain
 from .habit import Habit
-
-def create_connection(name="main.db") -> sqlite3.Connection:
+from .records import HabitRecord, CheckoffRecord, StreakPoint
+from .streaks import periodicities
+from .timestamps import to_storage, timestamps_are_epoch
+from .migrations import migrate, is_multi_tenant, enable_multi_tenant, create_tenant_indexes
+from .cache import CachedConnection, cached_query, invalidate, default_query_cache_size
+from .instrumentation import instrumented, trace_connection
+
+# define the number of rows fetched at once by the streaming read functions (iter_rows):
+default_arraysize = 1000
+
+@instrumented
+def create_connection(name="main.db", epoch_timestamps=False, query_cache_size=default_query_cache_size, check_same_thread=True,
+        multi_tenant=False) -> sqlite3.Connection:
     """This function creates the database for the overall application with the library sqlite3.
 
     Args:
         name (str, optional): Name of the Database. Defaults to "main.db".
+        epoch_timestamps (bool, optional): if True: timestamps are stored as integer seconds and an existing database
+            is migrated in place (see migrate_to_epoch_timestamps). Defaults to False.
+        query_cache_size (int, optional): maximum number of query results cached by the connection, 0 disables the cache.
+            Defaults to default_query_cache_size.
+        check_same_thread (bool, optional): if False: the connection may be used by other threads than the one which created it,
+            the caller has to serialize the access (see ConnectionManager). Defaults to True.
+        multi_tenant (bool, optional): if True: habits and checkoffs are stored with the id of their user and an existing
+            database is migrated in place (see enable_multi_tenant). Defaults to False.
 
     Returns:
         sqlite3.Connection: Connection to the Database
     """
 
-    # create a new database if not exists and open a database connection:
-    db = sqlite3.connect(name)
+    # create a new database if not exists and open a database connection with a cache for query results:
+    db = sqlite3.connect(name, factory=CachedConnection, check_same_thread=check_same_thread)
+    trace_connection(db)
+    if query_cache_size > 0:
+        db.query_cache.maxsize = query_cache_size
+    else:
+        db.query_cache = None
+
+    # apply the pending migrations of the schema (the tables and indexes are only created if the database isn't current):
+    migrate(db)
+
+    # migrate the database to integer timestamps, if requested:
+    if epoch_timestamps:
+        migrate_to_epoch_timestamps(db)
 
-    # call the create_tables function to create tables:
-    create_tables(db)
+    # migrate the database to store the habits of more than one user, if requested:
+    if multi_tenant:
+        enable_multi_tenant(db)
 
     # return the database:
     return db
 
 
-def create_tables(db: sqlite3.Connection) -> None:
-    """This function creates the individual tables inside the connected sqlite3-database.
+@instrumented
+def migrate_to_epoch_timestamps(db: sqlite3.Connection) -> None:
+    """This function migrates the connected database in place, so timestamps (habit_log.checkoff and habits.created)
+    are stored as integer seconds since 1970-01-01 00:00:00 of the local wall clock instead of strings "YYYY-MM-DD hh:mm:ss".
+    As sqlite3 can't change the type of a column, the tables are copied into tables with INTEGER columns within
+    a single transaction. The streak states are removed and rebuilt with integer timestamps when they are needed.
+    A database which already stores integer timestamps isn't changed.
 
     Args:
         db (sqlite3.Connection): Connection to Database
     """
 
-    # create a cursor:
-    cur = db.cursor()
+    # checks if the database was already migrated:
+    if timestamps_are_epoch(db):
+        return
 
-    # create table of habits:
-    cur.execute(
-        """CREATE TABLE IF NOT EXISTS habits (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        periodicity TEXT,
-        description TEXT,
-        created TEXT,
-        UNIQUE(id))"""
-    )
-
-    # create table of habit log:
-    cur.execute(
-        """CREATE TABLE IF NOT EXISTS habit_log (
-        log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        habit_id INTEGER,
-        habit_name TEXT,
-        checkoff TEXT,
-        UNIQUE(log_id),
-        FOREIGN KEY (habit_id) REFERENCES habits(id))"""
-    )
-    db.commit()
+    # the column user_id of a multi-tenant database is copied as well:
+    tenant_column = ",\n        user_id INTEGER NOT NULL DEFAULT 0" if is_multi_tenant(db) else ""
+    tenant_value = ", user_id" if tenant_column else ""
 
-
-def get_all_habits(db: sqlite3.Connection) -> list:
+    # finish a pending transaction and start the transaction of the migration:
+    db.commit()
+    cur = db.cursor()
+    cur.execute("BEGIN")
+    try:
+        # remove the trigger of a multi-tenant database, which refers to the copied tables (it is created again below):
+        cur.execute("DROP TRIGGER IF EXISTS habit_log_user")
+
+        # copy the habits with the time they were created as integer seconds:
+        cur.execute(
+            """CREATE TABLE habits_epoch (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            periodicity TEXT,
+            description TEXT,
+            created INTEGER""" + tenant_column + """,
+            UNIQUE(id))"""
+        )
+        cur.execute(
+            """INSERT INTO habits_epoch SELECT id, name, periodicity, description,
+            CAST(strftime('%s', created) AS INTEGER)""" + tenant_value + " FROM habits"
+        )
+        cur.execute("DROP TABLE habits")
+        cur.execute("ALTER TABLE habits_epoch RENAME TO habits")
+
+        # copy the habit log with the checkoffs as integer seconds:
+        cur.execute(
+            """CREATE TABLE habit_log_epoch (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            habit_id INTEGER,
+            habit_name TEXT,
+            checkoff INTEGER""" + tenant_column + """,
+            UNIQUE(log_id),
+            FOREIGN KEY (habit_id) REFERENCES habits(id))"""
+        )
+        cur.execute(
+            """INSERT INTO habit_log_epoch SELECT log_id, habit_id, habit_name,
+            CAST(strftime('%s', checkoff) AS INTEGER)""" + tenant_value + " FROM habit_log"
+        )
+        cur.execute("DROP TABLE habit_log")
+        cur.execute("ALTER TABLE habit_log_epoch RENAME TO habit_log")
+        cur.execute(
+            """CREATE INDEX idx_habit_log_habit_checkoff
+            ON habit_log (habit_id, checkoff)"""
+        )
+        if tenant_column:
+            create_tenant_indexes(cur)
+
+        # replace the streak states by a table with integer timestamps:
+        cur.execute("DROP TABLE habit_streak")
+        cur.execute(
+            """CREATE TABLE habit_streak (
+            habit_id INTEGER PRIMARY KEY,
+            count INTEGER,
+            count_max INTEGER,
+            status INTEGER,
+            starting_date INTEGER,
+            last_checkoff INTEGER,
+            last_log_id INTEGER,
+            FOREIGN KEY (habit_id) REFERENCES habits(id))"""
+        )
+
+        # remove the streak history, it is derived from the checkoffs and refreshed with integer timestamps:
+        cur.execute("DELETE FROM habit_streak_history")
+        db.commit()
+        invalidate(db, "habits", "habit_log", "habit_streak", "habit_streak_history")
+
+        # remember the new format of the timestamps, so it isn't read from the schema again:
+        if hasattr(db, "epoch_timestamps"):
+            db.epoch_timestamps = True
+
+    # undo the complete migration, if any statement fails:
+    except sqlite3.Error:
+        db.rollback()
+        raise
+
+
+@instrumented
+@cached_query("habits")
+def get_all_habits(db: sqlite3.Connection, user_id=None) -> list:
     """A function to load all data from the connected database.
 
     Args:
         db (sqlite3.Connection): Connection to Database
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
 
     Returns:
-        list: List with all content of the habit table as tuple [(id, name, periodicity, description, created)]
+        list: List with all content of the habit table as HabitRecord [(id, name, periodicity, description, created)]
     """
 
     cur = db.cursor()
-    cur.execute("SELECT * FROM habits")
-    return cur.fetchall()
+    if user_id is None:
+        cur.execute("SELECT id, name, periodicity, description, created FROM habits")
+    else:
+        cur.execute("SELECT id, name, periodicity, description, created FROM habits WHERE user_id=? ORDER BY id", [user_id])
+    return list(map(HabitRecord._make, cur))
 
 
-def get_all_habit_name_and_id(db: sqlite3.Connection) -> list:
+@instrumented
+@cached_query("habits")
+def get_all_habit_name_and_id(db: sqlite3.Connection, user_id=None) -> list:
     """This function returns a list with all habit_names and habit_ids that are stored in the current connected database.
 
     Args:
         db (sqlite3.Connection): Connection to Database
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
 
     Returns:
         list: List of lists with name and id from connected database [[id, name]]
     """
     cur = db.cursor()
-    cur.execute("SELECT id, name FROM habits")
+    if user_id is None:
+        cur.execute("SELECT id, name FROM habits")
+    else:
+        cur.execute("SELECT id, name FROM habits WHERE user_id=? ORDER BY id", [user_id])
     res = cur.fetchall()
     return [list(idx) for idx in res]
 
 
-def get_habits_same_periods(db: sqlite3.Connection, periodicity: str) -> list:
+@instrumented
+@cached_query("habits")
+def get_habits_same_periods(db: sqlite3.Connection, periodicity: str, user_id=None) -> list:
     """Returns habit_names, habit_descriptions and created_time of all habits with requested periodicity.
 
     Args:
         db (sqlite3.Connection): Connection to Database
         periodicity (str): Periodicity inside the database as string
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
 
     Returns:
         list: Returns name, description and created of all habits with argument periodicity in [(name, description, created)].
     """
     cur = db.cursor()
-    cur.execute(
-        "SELECT name, description, created FROM habits WHERE periodicity=?",
-        [periodicity])
+    if user_id is None:
+        cur.execute(
+            "SELECT name, description, created FROM habits WHERE periodicity=?",
+            [periodicity])
+    else:
+        cur.execute(
+            "SELECT name, description, created FROM habits WHERE user_id=? AND periodicity=? ORDER BY id",
+            [user_id, periodicity])
     return cur.fetchall()
 
 
-def get_habit_name(db: sqlite3.Connection, habit_id: int) -> str:
+@instrumented
+@cached_query("habits")
+def get_habit_name(db: sqlite3.Connection, habit_id: int, user_id=None) -> str:
     """This function returns a single habit_name, when only the habid_id is known. The name is retrieved from the connected Database.
 
     Args:
         db (sqlite3.Connection): Connection to Database
         habit_id (int): id of the Habit inside the Database as int
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
 
     Returns:
         str: Name of a single habit as string
     """
+    condition, parameters = user_condition(user_id)
     cur = db.cursor()
-    cur.execute("SELECT name FROM habits WHERE id=?", [habit_id])
+    cur.execute(f"SELECT name FROM habits WHERE id=?{condition}", [habit_id] + parameters)
     return cur.fetchone()[0]
 
 
-def get_periods(db: sqlite3.Connection, habit_id: int) -> str:
+@instrumented
+@cached_query("habits")
+def get_periods(db: sqlite3.Connection, habit_id: int, user_id=None) -> str:
     """Function to recieve the periodicity of a individual habit from the database.
 
     Args:
         db (sqlite3.Connection): Connection to Database
         habit_id (int): id of the Habit inside the Database as int
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
 
     Returns:
         str: periodicity as string
     """
+    condition, parameters = user_condition(user_id)
     cur = db.cursor()
-    cur.execute("SELECT periodicity from habits WHERE id=?", [habit_id])
+    cur.execute(f"SELECT periodicity from habits WHERE id=?{condition}", [habit_id] + parameters)
     return cur.fetchone()[0]
 
 
-def get_all_log_data(db: sqlite3.Connection, habit_id: int) -> list:
-    """Returns all stored habit_logs with selected habid_id from the connected database.
+@instrumented
+@cached_query("habit_log")
+def get_all_log_data(db: sqlite3.Connection, habit_id: int, user_id=None) -> list:
+    """Returns all stored habit_logs with selected habid_id from the connected database in chronological order.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        user_id (int, optional): only the habit_logs of this user (multi-tenant databases only). Defaults to None (any user).
+
+    Returns:
+        list: List of all habit_log data as CheckoffRecord ordered by checkoff [(log_id, habit_id, habit_name, checkoff)]
+    """
+    condition, parameters = user_condition(user_id, "habit_log")
+    cur = db.cursor()
+    cur.execute(
+        f"SELECT log_id, habit_id, habit_name, checkoff FROM habit_log WHERE habit_id=?{condition} ORDER BY checkoff, log_id",
+        [habit_id] + parameters)
+    return list(map(CheckoffRecord._make, cur))
+
+
+@instrumented
+@cached_query("habit_log")
+def get_all_checkoffs(db: sqlite3.Connection, habit_id: int, user_id=None) -> list:
+    """Returns only the checkoffs of the habit with selected habit_id in chronological order.
+    The query is answered from the index on (habit_id, checkoff) without reading the habit_log table itself.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        user_id (int, optional): only the checkoffs of this user (multi-tenant databases only). Defaults to None (any user).
+
+    Returns:
+        list: List of all checkoffs of the habit as strings ["YYYY-MM-DD hh:mm:ss"] or integer seconds
+    """
+    condition, parameters = user_condition(user_id, "habit_log")
+    cur = db.cursor()
+    cur.execute(
+        f"SELECT checkoff FROM habit_log WHERE habit_id=?{condition} ORDER BY checkoff",
+        [habit_id] + parameters)
+    return [row[0] for row in cur.fetchall()]
+
+
+@instrumented
+@cached_query("habits", "habit_log")
+def get_periodicity_and_checkoffs(db: sqlite3.Connection, habit_id: int, user_id=None) -> tuple:
+    """Returns the periodicity and all checkoffs of the habit with selected habit_id with a single query.
+    The checkoffs are read in chronological order from the index on (habit_id, checkoff).
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
+
+    Raises:
+        TypeError: if there is no habit with habit_id (of the user) (as get_periods does)
+
+    Returns:
+        tuple: periodicity as string and list of all checkoffs as strings or integer seconds (periodicity, ["YYYY-MM-DD hh:mm:ss"])
+    """
+    condition, parameters = user_condition(user_id)
+    cur = db.cursor()
+    cur.execute(
+        f"""SELECT habits.periodicity, habit_log.checkoff FROM habits
+        LEFT JOIN habit_log ON habit_log.habit_id = habits.id
+        WHERE habits.id=?{condition} ORDER BY habit_log.checkoff""",
+        [habit_id] + parameters)
+    res = cur.fetchall()
+
+    # raise the same error as get_periods, if the habit isn't stored in the database:
+    if not res:
+        raise TypeError(f"There is no habit with id {habit_id}.")
+
+    # a habit without checkoffs returns a single row without checkoff:
+    return res[0][0], [row[1] for row in res if row[1] is not None]
+
+
+
+def iter_rows(cur: sqlite3.Cursor, arraysize=default_arraysize):
+    """Yields the rows of an executed cursor, which are fetched in batches of arraysize rows with fetchmany.
+    Only a single batch is kept in memory, so the rows of a query can be iterated with constant memory.
+
+    Args:
+        cur (sqlite3.Cursor): executed cursor
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+
+    Yields:
+        tuple: rows of the cursor
+    """
+    cur.arraysize = arraysize
+    while True:
+        rows = cur.fetchmany()
+        if not rows:
+            return
+        yield from rows
+
+
+@instrumented
+def iter_log_data(db: sqlite3.Connection, habit_id: int, arraysize=default_arraysize, user_id=None):
+    """Yields the habit_logs of the habit with selected habit_id like get_all_log_data, but as a stream instead of a list.
+    The rows aren't cached, so a history of any length is read with constant memory.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+        user_id (int, optional): only the checkoffs of this user (multi-tenant databases only). Defaults to None (any user).
+
+    Returns:
+        iterator: habit_log data as CheckoffRecord ordered by checkoff (log_id, habit_id, habit_name, checkoff)
+    """
+    condition, parameters = user_condition(user_id, "habit_log")
+    cur = db.cursor()
+    cur.execute(
+        f"SELECT log_id, habit_id, habit_name, checkoff FROM habit_log WHERE habit_id=?{condition} ORDER BY checkoff, log_id",
+        [habit_id] + parameters)
+    return map(CheckoffRecord._make, iter_rows(cur, arraysize))
+
+
+@instrumented
+def iter_checkoffs(db: sqlite3.Connection, habit_id: int, arraysize=default_arraysize, user_id=None):
+    """Yields the checkoffs of the habit with selected habit_id like get_all_checkoffs, but as a stream instead of a list.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+        user_id (int, optional): only the checkoffs of this user (multi-tenant databases only). Defaults to None (any user).
+
+    Returns:
+        iterator: checkoffs of the habit as strings "YYYY-MM-DD hh:mm:ss" or integer seconds in chronological order
+    """
+    condition, parameters = user_condition(user_id, "habit_log")
+    cur = db.cursor()
+    cur.execute(f"SELECT checkoff FROM habit_log WHERE habit_id=?{condition} ORDER BY checkoff", [habit_id] + parameters)
+    return (row[0] for row in iter_rows(cur, arraysize))
+
+
+def range_condition(db: sqlite3.Connection, start=None, end=None) -> tuple:
+    """Returns the SQL condition and the parameters, which restrict habit_log.checkoff to the range from start to end.
+    The bounds are converted into the format the timestamps are stored with, so strings and integer seconds are compared
+    in chronological order and the range can be read from the index on (habit_id, checkoff).
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        start (datetime, optional): first time of the range (inclusive). Defaults to None (no lower bound).
+        end (datetime, optional): end of the range (exclusive). Defaults to None (no upper bound).
+
+    Returns:
+        tuple: condition (e.g. " AND habit_log.checkoff >= ?") and list of the parameters
+    """
+    epoch_timestamps = timestamps_are_epoch(db)
+    condition, parameters = "", []
+    if start is not None:
+        condition += " AND habit_log.checkoff >= ?"
+        parameters.append(to_storage(start, epoch_timestamps))
+    if end is not None:
+        condition += " AND habit_log.checkoff < ?"
+        parameters.append(to_storage(end, epoch_timestamps))
+    return condition, parameters
+
+
+def user_condition(user_id=None, table="habits") -> tuple:
+    """Returns the SQL condition and the parameters, which restrict a query to the rows of a single user (multi-tenant databases only).
+
+    Args:
+        user_id (int, optional): id of the user. Defaults to None (no restriction).
+        table (str, optional): table with the column user_id. Defaults to "habits".
+
+    Returns:
+        tuple: condition (e.g. " AND habits.user_id=?") and list of the parameters
+    """
+    if user_id is None:
+        return "", []
+    return f" AND {table}.user_id=?", [user_id]
+
+
+def timestamp_sql(column: str, epoch_timestamps: bool) -> str:
+    """Returns the SQL expression, which converts a timestamp column into a string "YYYY-MM-DD hh:mm:ss" for the date functions
+    of SQLite. Integer timestamps are seconds of the local wall clock, so 'unixepoch' returns the local date and time.
+    """
+    return f"datetime({column}, 'unixepoch')" if epoch_timestamps else column
+
+
+def day_number_sql(column: str, epoch_timestamps: bool) -> str:
+    """Returns the SQL expression of the day of a timestamp column as integer, the proleptic Gregorian ordinal of
+    date.toordinal(). Grouping by an integer is cheaper than grouping by the string of date().
+    """
+    if epoch_timestamps:
+        return f"({column} / 86400 + {date(1970, 1, 1).toordinal()})"
+    return f"CAST(julianday({column}) - 1721424.5 AS INTEGER)"
+
+
+def quote_sql(text: str) -> str:
+    """Returns the text as SQL string literal.
+    """
+    return "'" + text.replace("'", "''") + "'"
+
+
+def month_number_sql(column: str, epoch_timestamps: bool) -> str:
+    """Returns the SQL expression of the month of a timestamp column as integer, the number of months since January of the year 0.
+    """
+    timestamp = timestamp_sql(column, epoch_timestamps)
+    return f"(CAST(strftime('%Y', {timestamp}) AS INTEGER) * 12 + CAST(strftime('%m', {timestamp}) AS INTEGER) - 1)"
+
+
+def period_bucket_sql(column: str, epoch_timestamps: bool) -> str:
+    """Returns the SQL expression of the period ordinal of a timestamp column, depending on the periodicity of the habit.
+    The expression is built from the registered periodicities, so the ordinals are the same as Periodicity.ordinal
+    and habits with an unknown periodicity have no period (NULL).
+    """
+    units = {"day": day_number_sql(column, epoch_timestamps), "month": month_number_sql(column, epoch_timestamps)}
+    cases = "".join(
+        f"\n        WHEN {quote_sql(name)} THEN ({units[period.unit]} + {period.offset}) / {period.length}"
+        for name, period in periodicities.items())
+    return f"CASE habits.periodicity{cases} END"
+
+
+@instrumented
+def get_completed_periods(db: sqlite3.Connection, start=None, end=None, user_id=None) -> list:
+    """Returns the number of completed periods (days, weeks or months with at least one checkoff) of every habit
+    from start (inclusive) to end (exclusive). The checkoffs are grouped by their period in SQL, periods before the period
+    the habit was created in aren't counted. The range of every habit is read from the index on (habit_id, checkoff).
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        start (datetime, optional): first time of the range (inclusive). Defaults to None (no lower bound).
+        end (datetime, optional): end of the range (exclusive). Defaults to None (no upper bound).
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+
+    Returns:
+        list: habits ordered by id [(habit_id, habit_name, periodicity, created, completed_periods)]
+    """
+    epoch_timestamps = timestamps_are_epoch(db)
+    checkoff = period_bucket_sql("habit_log.checkoff", epoch_timestamps)
+    created = period_bucket_sql("habits.created", epoch_timestamps)
+    condition, parameters = range_condition(db, start, end)
+    where = " WHERE habits.user_id=?" if user_id is not None else ""
+    cur = db.cursor()
+    cur.execute(
+        f"""SELECT habits.id, habits.name, habits.periodicity, habits.created,
+        COUNT(DISTINCT CASE WHEN {checkoff} >= {created} THEN {checkoff} END)
+        FROM habits LEFT JOIN habit_log ON habit_log.habit_id = habits.id{condition}{where}
+        GROUP BY habits.id ORDER BY habits.id""",
+        parameters + ([user_id] if where else []))
+    return cur.fetchall()
+
+
+@instrumented
+def get_checkoff_days(db: sqlite3.Connection, start=None, end=None, habit_id=None, user_id=None) -> list:
+    """Returns the days of the checkoffs of every habit with at least one checkoff from start (inclusive) to end (exclusive),
+    grouped by habit in SQL: a row per habit with the ordinals of the days of its checkoffs as comma-separated string
+    (a day is repeated for every checkoff on it). The range of every habit is read in the order of the index on
+    (habit_id, checkoff), so SQLite doesn't need a temporary b-tree and a single row per habit is returned;
+    grouping by (habit, day) in SQL took more than twice as long for a year of 1,000 habits.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        start (datetime, optional): first time of the range (inclusive). Defaults to None (no lower bound).
+        end (datetime, optional): end of the range (exclusive). Defaults to None (no upper bound).
+        habit_id (int, optional): only the checkoffs of this habit. Defaults to None (all habits).
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+
+    Returns:
+        list: habits with checkoffs ordered by id [(habit_id, "ordinal,ordinal,...")]
+    """
+    condition, parameters = range_condition(db, start, end)
+    if habit_id is not None:
+        condition += " AND habits.id = ?"
+        parameters.append(habit_id)
+    tenant_condition, tenant_parameters = user_condition(user_id)
+    condition += tenant_condition
+    parameters += tenant_parameters
+    day = day_number_sql("habit_log.checkoff", timestamps_are_epoch(db))
+    cur = db.cursor()
+    cur.execute(
+        f"""SELECT habits.id, group_concat({day})
+        FROM habits JOIN habit_log ON habit_log.habit_id = habits.id{condition}
+        GROUP BY habits.id ORDER BY habits.id""",
+        parameters)
+    return cur.fetchall()
+
+
+@instrumented
+def iter_checkoffs_between(db: sqlite3.Connection, habit_id: int, start=None, end=None, arraysize=default_arraysize, user_id=None):
+    """Yields the checkoffs of the habit with selected habit_id from start (inclusive) to end (exclusive) in chronological order.
+    Only the range is read from the index on (habit_id, checkoff), so the cost depends on the checkoffs within the range
+    and not on the complete history of the habit.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        start (datetime, optional): first time of the range (inclusive). Defaults to None (first checkoff).
+        end (datetime, optional): end of the range (exclusive). Defaults to None (last checkoff).
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+        user_id (int, optional): only the checkoffs of this user (multi-tenant databases only). Defaults to None (any user).
+
+    Returns:
+        iterator: checkoffs as strings "YYYY-MM-DD hh:mm:ss" or integer seconds in chronological order
+    """
+    condition, parameters = range_condition(db, start, end)
+    tenant_condition, tenant_parameters = user_condition(user_id, "habit_log")
+    condition += tenant_condition
+    parameters += tenant_parameters
+    cur = db.cursor()
+    cur.execute(
+        f"SELECT checkoff FROM habit_log WHERE habit_log.habit_id=?{condition} ORDER BY checkoff",
+        [habit_id] + parameters)
+    return (row[0] for row in iter_rows(cur, arraysize))
+
+
+@instrumented
+def iter_all_checkoffs_between(db: sqlite3.Connection, start=None, end=None, arraysize=default_arraysize, user_id=None):
+    """Yields all habits and their checkoffs from start (inclusive) to end (exclusive) ordered by (habit_id, checkoff),
+    like iter_all_checkoffs does for the complete history. The range of every habit is read from the index on (habit_id, checkoff).
+    Habits without checkoffs in the range are returned with a single row without checkoff.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        start (datetime, optional): first time of the range (inclusive). Defaults to None (no lower bound).
+        end (datetime, optional): end of the range (exclusive). Defaults to None (no upper bound).
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+
+    Returns:
+        iterator: rows (id, name, periodicity, checkoff)
+    """
+    condition, parameters = range_condition(db, start, end)
+    where = " WHERE habits.user_id=?" if user_id is not None else ""
+    cur = db.cursor()
+    cur.execute(
+        f"""SELECT habits.id, habits.name, habits.periodicity, habit_log.checkoff FROM habits
+        LEFT JOIN habit_log ON habit_log.habit_id = habits.id{condition}{where}
+        ORDER BY habits.id, habit_log.checkoff""",
+        parameters + ([user_id] if where else []))
+    return iter_rows(cur, arraysize)
+
+
+@instrumented
+def iter_periodicity_and_checkoffs(db: sqlite3.Connection, habit_id: int, arraysize=default_arraysize, user_id=None) -> tuple:
+    """Returns the periodicity and a stream of the checkoffs of the habit with selected habit_id with a single query,
+    like get_periodicity_and_checkoffs does with a list. The checkoffs have to be consumed before the connection is used for
+    the next query of the same cursor, they aren't cached.
 
     Args:
         db (sqlite3.Connection): Connection to Database
         habit_id (int): id of the Habit inside the Database as int
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
+
+    Raises:
+        TypeError: if there is no habit with habit_id (of the user) (as get_periods does)
+
+    Returns:
+        tuple: periodicity as string and iterator of the checkoffs in chronological order (periodicity, iterator)
+    """
+    condition, parameters = user_condition(user_id)
+    cur = db.cursor()
+    cur.execute(
+        f"""SELECT habits.periodicity, habit_log.checkoff FROM habits
+        LEFT JOIN habit_log ON habit_log.habit_id = habits.id
+        WHERE habits.id=?{condition} ORDER BY habit_log.checkoff""",
+        [habit_id] + parameters)
+    rows = iter_rows(cur, arraysize)
+
+    # the first row contains the periodicity, a habit without checkoffs returns a single row without checkoff:
+    first = next(rows, None)
+    if first is None:
+        raise TypeError(f"There is no habit with id {habit_id}.")
+    return first[0], (row[1] for row in chain([first], rows) if row[1] is not None)
+
+
+@instrumented
+def iter_all_checkoffs(db: sqlite3.Connection, user_id=None, arraysize=default_arraysize, periodicity=None):
+    """Yields all habits and their checkoffs ordered by (habit_id, checkoff), so the complete habit log is read
+    once as a stream through the index on (habit_id, checkoff). Habits without checkoffs are returned with a single row without checkoff.
+    The habits of a single user are read from the index on (user_id, id), so only the rows of the user are read.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+        periodicity (str, optional): only the habits with this periodicity. Defaults to None (all periodicities).
+
+    Returns:
+        iterator: rows (id, name, periodicity, checkoff)
+    """
+    conditions, parameters = [], []
+    if user_id is not None:
+        conditions.append("habits.user_id=?")
+        parameters.append(user_id)
+    if periodicity is not None:
+        conditions.append("habits.periodicity=?")
+        parameters.append(periodicity)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    cur = db.cursor()
+    cur.execute(
+        f"""SELECT habits.id, habits.name, habits.periodicity, habit_log.checkoff FROM habits
+        LEFT JOIN habit_log ON habit_log.habit_id = habits.id{where}
+        ORDER BY habits.id, habit_log.checkoff""",
+        parameters)
+    return iter_rows(cur, arraysize)
+
+
+@instrumented
+def iter_checkoffs_of_habits(db: sqlite3.Connection, first_id: int, last_id: int, arraysize=default_arraysize, user_id=None):
+    """Yields the habits with an id from first_id to last_id and their checkoffs ordered by (habit_id, checkoff),
+    like iter_all_checkoffs does for all habits. The habits are read as a range of the primary key.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        first_id (int): id of the first habit
+        last_id (int): id of the last habit
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
 
     Returns:
-        list: List of all habit_log data as tuples [(log_id, habit_id, habit_name, checkoff)]
+        iterator: rows (id, name, periodicity, checkoff)
     """
+    condition, parameters = user_condition(user_id)
+    cur = db.cursor()
+    cur.execute(
+        f"""SELECT habits.id, habits.name, habits.periodicity, habit_log.checkoff FROM habits
+        LEFT JOIN habit_log ON habit_log.habit_id = habits.id
+        WHERE habits.id BETWEEN ? AND ?{condition} ORDER BY habits.id, habit_log.checkoff""",
+        [first_id, last_id] + parameters)
+    return iter_rows(cur, arraysize)
+
+
+@instrumented
+@cached_query("habits", "habit_log")
+def get_fleet_statistics(db: sqlite3.Connection) -> list:
+    """Returns the number of habits, the number of checkoffs and the latest checkoff of every user of a multi-tenant database
+    with a single query. Both tables are grouped by user_id from their tenant-leading indexes.
+
+    Args:
+        db (sqlite3.Connection): Connection to a multi-tenant Database
+
+    Returns:
+        list: statistics of every user ordered by user_id [(user_id, habits, checkoffs, latest_checkoff)]
+    """
+
     cur = db.cursor()
-    cur.execute("SELECT * FROM habit_log WHERE habit_id=?", [habit_id])
+    cur.execute(
+        """SELECT users.user_id, users.habits, COALESCE(logs.checkoffs, 0), logs.latest_checkoff
+        FROM (SELECT user_id, COUNT(*) AS habits FROM habits GROUP BY user_id) AS users
+        LEFT JOIN (SELECT user_id, COUNT(*) AS checkoffs, MAX(checkoff) AS latest_checkoff FROM habit_log GROUP BY user_id) AS logs
+        ON logs.user_id = users.user_id
+        ORDER BY users.user_id""")
     return cur.fetchall()
 
 
+@instrumented
+def get_streak_state(db: sqlite3.Connection, habit_id: int, user_id=None) -> tuple:
+    """Returns the periodicity, the stored streak state, the latest checkoff and the latest log id of the habit with selected habit_id.
+    The latest checkoff and the latest log id are read from the index on (habit_id, checkoff). The state is stale, if its
+    log id isn't the latest log id, as every log which is inserted (with any connection) gets a new log id.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
+
+    Raises:
+        TypeError: if there is no habit with habit_id (of the user) (as get_periods does)
+
+    Returns:
+        tuple: (periodicity, count, count_max, status, last_log_id, latest_checkoff, latest_log_id), the state is None if not stored
+    """
+    condition, parameters = user_condition(user_id)
+    cur = db.cursor()
+    cur.execute(
+        f"""SELECT habits.periodicity, habit_streak.count, habit_streak.count_max, habit_streak.status,
+        habit_streak.last_log_id, (SELECT MAX(checkoff) FROM habit_log WHERE habit_id = habits.id),
+        (SELECT MAX(log_id) FROM habit_log WHERE habit_id = habits.id)
+        FROM habits LEFT JOIN habit_streak ON habit_streak.habit_id = habits.id
+        WHERE habits.id=?{condition}""",
+        [habit_id] + parameters)
+    res = cur.fetchone()
+
+    # raise the same error as get_periods, if the habit isn't stored in the database:
+    if res is None:
+        raise TypeError(f"There is no habit with id {habit_id}.")
+    return res
+
+
+@instrumented
+def get_latest_log_id(db: sqlite3.Connection, habit_id: int):
+    """Returns the latest log id of the habit with selected habit_id, which is stored with the streak state.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+
+    Returns:
+        int: latest log id of the habit, None if the habit wasn't checked off
+    """
+    cur = db.cursor()
+    cur.execute("SELECT MAX(log_id) FROM habit_log WHERE habit_id=?", [habit_id])
+    return cur.fetchone()[0]
+
+
+@instrumented
+def save_streak_state(
+    db: sqlite3.Connection,
+    habit_id: int,
+    starting_date: datetime,
+    count: int,
+    count_max: int,
+    status: int,
+    last_checkoff,
+    last_log_id: int,
+) -> None:
+    """Stores the streak state of the habit with selected habit_id, which is updated by Log.save() with every further checkoff.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        starting_date (datetime): last checkoff that counted for the streak (anchor of the last period)
+        count (int): current streak
+        count_max (int): maximum streak
+        status (int): current status
+        last_checkoff (int or str): latest checkoff that is included in the state, as stored in the database
+        last_log_id (int): latest log id that is included in the state
+    """
+
+    # store the starting_date in the same format as the checkoffs:
+    starting_date = to_storage(starting_date, isinstance(last_checkoff, int))
+
+    cur = db.cursor()
+    cur.execute(
+        """INSERT OR REPLACE INTO habit_streak (habit_id, count, count_max, status, starting_date, last_checkoff, last_log_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        [habit_id, count, count_max, status, starting_date, last_checkoff, last_log_id])
+    invalidate(db, "habit_streak")
+    db.commit()
+
+
+@instrumented
+def get_last_streak_point(db: sqlite3.Connection, habit_id: int) -> tuple:
+    """Returns the last stored point of the streak history of the habit with selected habit_id, from which the history is continued.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+
+    Returns:
+        tuple: (log_id, checkoff, count, count_max, status, starting_date) or None, if there is no stored point
+    """
+    cur = db.cursor()
+    cur.execute(
+        """SELECT log_id, checkoff, count, count_max, status, starting_date FROM habit_streak_history
+        WHERE habit_id=? ORDER BY checkoff DESC, log_id DESC LIMIT 1""",
+        [habit_id])
+    return cur.fetchone()
+
+
+@instrumented
+def iter_log_data_after(db: sqlite3.Connection, habit_id: int, checkoff, log_id: int, arraysize=default_arraysize):
+    """Yields the habit_logs of the habit with selected habit_id, which follow the checkoff with log_id in chronological order
+    (ordered by checkoff and log_id, like iter_log_data). Only this range is read from the index on (habit_id, checkoff).
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        checkoff (int or str): checkoff as stored in the database
+        log_id (int): id of the checkoff
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+
+    Returns:
+        iterator: habit_log data as CheckoffRecord (log_id, habit_id, habit_name, checkoff)
+    """
+    cur = db.cursor()
+    cur.execute(
+        """SELECT log_id, habit_id, habit_name, checkoff FROM habit_log
+        WHERE habit_id=? AND checkoff >= ? AND (checkoff, log_id) > (?, ?) ORDER BY checkoff, log_id""",
+        [habit_id, checkoff, checkoff, log_id])
+    return map(CheckoffRecord._make, iter_rows(cur, arraysize))
+
 
+@instrumented
+def save_streak_points(db: sqlite3.Connection, habit_id: int, points) -> int:
+    """Appends points to the streak history of the habit with selected habit_id within a single transaction.
+    The points are written with executemany while they are read, so a stream of points isn't kept in memory.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        points (iterable): points (log_id, checkoff, count, count_max, status, starting_date) with timestamps as stored in the database
+
+    Returns:
+        int: number of stored points
+    """
+    cur = db.cursor()
+    cur.executemany(
+        """INSERT OR REPLACE INTO habit_streak_history (log_id, habit_id, checkoff, count, count_max, status, starting_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        ((log_id, habit_id, checkoff, count, count_max, status, starting_date)
+            for log_id, checkoff, count, count_max, status, starting_date in points))
+    invalidate(db, "habit_streak_history")
+    db.commit()
+    return max(cur.rowcount, 0)
+
+
+@instrumented
+def iter_streak_history(db: sqlite3.Connection, habit_id: int, arraysize=default_arraysize, user_id=None):
+    """Yields the stored streak history of the habit with selected habit_id in chronological order.
+    The history is only complete after it was refreshed by refresh_streak_history.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the Habit inside the Database as int
+        arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+        user_id (int, optional): only if the habit belongs to this user (multi-tenant databases only). Defaults to None (any user).
+
+    Returns:
+        iterator: points of the history as StreakPoint (log_id, checkoff, count, count_max, status)
+    """
+
+    # the history has no column user_id, the user is checked with the habit:
+    condition, parameters = user_condition(user_id)
+    if condition:
+        condition = f" AND EXISTS (SELECT 1 FROM habits WHERE habits.id = habit_streak_history.habit_id{condition})"
+    cur = db.cursor()
+    cur.execute(
+        f"""SELECT log_id, checkoff, count, count_max, status FROM habit_streak_history
+        WHERE habit_id=?{condition} ORDER BY checkoff, log_id""",
+        [habit_id] + parameters)
+    return map(StreakPoint._make, iter_rows(cur, arraysize))
+
+
+@instrumented
 def default_habit_data(db: sqlite3.Connection) -> None:
     """This function creates default habit data if the user intends to.
 
@@ -257,8 +997,13 @@ def default_habit_data(db: sqlite3.Connection) -> None:
 
     ]
 
+    # convert the checkoffs in the format in which they are stored in the database:
+    epoch_timestamps = timestamps_are_epoch(db)
+    default_logs = [(habit_id, habit_name, to_storage(checkoff, epoch_timestamps)) for habit_id, habit_name, checkoff in default_logs]
+
     # insert habit_log default data to database:
-    cur.executemany("INSERT INTO habit_log VALUES (NULL, ?, ?, ?)", default_logs)
+    cur.executemany("INSERT INTO habit_log (habit_id, habit_name, checkoff) VALUES (?, ?, ?)", default_logs)
+    invalidate(db, "habit_log")
     db.commit()
 
 
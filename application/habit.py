@@ -1,5 +1,8 @@
 from datetime import datetime
 import sqlite3
+from .streaks import streak_steps, streak_delta_hours, fold_streak
+from .timestamps import parse_checkoff, to_storage, timestamps_are_epoch
+from .cache import invalidate
 
 
 class Habit:
@@ -19,6 +22,8 @@ class Habit:
         description of the habit
     habit_created: datetime
         time the habit was created
+    user_id: int
+        id of the user of the habit (multi-tenant databases only)
 
     Methods
     -------
@@ -27,7 +32,8 @@ class Habit:
     delete():
         deletes the habit from the connected database.
     """
-    
+    __slots__ = ("db", "habit_id", "habit_name", "periodicity", "description", "created", "user_id")
+
     def __init__(
         self,
         db:sqlite3.Connection,
@@ -36,6 +42,7 @@ class Habit:
         habit_periodicity="",
         habit_description="",
         habit_created=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        user_id=None,
     ):
         """Constructs all the necessary attributes for the Habit object.
 
@@ -46,6 +53,7 @@ class Habit:
             habit_periodicity (str, optional): periodicity of the habit. Defaults to "".
             habit_description (str, optional): description of the habit. Defaults to "".
             habit_created (datetime, optional): created time of the habit. Defaults to datetime.now().strftime("%Y-%m-%d %H:%M:%S").
+            user_id (int, optional): id of the user of the habit in a multi-tenant database. Defaults to None (user 0).
         """
     
         self.db = db
@@ -54,17 +62,27 @@ class Habit:
         self.periodicity = habit_periodicity
         self.description = habit_description
         self.created = habit_created
+        self.user_id = user_id
 
 
     def save(self) -> None:
         """
-        Saves the habit to the connected database.
+        Saves the habit to the connected database and sets the habit_id to the id it was stored with.
+        The habit is stored with its user_id, if it is set (multi-tenant databases only).
         """
 
+        created = to_storage(self.created, timestamps_are_epoch(self.db))
         cur = self.db.cursor()
-        cur.execute(
-            "INSERT INTO habits VALUES (NULL, ?, ?, ?, ?)",
-            (self.habit_name, self.periodicity, self.description, self.created),)
+        if self.user_id is None:
+            cur.execute(
+                "INSERT INTO habits (name, periodicity, description, created) VALUES (?, ?, ?, ?)",
+                (self.habit_name, self.periodicity, self.description, created),)
+        else:
+            cur.execute(
+                "INSERT INTO habits (name, periodicity, description, created, user_id) VALUES (?, ?, ?, ?, ?)",
+                (self.habit_name, self.periodicity, self.description, created, self.user_id),)
+        self.habit_id = cur.lastrowid
+        invalidate(self.db, "habits")
         self.db.commit()
 
 
@@ -75,6 +93,9 @@ class Habit:
 
         cur = self.db.cursor()
         cur.execute("DELETE FROM habits WHERE id=?", [self.habit_id])
+        cur.execute("DELETE FROM habit_streak WHERE habit_id=?", [self.habit_id])
+        cur.execute("DELETE FROM habit_streak_history WHERE habit_id=?", [self.habit_id])
+        invalidate(self.db, "habits", "habit_streak", "habit_streak_history")
         self.db.commit()
 
 
@@ -97,9 +118,12 @@ class Log(Habit):
     -------
     save():
         saves the log to the connected database.
+    update_streak():
+        updates the stored streak state of the habit with the log.
     delete():
         deletes the log from the connected database.
     """
+    __slots__ = ("log_date",)
 
     def __init__(
         self,
@@ -117,25 +141,83 @@ class Log(Habit):
             log_date (datetime, optional): date and time of logging the respective habit. Defaults to datetime.now().strftime("%Y-%m-%d %H:%M:%S").
         """
 
+        # a log only sets the attributes it uses, the other slots of the Habit stay empty:
+        self.db = db
+        self.habit_id = habit_id
+        self.habit_name = habit_name
         self.log_date = log_date
 
-        # use parent class' Habit attributes and inherit them
-        Habit.__init__(self, db, habit_id, habit_name)
-
 
     def save(self) -> None:
         """
-        Saves a log to the connected database.
+        Saves a log to the connected database and updates the streak state of the habit in the same transaction.
+        The points of the streak history after the log are removed, they are calculated again by refresh_streak_history.
         """
 
+        # define the checkoff in the format in which it is stored in the database:
+        checkoff = to_storage(self.log_date, timestamps_are_epoch(self.db))
+
         cur = self.db.cursor()
         cur.execute(
-            "INSERT INTO habit_log VALUES (NULL, ?, ?, ?)",
-            [self.habit_id, self.habit_name, self.log_date],
+            "INSERT INTO habit_log (habit_id, habit_name, checkoff) VALUES (?, ?, ?)",
+            [self.habit_id, self.habit_name, checkoff],
         )
+        self.update_streak(cur, checkoff, cur.lastrowid)
+        cur.execute("DELETE FROM habit_streak_history WHERE habit_id=? AND checkoff > ?", [self.habit_id, checkoff])
+        invalidate(self.db, "habit_log", "habit_streak", "habit_streak_history")
         self.db.commit()
 
 
+    def update_streak(self, cur: sqlite3.Cursor, checkoff, log_id: int) -> None:
+        """
+        Updates the stored streak state of the habit with the log, without reading the former checkoffs.
+        If there is no state stored, the log is older than the last checkoff of the state, the state misses a log of
+        another connection or the periodicity isn't registered, the state is removed and will be rebuilt from all
+        checkoffs the next time the streak is calculated.
+
+        Args:
+            cur (sqlite3.Cursor): Cursor of the transaction which saves the log
+            checkoff (int or str): checkoff of the log as it is stored in the database
+            log_id (int): log id of the log
+        """
+
+        cur.execute(
+            """SELECT habits.periodicity, habit_streak.count, habit_streak.count_max, habit_streak.status,
+            habit_streak.starting_date, habit_streak.last_checkoff, habit_streak.last_log_id,
+            (SELECT MAX(log_id) FROM habit_log WHERE habit_id = habits.id AND log_id < ?)
+            FROM habits JOIN habit_streak ON habit_streak.habit_id = habits.id
+            WHERE habits.id=?""",
+            [log_id, self.habit_id],
+        )
+        state = cur.fetchone()
+
+        # if there is no state stored, it will be built the next time the streak is calculated:
+        if state is None:
+            return
+        periodicity, count, count_max, status, starting_date, last_checkoff, last_log_id, previous_log_id = state
+
+        # if the log isn't the latest checkoff, the state doesn't include the former log (e.g. a log of another process)
+        # or the periodicity isn't registered, the state has to be rebuilt from all checkoffs:
+        if checkoff < last_checkoff or last_log_id != previous_log_id or periodicity not in streak_steps:
+            cur.execute("DELETE FROM habit_streak WHERE habit_id=?", [self.habit_id])
+            return
+
+        # continue the stored streak with the checkoff of the log:
+        starting_date, count, count_max, status = fold_streak(
+            streak_steps[periodicity],
+            [parse_checkoff(checkoff)],
+            streak_delta_hours[periodicity],
+            parse_checkoff(starting_date),
+            count,
+            count_max,
+            status,
+        )
+        cur.execute(
+            "UPDATE habit_streak SET count=?, count_max=?, status=?, starting_date=?, last_checkoff=?, last_log_id=? WHERE habit_id=?",
+            [count, count_max, status, to_storage(starting_date, isinstance(checkoff, int)), checkoff, log_id, self.habit_id],
+        )
+
+
     def delete(self) -> None:
         """
         Deletes a log from the connected database.
@@ -143,4 +225,7 @@ class Log(Habit):
 
         cur = self.db.cursor()
         cur.execute("DELETE FROM habit_log WHERE habit_id=?", [self.habit_id])
+        cur.execute("DELETE FROM habit_streak WHERE habit_id=?", [self.habit_id])
+        cur.execute("DELETE FROM habit_streak_history WHERE habit_id=?", [self.habit_id])
+        invalidate(self.db, "habit_log", "habit_streak", "habit_streak_history")
         self.db.commit()
@@ -0,0 +1,243 @@
+import csv
+import json
+import sqlite3
+import time
+from datetime import datetime
+from itertools import islice
+from .cache import invalidate
+from .timestamps import to_storage, timestamps_are_epoch
+from .streaks import streak_steps
+
+# define the number of rows which are written with a single executemany and transaction
+default_chunk_size = 5000
+
+
+class ImportReport:
+    """A class to represent the result of a bulk import.
+
+    Attributes
+    ----------
+    imported : int
+        number of rows written to the database
+    rejected : list
+        rows which weren't imported as list of tuples [(line, reason)]
+    seconds : float
+        duration of the import in seconds
+
+    Methods
+    -------
+    rows_per_second():
+        returns the number of imported rows per second.
+    """
+
+    def __init__(self):
+        """Constructs all the necessary attributes for the ImportReport object.
+        """
+        self.imported = 0
+        self.rejected = []
+        self.seconds = 0.0
+
+
+    def rows_per_second(self) -> float:
+        """
+        Returns the number of imported rows per second.
+        """
+        return self.imported / self.seconds if self.seconds > 0 else 0.0
+
+
+def read_records(path: str):
+    """This function streams the records of a CSV file (with header) or a JSONL file (one JSON object per line).
+    The format is chosen by the file extension (.csv, .jsonl or .json).
+
+    Args:
+        path (str): path of the file
+
+    Raises:
+        ValueError: if the file extension isn't supported
+
+    Yields:
+        tuple: line number and record as dict (line, {column: value})
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+    elif path.endswith(".jsonl") or path.endswith(".json"):
+        with open(path, encoding="utf-8") as file:
+            for line, text in enumerate(file, start=1):
+                if text.strip():
+                    try:
+                        yield line, json.loads(text)
+                    except json.JSONDecodeError:
+                        yield line, None
+    else:
+        raise ValueError(f"Unsupported file {path}, use a .csv or .jsonl file.")
+
+
+def parse_timestamp(value) -> datetime:
+    """This function validates a timestamp of an imported record.
+
+    Args:
+        value (str or int): timestamp as string "YYYY-MM-DD hh:mm:ss" (ISO 8601) or as seconds since 1970-01-01 (unix time)
+
+    Raises:
+        ValueError: if the value isn't a valid timestamp
+
+    Returns:
+        datetime: timestamp in datetime-format
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value).replace(microsecond=0)
+    if isinstance(value, str) and value.strip().isdigit():
+        return datetime.fromtimestamp(int(value)).replace(microsecond=0)
+    if isinstance(value, str):
+        timestamp = datetime.fromisoformat(value.strip()).replace(microsecond=0)
+
+        # timestamps with an offset are converted into the local time the checkoffs are stored with:
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        return timestamp
+    raise ValueError(f"invalid timestamp {value!r}")
+
+
+def import_rows(db: sqlite3.Connection, records, convert, statement: str, chunk_size: int) -> ImportReport:
+    """This function converts and validates records and writes them in chunks with executemany.
+    Every chunk is written within an explicit transaction.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        records (iterable): records as tuples (line, record)
+        convert (function): converts a record into the parameters of the statement, raises ValueError for invalid records
+        statement (str): INSERT statement which is executed for every row
+        chunk_size (int): number of rows written within a single transaction
+
+    Returns:
+        ImportReport: number of imported and list of rejected rows and duration of the import
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+
+    # finish a pending transaction, so every chunk is written in its own transaction:
+    db.commit()
+    cur = db.cursor()
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        # convert the records of the chunk and keep the line and reason of invalid records:
+        rows = []
+        for line, record in chunk:
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError("invalid record")
+                rows.append(convert(record))
+            except (KeyError, ValueError, TypeError, OverflowError) as error:
+                report.rejected.append((line, str(error)))
+        if not rows:
+            continue
+
+        # write the chunk within an explicit transaction:
+        cur.execute("BEGIN")
+        try:
+            cur.executemany(statement, rows)
+            db.commit()
+        except sqlite3.Error:
+            db.rollback()
+            raise
+        report.imported += len(rows)
+
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def import_habits(db: sqlite3.Connection, path: str, chunk_size=default_chunk_size, user_id=None) -> ImportReport:
+    """This function imports habits from a CSV or JSONL file with the columns name, periodicity, description (optional)
+    and created (optional, defaults to the time of the import).
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        path (str): path of the CSV or JSONL file
+        chunk_size (int, optional): number of rows written within a single transaction. Defaults to default_chunk_size.
+        user_id (int, optional): user of the imported habits (multi-tenant databases only). Defaults to None (user 0).
+
+    Returns:
+        ImportReport: number of imported and list of rejected rows and duration of the import
+    """
+    epoch_timestamps = timestamps_are_epoch(db)
+    now = datetime.now().replace(microsecond=0)
+    tenant = () if user_id is None else (user_id,)
+
+    def convert(record: dict) -> tuple:
+        # the values of JSONL records can have any type, only strings are stored as name, periodicity and description:
+        name, periodicity, description = record["name"] or "", record["periodicity"], record.get("description") or ""
+        if not isinstance(name, str):
+            raise ValueError(f"name {name!r} isn't a string")
+        if not name.strip():
+            raise ValueError("empty name")
+        if not isinstance(periodicity, str) or periodicity not in streak_steps:
+            raise ValueError(f"unknown periodicity {periodicity!r}")
+        if not isinstance(description, str):
+            raise ValueError(f"description {description!r} isn't a string")
+        created = parse_timestamp(record["created"]) if record.get("created") else now
+        return (name.strip(), periodicity, description, to_storage(created, epoch_timestamps)) + tenant
+
+    statement = ("INSERT INTO habits (name, periodicity, description, created) VALUES (?, ?, ?, ?)" if user_id is None
+        else "INSERT INTO habits (name, periodicity, description, created, user_id) VALUES (?, ?, ?, ?, ?)")
+    report = import_rows(db, read_records(path), convert, statement, chunk_size)
+    invalidate(db, "habits")
+    return report
+
+
+def import_checkoffs(db: sqlite3.Connection, path: str, chunk_size=default_chunk_size, user_id=None) -> ImportReport:
+    """This function imports checkoffs from a CSV or JSONL file with the columns habit (name of the habit) or habit_id and checkoff.
+    The names are resolved to the ids of the habits with a single query. The streak states of the habits are removed,
+    so they are rebuilt with the imported checkoffs.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        path (str): path of the CSV or JSONL file
+        chunk_size (int, optional): number of rows written within a single transaction. Defaults to default_chunk_size.
+        user_id (int, optional): only checkoffs of the habits of this user are imported (multi-tenant databases only). Defaults to None (all habits).
+
+    Returns:
+        ImportReport: number of imported and list of rejected rows and duration of the import
+    """
+    epoch_timestamps = timestamps_are_epoch(db)
+
+    # define the names by id and the ids by name of all habits (of the user), names used by more than one habit can't be resolved.
+    # The checkoffs are stored with the user of their habit by the trigger of multi-tenant databases:
+    if user_id is None:
+        names = dict(db.execute("SELECT id, name FROM habits").fetchall())
+    else:
+        names = dict(db.execute("SELECT id, name FROM habits WHERE user_id=?", [user_id]).fetchall())
+    ids = {}
+    for habit_id, habit_name in names.items():
+        ids[habit_name] = None if habit_name in ids else habit_id
+    touched = set()
+
+    def convert(record: dict) -> tuple:
+        if record.get("habit_id") not in (None, ""):
+            habit_id = int(record["habit_id"])
+            if habit_id not in names:
+                raise ValueError(f"unknown habit id {habit_id}")
+        elif not isinstance(record["habit"], str):
+            raise ValueError(f"habit {record['habit']!r} isn't a string")
+        else:
+            habit_id = ids.get(record["habit"])
+            if habit_id is None:
+                raise ValueError(f"unknown or ambiguous habit {record['habit']!r}")
+        checkoff = to_storage(parse_timestamp(record["checkoff"]), epoch_timestamps)
+        touched.add(habit_id)
+        return habit_id, names[habit_id], checkoff
+
+    report = import_rows(db, read_records(path), convert, "INSERT INTO habit_log (habit_id, habit_name, checkoff) VALUES (?, ?, ?)", chunk_size)
+
+    # remove the streak states and histories of the habits with imported checkoffs:
+    db.executemany("DELETE FROM habit_streak WHERE habit_id=?", [(habit_id,) for habit_id in touched])
+    db.executemany("DELETE FROM habit_streak_history WHERE habit_id=?", [(habit_id,) for habit_id in touched])
+    invalidate(db, "habit_log", "habit_streak", "habit_streak_history")
+    db.commit()
+    return report
@@ -0,0 +1,263 @@
+import atexit
+import json
+from collections.abc import Iterator
+import os
+import sqlite3
+import sys
+import threading
+import time
+from functools import wraps
+
+# define the environment variable which enables the instrumentation ("1" or "table" prints a table, "json" prints JSON):
+environment_variable = "HABIT_PROFILE"
+choice_for_output = ["table", "json"]
+
+# define the state of the instrumentation, it is disabled unless enable is called:
+enabled = False
+output_format = "table"
+statistics = {}
+statements = {}
+_lock = threading.Lock()
+_local = threading.local()
+_registered = False
+
+
+def enable(output="table") -> None:
+    """This function enables the instrumentation and registers the summary, which is written to stderr at exit.
+    Connections which are created afterwards count their SQL statements (see trace_connection).
+
+    Args:
+        output (str, optional): format of the summary ("table" or "json"). Defaults to "table".
+
+    Raises:
+        ValueError: if the format isn't one of choice_for_output
+    """
+    global enabled, output_format, _registered
+    if output not in choice_for_output:
+        raise ValueError(f"The output of the instrumentation has to be one of {', '.join(choice_for_output)}, not {output}.")
+    enabled = True
+    output_format = output
+    if not _registered:
+        atexit.register(write_summary)
+        _registered = True
+
+
+def disable() -> None:
+    """This function disables the instrumentation and removes the recorded statistics.
+    """
+    global enabled
+    enabled = False
+    reset()
+
+
+def reset() -> None:
+    """This function removes the recorded statistics.
+    """
+    with _lock:
+        statistics.clear()
+        statements.clear()
+
+
+def enable_from_environment() -> None:
+    """This function enables the instrumentation, if the environment variable HABIT_PROFILE is set ("1", "table" or "json").
+    """
+    value = os.environ.get(environment_variable, "").strip().lower()
+    if value in ("", "0", "false", "no"):
+        return
+    enable("json" if value == "json" else "table")
+
+
+def set_action(name: str) -> None:
+    """This function sets the action (e.g. the menu entry or the command) of the calling thread,
+    the following calls and statements are recorded for this action.
+
+    Args:
+        name (str): name of the action
+    """
+    _local.action = name
+
+
+def get_action() -> str:
+    """This function returns the action of the calling thread ("startup" before the first action is set).
+    """
+    return getattr(_local, "action", "startup")
+
+
+def count_rows(result) -> int:
+    """This function returns the number of rows of a result: the length of a list, 0 for None and 1 for other results.
+    Cursors and streams are read by the caller after the call returned, so their rows aren't counted here
+    (the rows of streams are counted while they are consumed, see count_stream).
+    """
+    if isinstance(result, list):
+        return len(result)
+    if result is None or isinstance(result, (sqlite3.Cursor, Iterator)):
+        return 0
+    return 1
+
+
+def record(function_name: str, rows: int, seconds: float, outermost: bool, calls=1) -> None:
+    """This function adds a call of a function to the statistics of the current action.
+    The duration of the outermost call is also added to the action, so nested calls aren't counted twice.
+    The rows and the duration of a consumed stream are added to the call which returned it (calls=0).
+    """
+    action = get_action()
+    with _lock:
+        functions = statistics.setdefault(action, {})
+        entry = functions.setdefault(function_name, [0, 0, 0.0])
+        entry[0] += calls
+        entry[1] += rows
+        entry[2] += seconds
+        if outermost:
+            total = functions.setdefault("(action)", [0, 0, 0.0])
+            total[0] += calls
+            total[1] += rows
+            total[2] += seconds
+
+
+def count_stream(function_name: str, stream, outermost: bool):
+    """This function yields the rows of a stream returned by a recorded function and records the rows and the wall time
+    of reading them, once the stream is exhausted or closed. Lazy functions (e.g. iter_log_data) only create their stream
+    when they are called, the rows are read from the database while the caller consumes it.
+
+    Args:
+        function_name (str): name of the function which returned the stream
+        stream (iterator): rows returned by the function
+        outermost (bool): if True: the function was called outside of other recorded functions
+
+    Yields:
+        rows of the stream
+    """
+    rows, seconds = 0, 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next(stream)
+            except StopIteration:
+                return
+            finally:
+                seconds += time.perf_counter() - start
+            rows += 1
+            yield row
+    finally:
+        record(function_name, rows, seconds, outermost, calls=0)
+
+
+def instrumented(function):
+    """This function is a decorator, which records the calls, returned rows and wall time of a function of the database and
+    analytics modules for the current action. The durations are inclusive (a call contains the durations of the functions it calls).
+    Streams (iterators except cursors) are returned wrapped by count_stream, so their rows and the time to read them are recorded as well.
+    If the instrumentation isn't enabled, the function is called directly.
+
+    Args:
+        function (function): function to record
+
+    Returns:
+        function: recorded function
+    """
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return function(*args, **kwargs)
+
+        # measure the call, calls of the function within other recorded functions are nested:
+        depth = getattr(_local, "depth", 0)
+        _local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            _local.depth = depth
+        record(function.__name__, count_rows(result), time.perf_counter() - start, depth == 0)
+        if isinstance(result, Iterator) and not isinstance(result, sqlite3.Cursor):
+            return count_stream(function.__name__, result, depth == 0)
+        return result
+
+    return wrapper
+
+
+def count_statement(statement: str) -> None:
+    """This function is the trace callback of the connections and counts every executed SQL statement for the current action.
+    """
+    if not enabled:
+        return
+    action = get_action()
+    with _lock:
+        statements[action] = statements.get(action, 0) + 1
+
+
+def trace_connection(db: sqlite3.Connection) -> sqlite3.Connection:
+    """This function counts the SQL statements of the connection with sqlite3.Connection.set_trace_callback,
+    if the instrumentation is enabled.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+
+    Returns:
+        sqlite3.Connection: the same connection
+    """
+    if enabled:
+        db.set_trace_callback(count_statement)
+    return db
+
+
+def summary() -> dict:
+    """This function returns the recorded statistics per action.
+
+    Returns:
+        dict: {action: {"statements": int, "calls": int, "rows": int, "seconds": float,
+            "functions": {function: {"calls": int, "rows": int, "seconds": float}}}}
+    """
+    with _lock:
+        actions = sorted(set(statistics) | set(statements))
+        result = {}
+        for action in actions:
+            functions = statistics.get(action, {})
+            calls, rows, seconds = functions.get("(action)", [0, 0, 0.0])
+            result[action] = {
+                "statements": statements.get(action, 0),
+                "calls": calls,
+                "rows": rows,
+                "seconds": round(seconds, 6),
+                "functions": {name: {"calls": entry[0], "rows": entry[1], "seconds": round(entry[2], 6)}
+                    for name, entry in sorted(functions.items(), key=lambda item: item[1][2], reverse=True) if name != "(action)"},
+            }
+        return result
+
+
+def format_summary(result: dict) -> str:
+    """This function formats the summary as plain text table (without beautifultable, so commands can use it as well).
+
+    Args:
+        result (dict): statistics returned by summary
+
+    Returns:
+        str: table with a line per action and an indented line per function
+    """
+    lines = [f"{'action / function':<48}{'statements':>12}{'calls':>10}{'rows':>12}{'ms':>12}"]
+    for action, entry in result.items():
+        lines.append(f"{action[:47]:<48}{entry['statements']:>12}{entry['calls']:>10}{entry['rows']:>12}{entry['seconds'] * 1000:>12.2f}")
+        for name, function in entry["functions"].items():
+            lines.append(f"{'  ' + name[:45]:<48}{'':>12}{function['calls']:>10}{function['rows']:>12}{function['seconds'] * 1000:>12.2f}")
+    return "\n".join(lines)
+
+
+def write_summary(output=None) -> None:
+    """This function writes the summary to stderr at exit (as table or JSON), if the instrumentation is enabled.
+
+    Args:
+        output (file, optional): file the summary is written to. Defaults to sys.stderr.
+    """
+    if not enabled:
+        return
+    output = output or sys.stderr
+    result = summary()
+    if output_format == "json":
+        output.write(json.dumps(result) + "\n")
+    else:
+        output.write(format_summary(result) + "\n")
+
+
+# enable the instrumentation if requested by the environment:
+enable_from_environment()
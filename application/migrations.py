@@ -0,0 +1,253 @@
+import sqlite3
+from .cache import invalidate
+
+
+def create_tables(cur: sqlite3.Cursor) -> None:
+    """Migration 1: creates the tables habits and habit_log.
+
+    Args:
+        cur (sqlite3.Cursor): Cursor of the transaction of the migration
+    """
+
+    # create table of habits:
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS habits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        periodicity TEXT,
+        description TEXT,
+        created TEXT,
+        UNIQUE(id))"""
+    )
+
+    # create table of habit log:
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS habit_log (
+        log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER,
+        habit_name TEXT,
+        checkoff TEXT,
+        UNIQUE(log_id),
+        FOREIGN KEY (habit_id) REFERENCES habits(id))"""
+    )
+
+
+def create_indexes(cur: sqlite3.Cursor) -> None:
+    """Migration 2: creates the index of the habit log ordered by habit and checkoff. The index lets every query of the
+    checkoffs of a single habit read an ordered range of the index instead of scanning the whole habit_log table.
+
+    Args:
+        cur (sqlite3.Cursor): Cursor of the transaction of the migration
+    """
+    cur.execute(
+        """CREATE INDEX IF NOT EXISTS idx_habit_log_habit_checkoff
+        ON habit_log (habit_id, checkoff)"""
+    )
+
+
+def create_streak_table(cur: sqlite3.Cursor) -> None:
+    """Migration 3: creates the table of the streak state, which is updated with every checkoff.
+
+    Args:
+        cur (sqlite3.Cursor): Cursor of the transaction of the migration
+    """
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS habit_streak (
+        habit_id INTEGER PRIMARY KEY,
+        count INTEGER,
+        count_max INTEGER,
+        status INTEGER,
+        starting_date TEXT,
+        last_checkoff TEXT,
+        FOREIGN KEY (habit_id) REFERENCES habits(id))"""
+    )
+
+
+def create_streak_history_table(cur: sqlite3.Cursor) -> None:
+    """Migration 4: creates the table of the streak history, which stores the streak after every checkoff of a habit.
+    The table is derived from the habit_log (see refresh_streak_history), the timestamps are stored in the format of the
+    checkoffs (the columns have no type, so strings and integer seconds are kept as they are).
+
+    Args:
+        cur (sqlite3.Cursor): Cursor of the transaction of the migration
+    """
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS habit_streak_history (
+        log_id INTEGER PRIMARY KEY,
+        habit_id INTEGER,
+        checkoff,
+        count INTEGER,
+        count_max INTEGER,
+        status INTEGER,
+        starting_date,
+        FOREIGN KEY (habit_id) REFERENCES habits(id))"""
+    )
+    cur.execute(
+        """CREATE INDEX IF NOT EXISTS idx_habit_streak_history_habit_checkoff
+        ON habit_streak_history (habit_id, checkoff)"""
+    )
+
+
+def reset_streak_states(cur: sqlite3.Cursor) -> None:
+    """Migration 5: removes the stored streak states and the streak histories, which were calculated by the former step
+    functions of the periodicities (with their own handling of the turn of the year). They are rebuilt from the habit log
+    by the period ordinals of the periodicities the next time they are read.
+
+    Args:
+        cur (sqlite3.Cursor): Cursor of the transaction of the migration
+    """
+    cur.execute("DELETE FROM habit_streak")
+    cur.execute("DELETE FROM habit_streak_history")
+
+
+def add_streak_log_id(cur: sqlite3.Cursor) -> None:
+    """Migration 6: adds the column last_log_id to the streak states, the id of the latest log which is included in the state.
+    As every insert into the habit log gets a new log_id, a state is stale as soon as a log of the habit was inserted with
+    another connection (e.g. a back-dated checkoff of another process), even if the latest checkoff didn't change.
+    The stored states don't know their log, so they are removed and rebuilt the next time they are read.
+
+    Args:
+        cur (sqlite3.Cursor): Cursor of the transaction of the migration
+    """
+
+    # the table may have been created with the column already (see migrate_to_epoch_timestamps):
+    columns = [row[1] for row in cur.execute("PRAGMA table_info(habit_streak)")]
+    if "last_log_id" not in columns:
+        cur.execute("ALTER TABLE habit_streak ADD COLUMN last_log_id INTEGER")
+    cur.execute("DELETE FROM habit_streak")
+
+
+# define the migrations of the schema in the order they are applied, the version of a migration is its position (starting with 1).
+# New migrations are appended, existing migrations must not be changed. As databases created before the migrations were
+# introduced have the version 0, the first migrations only create missing tables and indexes (IF NOT EXISTS):
+migrations = [
+    create_tables,
+    create_indexes,
+    create_streak_table,
+    create_streak_history_table,
+    reset_streak_states,
+    add_streak_log_id,
+]
+
+# define the version of the schema after all migrations were applied:
+schema_version = len(migrations)
+
+
+def get_schema_version(db: sqlite3.Connection) -> int:
+    """This function returns the version of the schema of the connected database. The version is stored in the header
+    of the database file (PRAGMA user_version), so it is read without reading a table.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+
+    Returns:
+        int: version of the schema (0 for new databases and databases created before the migrations were introduced)
+    """
+    return db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db: sqlite3.Connection, target_version=schema_version) -> int:
+    """This function applies the pending migrations of the connected database within a single transaction and stores
+    the new version of the schema. If the database is current, no statement besides reading the version is executed.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        target_version (int, optional): version of the schema after the migration. Defaults to schema_version.
+
+    Raises:
+        ValueError: if the database has a newer schema than the application knows
+
+    Returns:
+        int: number of applied migrations
+    """
+    version = get_schema_version(db)
+    if version > schema_version:
+        raise ValueError(f"The database has the schema version {version}, but the application only knows the versions up to {schema_version}.")
+    if version >= target_version:
+        return 0
+
+    # finish a pending transaction and apply the pending migrations and the new version within a single transaction:
+    db.commit()
+    cur = db.cursor()
+    cur.execute("BEGIN")
+    try:
+        for migration in migrations[version:target_version]:
+            migration(cur)
+        cur.execute(f"PRAGMA user_version = {int(target_version)}")
+        db.commit()
+
+    # undo all migrations, if any statement fails:
+    except sqlite3.Error:
+        db.rollback()
+        raise
+    return target_version - version
+
+
+def is_multi_tenant(db: sqlite3.Connection) -> bool:
+    """This function checks if the connected database stores the habits of more than one user
+    (the table habits has the column user_id).
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+
+    Returns:
+        bool: True if habits and checkoffs are stored with the id of their user
+    """
+    return any(column[1] == "user_id" for column in db.execute("PRAGMA table_info(habits)").fetchall())
+
+
+def create_tenant_indexes(cur: sqlite3.Cursor) -> None:
+    """This function creates the tenant-leading indexes of a multi-tenant database and the trigger, which stores the
+    user of the habit with every checkoff. Queries of a single user read a range of these indexes, queries of all users
+    can be grouped by user_id from the indexes only.
+
+    Args:
+        cur (sqlite3.Cursor): Cursor of the transaction of the migration
+    """
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_habits_user ON habits (user_id, id)")
+    cur.execute(
+        """CREATE INDEX IF NOT EXISTS idx_habit_log_user_habit_checkoff
+        ON habit_log (user_id, habit_id, checkoff)"""
+    )
+
+    # checkoffs are inserted without user (user_id 0), the trigger copies the user of the habit into the checkoff:
+    cur.execute(
+        """CREATE TRIGGER IF NOT EXISTS habit_log_user AFTER INSERT ON habit_log
+        WHEN NEW.user_id = 0
+        BEGIN
+            UPDATE habit_log SET user_id = COALESCE((SELECT user_id FROM habits WHERE id = NEW.habit_id), 0)
+            WHERE log_id = NEW.log_id;
+        END"""
+    )
+
+
+def enable_multi_tenant(db: sqlite3.Connection) -> None:
+    """This function migrates the connected database in place, so it stores the habits and checkoffs of more than one user.
+    The tables habits and habit_log get the column user_id, the existing habits and checkoffs belong to the user 0.
+    The migration is optional (single-user databases keep their schema) and a multi-tenant database isn't changed.
+    It isn't one of the versioned migrations: PRAGMA user_version counts the migrations every database needs, while this mode
+    is chosen per database and detected from its schema (is_multi_tenant). Migrations appended later must keep the column user_id.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+    """
+
+    # checks if the database was already migrated:
+    if is_multi_tenant(db):
+        return
+
+    # finish a pending transaction and add the columns, indexes and trigger within a single transaction:
+    db.commit()
+    cur = db.cursor()
+    cur.execute("BEGIN")
+    try:
+        cur.execute("ALTER TABLE habits ADD COLUMN user_id INTEGER NOT NULL DEFAULT 0")
+        cur.execute("ALTER TABLE habit_log ADD COLUMN user_id INTEGER NOT NULL DEFAULT 0")
+        create_tenant_indexes(cur)
+        db.commit()
+        invalidate(db, "habits", "habit_log")
+
+    # undo the complete migration, if any statement fails:
+    except sqlite3.Error:
+        db.rollback()
+        raise
@@ -0,0 +1,150 @@
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from pathlib import Path
+from . import analytics
+from .analytics import streaks_of_rows, longest_of_ranking, calculate_streaks_of_all
+from .database import iter_checkoffs_of_habits
+from .streaks import periodicities, register_periodicity
+
+# define the number of habits calculated by a single task of a worker process:
+default_chunk_size = 500
+
+# define the number of habits below which the streaks are calculated serially (starting processes takes longer):
+default_serial_threshold = 2000
+
+
+def database_file(db: sqlite3.Connection) -> str:
+    """This function returns the path of the file of the connected database.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+
+    Returns:
+        str: path of the database file, "" for an in-memory database
+    """
+    for _, name, path in db.execute("PRAGMA database_list").fetchall():
+        if name == "main":
+            return path or ""
+    return ""
+
+
+def habit_chunks(habit_ids: list, chunk_size: int) -> list:
+    """This function splits the ordered ids of the habits into ranges of chunk_size habits.
+
+    Args:
+        habit_ids (list): ids of the habits in ascending order
+        chunk_size (int): number of habits of a range
+
+    Returns:
+        list: ranges of ids as tuples [(first_id, last_id)]
+    """
+    return [(habit_ids[start], habit_ids[min(start + chunk_size, len(habit_ids)) - 1])
+        for start in range(0, len(habit_ids), chunk_size)]
+
+
+def periodicity_specs() -> list:
+    """This function returns the arguments of register_periodicity of all registered periodicities, so worker processes
+    can register the same periodicities. Worker processes which are started by spawn or forkserver only import the
+    module streaks, which registers the default periodicities, but not the periodicities registered at runtime.
+
+    Returns:
+        list: periodicities in the order of registration [(name, unit, length, offset, delta_hours)]
+    """
+    return [(periodicity.name, periodicity.unit, periodicity.length, periodicity.offset, periodicity.delta_hours)
+        for periodicity in periodicities.values()]
+
+
+def register_periodicities(specs: list) -> None:
+    """This function runs once in every worker process and registers the periodicities of the calling process.
+
+    Args:
+        specs (list): periodicities as returned by periodicity_specs [(name, unit, length, offset, delta_hours)]
+    """
+    for spec in specs:
+        register_periodicity(*spec)
+
+
+def streaks_of_chunk(name: str, first_id: int, last_id: int, engine: str, user_id=None) -> list:
+    """This function runs in a worker process and calculates the maximum streaks of the habits with an id from first_id
+    to last_id. Every task opens its own read-only connection to the database file.
+
+    Args:
+        name (str): path of the database file
+        first_id (int): id of the first habit
+        last_id (int): id of the last habit
+        engine (str): streak engine of the calling process ("python" or "numpy")
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+
+    Returns:
+        list: habits ordered by id [(habit_id, habit_name, count_max, last_checkoff)]
+    """
+    analytics.set_streak_engine(engine)
+    db = sqlite3.connect(Path(name).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        return streaks_of_rows(iter_checkoffs_of_habits(db, first_id, last_id, user_id=user_id))
+    finally:
+        db.close()
+
+
+def calculate_streaks_of_all_parallel(db: sqlite3.Connection, workers=None, chunk_size=default_chunk_size,
+        serial_threshold=default_serial_threshold, user_id=None, mp_context=None) -> list:
+    """This function calculates the ranking of calculate_streaks_of_all with a pool of worker processes. The habits are split
+    into ranges of chunk_size habits, which are calculated in parallel and merged into the same ranking.
+    The workers read the database file, so they only see committed checkoffs. Small databases, in-memory databases and
+    a single worker are calculated serially. The workers register the periodicities of the calling process before their
+    first task, so habits with periodicities registered at runtime are calculated with any start method of the processes.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        workers (int, optional): number of worker processes. Defaults to None (number of CPUs).
+        chunk_size (int, optional): number of habits of a task. Defaults to default_chunk_size.
+        serial_threshold (int, optional): minimum number of habits to calculate in parallel. Defaults to default_serial_threshold.
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+        mp_context (multiprocessing.context.BaseContext, optional): context which starts the worker processes.
+            Defaults to None (default start method of the platform).
+
+    Returns:
+        list: habits ranked by maximum streak (descending) and id [(habit_id, habit_name, count_max, last_checkoff)]
+    """
+    name = database_file(db)
+    workers = workers or os.cpu_count() or 1
+    if user_id is None:
+        habit_ids = [row[0] for row in db.execute("SELECT id FROM habits ORDER BY id")]
+    else:
+        habit_ids = [row[0] for row in db.execute("SELECT id FROM habits WHERE user_id=? ORDER BY id", [user_id])]
+    chunks = habit_chunks(habit_ids, max(1, chunk_size))
+
+    # calculate serially, if starting the worker processes doesn't pay off:
+    if not name or workers < 2 or len(chunks) < 2 or len(habit_ids) < serial_threshold:
+        return calculate_streaks_of_all(db, user_id)
+
+    # calculate the ranges in parallel, the results are returned in the order of the ranges (ordered by id):
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=mp_context,
+            initializer=register_periodicities, initargs=(periodicity_specs(),)) as executor:
+        results = executor.map(streaks_of_chunk, [name] * len(chunks), *zip(*chunks), [analytics.streak_engine] * len(chunks),
+            [user_id] * len(chunks))
+        ranking = [habit for result in results for habit in result]
+
+    # rank the habits by their maximum streak, habits with the same streak stay ordered by id:
+    ranking.sort(key=itemgetter(2), reverse=True)
+    return ranking
+
+
+def calculate_longest_streak_of_all_parallel(db: sqlite3.Connection, workers=None, chunk_size=default_chunk_size,
+        serial_threshold=default_serial_threshold, user_id=None) -> tuple:
+    """This function calculates the longest streak of all habits like calculate_longest_streak_of_all,
+    with the ranking calculated in parallel by calculate_streaks_of_all_parallel.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        workers (int, optional): number of worker processes. Defaults to None (number of CPUs).
+        chunk_size (int, optional): number of habits of a task. Defaults to default_chunk_size.
+        serial_threshold (int, optional): minimum number of habits to calculate in parallel. Defaults to default_serial_threshold.
+        user_id (int, optional): only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+
+    Returns:
+        tuple: habit_id (as list of ints) and maximum streak (as int) ([1],1)
+    """
+    return longest_of_ranking(calculate_streaks_of_all_parallel(db, workers, chunk_size, serial_threshold, user_id))
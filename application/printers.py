@@ -2,24 +2,23 @@ import sqlite3
 from .database import (
     get_all_habits,
     get_habits_same_periods,
-    get_habit_name,
-    get_periods,
-)
-from .analytics import (
-    calculation_of_streaks,
-    convert_date_and_time_for_calculation,
-    calculate_longest_streak_of_all,
 )
+from .analytics import calculate_streaks_of_all, calculate_completion_rates, calculate_heatmap, calculate_leaderboard
+from .streaks import StreakResult
+from .timestamps import format_checkoff
+from .importer import ImportReport
 from beautifultable import BeautifulTable
 
+# define the length and unit the strike of the default periodicities daily, weekly and monthly is told in:
+strike_units = {"daily": (1, "day"), "weekly": (7, "day"), "monthly": (1, "month")}
+
 
-def print_check_off(db: sqlite3.Connection, habit_name: str, habit_id: int) -> None:
+def print_check_off(habit_name: str, streak: StreakResult) -> None:
     """This function prints the confirmation for a check off of a habit into the command line interface in a clear manner.
 
     Args:
-        db (sqlite3.Connection): Connection to Database
         habit_name (str): Name of the habit
-        habit_id (int): ID of the habit
+        streak (StreakResult): Streak of the habit calculated after the check off
     """
 
     # create table and print it with a header and set the table to a consistent width matched with the questionary lib:
@@ -28,22 +27,22 @@ def print_check_off(db: sqlite3.Connection, habit_name: str, habit_id: int) -> N
     table.columns.width = 34
 
     # appends the respective habit name and current streak to the table as a row:
-    table.rows.append([habit_name, calculation_of_streaks(db, habit_id, False)[0]])
+    table.rows.append([habit_name, streak.current])
     print(table)
 
     print("")
 
     # if status = 1, user checked off in time:
-    if calculation_of_streaks(db, habit_id, False)[1] == 1:
+    if streak.status == 1:
         print(" Congratulations, you have completed the habit. ".center(71, "="))
 
     # if status = 2, user have checked off in the respective timespan already:
-    elif calculation_of_streaks(db, habit_id, False)[1] == 2:
+    elif streak.status == 2:
         print(" Good effort, but you have already ".center(71, "="))
         print(" completed the habit in the given time period. ".center(71, "="))
 
     # if status = 3, user have broken the habit:
-    elif calculation_of_streaks(db, habit_id, False)[1] == 3:
+    elif streak.status == 3:
         print(" Unfortunately you have broken the habit.... ".center(71, "="))
         print(" Stay tuned! ".center(71, "="))
 
@@ -67,13 +66,13 @@ def print_all_habits(db: sqlite3.Connection) -> None:
         "Description",
         "Created"]
 
-    # iterates over the length of the habit stored in the connected database and
+    # iterates over the habits stored in the connected database and
     # append the data to the table
-    for idx in range(len(get_all_habits(db))):
+    for habit in get_all_habits(db):
         table.rows.append([
-                get_all_habits(db)[idx][1],
-                get_all_habits(db)[idx][3],
-                get_all_habits(db)[idx][4],])
+                habit.name,
+                habit.description,
+                format_checkoff(habit.created),])
     print(table)
     print("=".center(71, "="))
 
@@ -98,38 +97,35 @@ def print_with_same_period(db: sqlite3.Connection, periodicity: str) -> None:
         "Description",
         "Created"]
 
-    # iterates over the length of the habits with the same periodicity stored in the
+    # iterates over the habits with the same periodicity stored in the
     # connected database and appends the respective data to the table
-    for idx in range(len(get_habits_same_periods(db, periodicity))):
+    for habit in get_habits_same_periods(db, periodicity):
         table.rows.append([
-                get_habits_same_periods(db, periodicity)[idx][0],
-                get_habits_same_periods(db, periodicity)[idx][1],
-                get_habits_same_periods(db, periodicity)[idx][2],])
+                habit[0],
+                habit[1],
+                format_checkoff(habit[2]),])
     print(table)
     print("=".center(71, "="))
 
 
-def print_longest_streak_of_given_habit(db: sqlite3.Connection, habit_id: int) -> None:
+def print_longest_streak_of_given_habit(habit_name: str, streak: StreakResult) -> None:
     """This function prints the name, longest streak and the last time the habit was 
     checked off into the command line interface in a clear manner.
 
     Args:
-        db (sqlite3.Connection): Connection to Database
-        habit_id (int): ID of the habit 
+        habit_name (str): Name of the habit
+        streak (StreakResult): Streak of the habit, None if the habit isn't stored in the database
     """
 
-    # try to call the functions
-    try:
+    # check if the habit is stored in the database
+    if streak is not None:
         # define the variable and store the maximum streaks of the respective habit
-        calculated_streak = calculation_of_streaks(db, habit_id, True)[0]
-
-        # define the variable and store the habit name based on the habit id
-        habit_name = get_habit_name(db, habit_id)
+        calculated_streak = streak.maximum
 
         # define the variable and store the last checked off date as a string
-        last_checked = str(convert_date_and_time_for_calculation(db, habit_id).pop())
+        last_checked = format_checkoff(streak.last_checkoff)
 
-        periodicity = get_periods(db, habit_id)
+        periodicity = streak.periodicity
 
         # check if the habit log is not empty
         if calculated_streak != 0:
@@ -145,17 +141,18 @@ def print_longest_streak_of_given_habit(db: sqlite3.Connection, habit_id: int) -
             # append the data to the table and print it with a note of the current streak
             table.rows.append([habit_name, calculated_streak, last_checked])
             print(table)
-            if periodicity == "daily":
-                print(
-                    f"You have reached a {calculated_streak} day strike in your habit {get_habit_name(db, habit_id)}."
-                )
-            elif periodicity == "weekly":
+
+            # the strike of daily, weekly and monthly habits is told in days or months,
+            # the strike of the other periodicities in periods of the periodicity (e.g. "2 yearly periods"):
+            if periodicity in strike_units:
+                length, unit = strike_units[periodicity]
                 print(
-                    f"You have reached a {calculated_streak*7} day strike in your habit {get_habit_name(db, habit_id)}."
+                    f"You have reached a {calculated_streak*length} {unit} strike in your habit {habit_name}."
                 )
-            elif periodicity == "monthly":
+            else:
+                periods = "period" if calculated_streak == 1 else "periods"
                 print(
-                    f"You have reached a {calculated_streak} month strike in your habit {get_habit_name(db, habit_id)}."
+                    f"You have reached a strike of {calculated_streak} {periodicity} {periods} in your habit {habit_name}."
                 )
 
         # if variable calculated_streak == -1, the habit log database has no logged data for the respective habit
@@ -166,8 +163,8 @@ def print_longest_streak_of_given_habit(db: sqlite3.Connection, habit_id: int) -
             )
             print("=".center(71, "="))
 
-    # catch a type error, if a habit which isn't stored in the database is called
-    except TypeError:
+    # if there is no streak, a habit which isn't stored in the database is called
+    else:
         print("=".center(71, "="))
         print("You haven't created the habit already, so there's nothing to show.")
         print("=".center(71, "="))
@@ -180,9 +177,6 @@ def print_longest_streak_of_all(db: sqlite3.Connection) -> None:
     Args:
         db (sqlite3.Connection): Connection to Database
     """
-    # define the variable and assign the length of the list to it
-    len_for_iterate = len(calculate_longest_streak_of_all(db)[0])
-
     # creates table with habit name, longest streak and last time the respective habits were checked off as header
     table = BeautifulTable()
     table.columns.header = [
@@ -193,20 +187,20 @@ def print_longest_streak_of_all(db: sqlite3.Connection) -> None:
     print("=".center(71, "="))
     print("\nThe data of the longest streak of all your habits:\n")
 
+    # define the variable and assign the ranking of all habits calculated in a single pass to it
+    ranking = calculate_streaks_of_all(db)
+
     # define the variable and assign the longest streak as int to it
-    longest_streak = calculate_longest_streak_of_all(db)[1]
+    longest_streak = ranking[0][2] if ranking else 0
 
     # Confirm that there is a habit log already:
     if longest_streak != 0:
-        # iterate over the length of the list and update the variable for id, name and last checkoff-time
-        # append the respective data to the rows and print the table
-        for _ in range(len_for_iterate):
-            habit_id = calculate_longest_streak_of_all(db)[0][_]
-            habit_name = get_habit_name(db, habit_id)
-            last_checked = str(
-                convert_date_and_time_for_calculation(db, habit_id).pop()
-            )
-            table.rows.append([habit_name, longest_streak, last_checked])
+        # iterate over the habits with the longest streak and append name, streak and last checkoff-time to the rows
+        # and print the table
+        for _, habit_name, count_max, last_checked in ranking:
+            if count_max != longest_streak:
+                break
+            table.rows.append([habit_name, longest_streak, format_checkoff(last_checked)])
         print(table)
 
     # if there isn't any habit log already, the user will see the following message:
@@ -216,6 +210,118 @@ def print_longest_streak_of_all(db: sqlite3.Connection) -> None:
         print("=".center(71, "="))
 
 
+def print_leaderboard(db: sqlite3.Connection, k=10, by="maximum", normalized=True, periodicity=None) -> None:
+    """This function prints the top k habits by their current or maximum streak with the streak in periods and in days
+    into the command line interface in a clear manner.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        k (int, optional): number of habits on the leaderboard. Defaults to 10.
+        by (str, optional): streak the habits are ranked by ("current" or "maximum"). Defaults to "maximum".
+        normalized (bool, optional): if True: rank by the streak in days, if False: rank by the number of periods. Defaults to True.
+        periodicity (str, optional): only the habits with this periodicity. Defaults to None (all periodicities).
+    """
+    leaderboard = calculate_leaderboard(db, k, by, normalized, periodicity)
+
+    print("=".center(71, "="))
+    print(f"\nThe top {k} habits by their {by} streak:\n")
+
+    # if there isn't any habit log already, the user will see the following message:
+    if not leaderboard:
+        print("You haven't checked off any habit already, so there's nothing to show.")
+        print("=".center(71, "="))
+        return
+
+    # creates table with rank, habit name, periodicity, streak in periods and in days as header and appends the habits:
+    table = BeautifulTable()
+    table.columns.header = ["Rank", "Habit Name", "Periodicity", "Streak", "Days"]
+    for rank, entry in enumerate(leaderboard, 1):
+        table.rows.append([rank, entry.habit_name, entry.periodicity, entry.streak, f"{entry.days:g}"])
+    print(table)
+    print("=".center(71, "="))
+
+
+def print_completion_rates(db: sqlite3.Connection, start=None, end=None) -> None:
+    """This function prints the completion rate of all habits (the share of their periods with a checkoff)
+    into the command line interface in a clear manner.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        start (datetime, optional): first time of the range (inclusive). Defaults to 365 days before end.
+        end (datetime, optional): end of the range (exclusive). Defaults to the start of tomorrow.
+    """
+
+    print("=".center(71, "="))
+    print("\nThe completion rates of your habits:\n")
+
+    # creates table with habit name, periodicity, completed periods, periods and completion rate as header:
+    table = BeautifulTable()
+    table.columns.header = ["Habit Name", "Periodicity", "Completed", "Periods", "Rate"]
+
+    # appends the completion rate of every habit to the table:
+    for _, habit_name, periodicity, completed, periods, rate in calculate_completion_rates(db, start, end):
+        table.rows.append([habit_name, periodicity, completed, periods, f"{rate:.0%}"])
+    print(table)
+    print("=".center(71, "="))
+
+
+# define the characters of the heatmap for 0, 1, 2 and more checkoffs a day and the names of the rows:
+heatmap_shades = [".", "+", "*", "#"]
+heatmap_weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def format_heatmap(days: list, checkoffs: list) -> list:
+    """This function formats the checkoffs per day of a habit as calendar: a row per weekday and a column per week,
+    with the abbreviations of the months above the weeks they start in.
+
+    Args:
+        days (list): consecutive days of the heatmap [date]
+        checkoffs (list): number of checkoffs of every day
+
+    Returns:
+        list: lines of the calendar
+    """
+    if not days:
+        return []
+
+    # define the cells of the grid week by week, the first week starts on the monday before the first day,
+    # so every 7th cell belongs to the same weekday:
+    offset = days[0].weekday()
+    weeks = (offset + len(days) + 6) // 7
+    most = len(heatmap_shades) - 1
+    cells = [" "] * offset + [heatmap_shades[min(count, most)] for count in checkoffs]
+    cells += [" "] * (weeks * 7 - len(cells))
+
+    # write the month above the week of its first day, if there is space left:
+    months = [" "] * (weeks + 3)
+    for index, day in enumerate(days):
+        column = (offset + index) // 7
+        if day.day == 1 and not "".join(months[max(column - 1, 0):column + 3]).strip():
+            months[column:column + 3] = day.strftime("%b")
+    return ["    " + "".join(months).rstrip()] + [
+        f"{weekday} {''.join(cells[row::7])}" for row, weekday in enumerate(heatmap_weekdays)]
+
+
+def print_heatmap(db: sqlite3.Connection, habit_id: int, start=None, end=None) -> None:
+    """This function prints the calendar heatmap of a habit (the checkoffs of every day) into the command line interface.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        habit_id (int): id of the habit
+        start (datetime, optional): first day of the heatmap (inclusive). Defaults to 365 days before end.
+        end (datetime, optional): end of the heatmap (exclusive). Defaults to the start of tomorrow.
+    """
+    days, rows = calculate_heatmap(db, start, end, habit_id)
+    _, habit_name, checkoffs = rows[0]
+
+    print("=".center(71, "="))
+    print(f"\nThe check-offs of your habit {habit_name} per day:\n")
+    for line in format_heatmap(days, checkoffs):
+        print(line)
+    print(f"\n{heatmap_shades[0]} none  {heatmap_shades[1]} once  {heatmap_shades[2]} twice  {heatmap_shades[3]} more often\n")
+    print("=".center(71, "="))
+
+
 def print_delete(db: sqlite3.Connection, habit_name: str, delete_bool: bool) -> None:
     """This function prints the name, longest streak and the last time the habit was 
     checked off into the command line interface in a clear manner of all habits with the longest streak.
@@ -238,3 +344,22 @@ def print_delete(db: sqlite3.Connection, habit_name: str, delete_bool: bool) ->
         input("Press enter to continue.")
     except KeyboardInterrupt:
         print("\nYou have canceled by shortcut.\n\n")
+
+
+def print_import(kind: str, report: ImportReport) -> None:
+    """This function prints the number of imported and rejected rows of a bulk import and the rows per second
+    into the command line interface. The first rejected rows are printed with their line and reason.
+
+    Args:
+        kind (str): kind of the imported rows ("habits" or "checkoffs")
+        report (ImportReport): result of the import
+    """
+    print("=".center(71, "="))
+    print(f"{report.imported} {kind} imported in {report.seconds:.2f} seconds ({report.rows_per_second():.0f} rows per second).")
+
+    # show the first rejected rows, so the user can correct the file:
+    if report.rejected:
+        print(f"{len(report.rejected)} rows were rejected:")
+        for line, reason in report.rejected[:10]:
+            print(f"  line {line}: {reason}")
+    print("=".center(71, "="))
@@ -0,0 +1,106 @@
+from collections import namedtuple
+from datetime import datetime
+from .timestamps import parse_checkoff
+
+
+class HabitRecord(namedtuple("HabitRecord", ["habit_id", "name", "periodicity", "description", "created"])):
+    """A class to represent a stored habit as immutable record without connection to the database.
+    The record is a tuple with __slots__ = (), so it needs no dict per habit and a row of the habits table
+    (id, name, periodicity, description, created) is converted with HabitRecord._make(row).
+    Positional access (record[1]) keeps working for the callers of get_all_habits.
+
+    Attributes
+    ----------
+    habit_id : int
+        id of the habit
+    name : str
+        name of the habit
+    periodicity : str
+        periodicity of the habit
+    description : str
+        description of the habit
+    created : int or str
+        time the habit was created as stored in the database
+
+    Methods
+    -------
+    created_at():
+        returns the time the habit was created in datetime-format.
+    """
+    __slots__ = ()
+
+    def created_at(self) -> datetime:
+        """
+        Returns the time the habit was created in datetime-format.
+        """
+        return parse_checkoff(self.created)
+
+
+class StreakPoint(namedtuple("StreakPoint", ["log_id", "checkoff", "count", "count_max", "status"])):
+    """A class to represent the streak of a habit after one of its checkoffs, a point of the streak history.
+
+    Attributes
+    ----------
+    log_id : int
+        id of the checkoff
+    checkoff : int or str
+        time of the checkoff as stored in the database
+    count : int
+        current streak after the checkoff
+    count_max : int
+        maximum streak after the checkoff
+    status : int
+        status of the checkoff (1: in time, 2: checked off already, 3: broken the habit)
+    """
+    __slots__ = ()
+
+
+class LeaderboardEntry(namedtuple("LeaderboardEntry", ["habit_id", "habit_name", "periodicity", "streak", "days", "last_checkoff"])):
+    """A class to represent a habit on the leaderboard with its streak in periods and in days.
+
+    Attributes
+    ----------
+    habit_id : int
+        id of the habit
+    habit_name : str
+        name of the habit
+    periodicity : str
+        periodicity of the habit
+    streak : int
+        current or maximum streak in periods of the habit
+    days : float
+        streak in days (the periods multiplied with their average number of days)
+    last_checkoff : int or str
+        last checkoff as stored in the database
+    """
+    __slots__ = ()
+
+
+class CheckoffRecord(namedtuple("CheckoffRecord", ["log_id", "habit_id", "habit_name", "checkoff"])):
+    """A class to represent a stored checkoff (a row of the habit_log table) as immutable record.
+    The record is a tuple with __slots__ = (), a row (log_id, habit_id, habit_name, checkoff) is converted with
+    CheckoffRecord._make(row).
+
+    Attributes
+    ----------
+    log_id : int
+        id of the checkoff
+    habit_id : int
+        id of the habit
+    habit_name : str
+        name of the habit
+    checkoff : int or str
+        time of the checkoff as stored in the database
+
+    Methods
+    -------
+    checkoff_at():
+        returns the time of the checkoff in datetime-format.
+    """
+    __slots__ = ()
+
+    def checkoff_at(self) -> datetime:
+        """
+        Returns the time of the checkoff in datetime-format.
+        """
+        return parse_checkoff(self.checkoff)
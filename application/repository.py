@@ -0,0 +1,91 @@
+import sqlite3
+from .database import default_arraysize, iter_rows, get_all_habits, iter_log_data
+from .records import HabitRecord, CheckoffRecord
+
+
+class HabitRepository:
+    """A class to read the habits and checkoffs of the connected database as immutable records.
+    The records are built in bulk from the rows of the cursor (map of HabitRecord._make or CheckoffRecord._make), so no
+    Habit or Log object with a dict and a connection is created per row. Lists are only built by the load methods,
+    the iter methods stream the records with fetchmany.
+
+    Attributes
+    ----------
+    db : sqlite3.Connection
+        Connection to the database
+    arraysize : int
+        number of rows fetched at once by the iter methods
+
+    Methods
+    -------
+    habits(user_id):
+        returns all habits as list of HabitRecord.
+    habit(habit_id):
+        returns the habit with habit_id as HabitRecord.
+    iter_checkoffs(habit_id):
+        yields the checkoffs of a habit as CheckoffRecord in chronological order.
+    load_checkoffs(habit_id):
+        returns the checkoffs of a habit as list of CheckoffRecord.
+    iter_all_checkoffs(user_id):
+        yields the checkoffs of all habits as CheckoffRecord ordered by habit and checkoff.
+    """
+
+    def __init__(self, db: sqlite3.Connection, arraysize=default_arraysize):
+        """Constructs all the necessary attributes for the HabitRepository object.
+
+        Args:
+            db (sqlite3.Connection): Connection to Database
+            arraysize (int, optional): number of rows fetched at once. Defaults to default_arraysize.
+        """
+        self.db = db
+        self.arraysize = arraysize
+
+
+    def habits(self, user_id=None) -> list:
+        """
+        Returns all habits (or the habits of a user in a multi-tenant database) as list of HabitRecord.
+        The list is read by get_all_habits and shared with its query cache, so it must not be changed.
+        """
+        return get_all_habits(self.db, user_id=user_id)
+
+
+    def habit(self, habit_id: int) -> HabitRecord:
+        """
+        Returns the habit with habit_id as HabitRecord.
+
+        Raises:
+            TypeError: if there is no habit with habit_id (as get_periods does)
+        """
+        row = self.db.execute("SELECT id, name, periodicity, description, created FROM habits WHERE id=?", [habit_id]).fetchone()
+        if row is None:
+            raise TypeError(f"There is no habit with id {habit_id}.")
+        return HabitRecord._make(row)
+
+
+    def iter_checkoffs(self, habit_id: int):
+        """
+        Yields the checkoffs of the habit with habit_id as CheckoffRecord in chronological order.
+        """
+        return iter_log_data(self.db, habit_id, self.arraysize)
+
+
+    def load_checkoffs(self, habit_id: int) -> list:
+        """
+        Returns the checkoffs of the habit with habit_id as list of CheckoffRecord in chronological order.
+        """
+        return list(self.iter_checkoffs(habit_id))
+
+
+    def iter_all_checkoffs(self, user_id=None):
+        """
+        Yields the checkoffs of all habits (or the habits of a user in a multi-tenant database) as CheckoffRecord
+        ordered by (habit_id, checkoff), e.g. to export the complete habit log.
+        """
+        cur = self.db.cursor()
+        if user_id is None:
+            cur.execute("SELECT log_id, habit_id, habit_name, checkoff FROM habit_log ORDER BY habit_id, checkoff, log_id")
+        else:
+            cur.execute(
+                "SELECT log_id, habit_id, habit_name, checkoff FROM habit_log WHERE user_id=? ORDER BY habit_id, checkoff, log_id",
+                [user_id])
+        return map(CheckoffRecord._make, iter_rows(cur, self.arraysize))
@@ -0,0 +1,316 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs, unquote
+from .connection import ConnectionManager, default_busy_timeout
+from .instrumentation import set_action
+from .habit import Habit
+from .analytics import choice_for_periodicity
+from .commands import CommandError, UnknownHabitError, command_checkout, command_streak, command_longest, command_list
+
+# define the default address of the server and the number of worker threads (and read-only connections):
+default_host = "127.0.0.1"
+default_port = 8080
+default_workers = 8
+
+# define the maximum size of a request body in bytes and the seconds an idle keep-alive connection is kept open:
+max_body_size = 1024 * 1024
+keep_alive_timeout = 15
+
+# define the methods of the endpoints (the route of /habits/<habit>/streak is "streak"):
+routes = {"habits": ("GET", "POST"), "streak": ("GET",), "checkoffs": ("POST",), "longest": ("GET",)}
+
+# define the reason phrases of the status codes sent by the server:
+reasons = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    """A class to represent an error of a request, which is answered with its status code and a JSON body {"error": message}.
+    """
+
+    def __init__(self, status: int, message: str):
+        """Constructs the status code and the message of the error.
+        """
+        super().__init__(message)
+        self.status = status
+
+
+class HabitServer:
+    """A class to represent the HTTP server of the habit and analytics API. Requests are parsed by asyncio, the blocking
+    sqlite3 work runs in a thread pool. The connections are checked out of a ConnectionManager: GET requests read with
+    a read-only connection of the pool and are answered in parallel, so they never write (e.g. a stale streak state),
+    POST requests check out the single writer connection one after another.
+    The path segments are URL-decoded, so /habits/Visit%20Family/streak refers to the habit "Visit Family".
+    A server of a multi-tenant database can be scoped to the habits of a single user (user_id).
+
+    Endpoints
+    ---------
+    GET  /habits                    all habits (?periodicity=daily)
+    POST /habits                    create a habit {"name": ..., "periodicity": ..., "description": ...}
+    GET  /habits/<habit>/streak     current and maximum streak of a habit (id or name)
+    POST /habits/<habit>/checkoffs  check off a habit {"at": "YYYY-MM-DD hh:mm:ss"} (optional, defaults to now)
+    GET  /longest                   habits with the longest streak of all (?limit=3)
+
+    Attributes
+    ----------
+    name : str
+        name of the database
+    workers : int
+        number of worker threads and read-only connections
+    manager : ConnectionManager
+        writer connection and pool of read-only connections to the database
+    user_id : int
+        user whose habits are served (multi-tenant databases only), None for all habits
+
+    Methods
+    -------
+    handle(method, target, body):
+        answers a request in a worker thread and returns status code and JSON body.
+    serve(host, port):
+        serves requests until the server is cancelled.
+    """
+
+    def __init__(self, name="main.db", workers=default_workers, busy_timeout=default_busy_timeout, user_id=None):
+        """Constructs the server and the ConnectionManager, which creates and migrates the database and switches it to WAL.
+
+        Args:
+            name (str, optional): Name of the Database. Defaults to "main.db".
+            workers (int, optional): number of worker threads and read-only connections. Defaults to default_workers.
+            busy_timeout (int, optional): milliseconds a connection waits for a lock. Defaults to default_busy_timeout.
+            user_id (int, optional): serve only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+        """
+        self.name = name
+        self.workers = workers
+        self.user_id = user_id
+        self.manager = ConnectionManager(name, pool_size=workers, busy_timeout=busy_timeout)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="habit-worker")
+
+
+    def handle(self, method: str, target: str, body: bytes) -> tuple:
+        """
+        Answers a request in a worker thread and returns the status code and the JSON body of the response (status, result).
+        """
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [unquote(part) for part in url.path.split("/") if part]
+
+        # define the route of the path and check if it supports the method:
+        if parts in (["habits"], ["longest"]):
+            route = parts[0]
+        elif len(parts) == 3 and parts[0] == "habits" and parts[2] in ("streak", "checkoffs"):
+            route = parts[2]
+        else:
+            raise HttpError(404, f"There is no endpoint {url.path}.")
+        if method not in routes[route]:
+            raise HttpError(405, f"{method} {url.path} isn't supported.")
+        set_action(f"{method} {route}")
+
+        # check out a read-only connection of the pool for GET and the writer for POST requests:
+        try:
+            with self.manager.reader() if method == "GET" else self.manager.writer() as db:
+                if route == "habits" and method == "GET":
+                    return 200, command_list(db, argparse.Namespace(periodicity=query.get("periodicity"), user=self.user_id))
+                elif route == "habits":
+                    return 201, create_habit(db, parse_body(body), self.user_id)
+                elif route == "streak":
+                    return 200, command_streak(db, argparse.Namespace(habit=parts[1], user=self.user_id))
+                elif route == "checkoffs":
+                    return 201, command_checkout(db, argparse.Namespace(habit=parts[1], at=parse_body(body).get("at"), user=self.user_id))
+                return 200, command_longest(db, argparse.Namespace(limit=parse_int(query.get("limit")), user=self.user_id))
+        except UnknownHabitError as error:
+            raise HttpError(404, str(error))
+        except CommandError as error:
+            raise HttpError(400, str(error))
+
+
+    async def respond(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Reads the requests of a client connection and writes the responses, as long as the client keeps the connection alive.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), keep_alive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, result = await loop.run_in_executor(self.executor, self.handle, method, target, body)
+                except HttpError as error:
+                    status, result = error.status, {"error": str(error)}
+                except sqlite3.Error as error:
+                    status, result = 500, {"error": f"database error: {error}"}
+
+                # answer any other error of a request with 500 instead of closing the connection without a response:
+                except Exception as error:
+                    status, result = 500, {"error": f"internal error: {type(error).__name__}"}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(build_response(status, result, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HttpError as error:
+            writer.write(build_response(error.status, {"error": str(error)}, False))
+        finally:
+            writer.close()
+
+
+    async def serve(self, host=default_host, port=default_port, ready=None) -> None:
+        """
+        Serves requests on host and port until the task is cancelled. The event ready is set once the server is listening.
+        """
+        server = await asyncio.start_server(self.respond, host, port, backlog=1024)
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+
+    def close(self) -> None:
+        """
+        Stops the worker threads and closes the connections of the ConnectionManager.
+        """
+        self.executor.shutdown(wait=True)
+        self.manager.close()
+
+
+async def read_request(reader: asyncio.StreamReader):
+    """This function reads a HTTP/1.1 request from a client connection.
+
+    Args:
+        reader (asyncio.StreamReader): stream of the client connection
+
+    Raises:
+        HttpError: if the request is malformed, the Content-Length is invalid or the body is too large
+
+    Returns:
+        tuple: method, target, headers and body of the request (method, target, {name: value}, body) or None if the client closed the connection
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Malformed request line.")
+
+    # read the headers until the empty line:
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    # read the body with the length given by the header Content-Length:
+    length = parse_int(headers.get("content-length")) or 0
+    if length < 0:
+        raise HttpError(400, "The Content-Length can't be negative.")
+    if length > max_body_size:
+        raise HttpError(413, f"The body is larger than {max_body_size} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def build_response(status: int, result, keep_alive: bool) -> bytes:
+    """This function builds a HTTP/1.1 response with a JSON body.
+
+    Args:
+        status (int): status code of the response
+        result (dict): body of the response, which is written as JSON
+        keep_alive (bool): if True: the connection is kept open for the next request
+
+    Returns:
+        bytes: response with status line, headers and body
+    """
+    body = json.dumps(result).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+def parse_body(body: bytes) -> dict:
+    """This function parses the JSON body of a request, an empty body is an empty object.
+
+    Raises:
+        HttpError: if the body isn't a JSON object
+    """
+    if not body:
+        return {}
+    try:
+        result = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise HttpError(400, "The body isn't valid JSON.")
+    if not isinstance(result, dict):
+        raise HttpError(400, "The body has to be a JSON object.")
+    return result
+
+
+def parse_int(value):
+    """This function parses an integer parameter of a request, None stays None.
+
+    Raises:
+        HttpError: if the value isn't an integer
+    """
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HttpError(400, f"{value!r} isn't an integer.")
+
+
+def create_habit(db: sqlite3.Connection, data: dict, user_id=None) -> dict:
+    """This function creates a habit from the body of a request.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+        data (dict): name, periodicity and description (optional) of the habit
+        user_id (int, optional): user of the habit (multi-tenant databases only). Defaults to None (user 0).
+
+    Raises:
+        HttpError: if the name is empty or the periodicity is unknown
+
+    Returns:
+        dict: id and name of the stored habit
+    """
+    name = str(data.get("name") or "").strip()
+    if not name:
+        raise HttpError(400, "The habit needs a name.")
+    if data.get("periodicity") not in choice_for_periodicity:
+        raise HttpError(400, f"The periodicity has to be one of {choice_for_periodicity}.")
+    habit = Habit(db, habit_name=name, habit_periodicity=data["periodicity"], habit_description=str(data.get("description") or ""),
+        habit_created=datetime.now().replace(microsecond=0), user_id=user_id)
+    habit.save()
+    return {"habit_id": habit.habit_id, "habit_name": name, "periodicity": data["periodicity"]}
+
+
+def run_server(name="main.db", host=default_host, port=default_port, workers=default_workers, user_id=None) -> None:
+    """This function starts the server and serves requests until it is stopped with Ctrl+C.
+
+    Args:
+        name (str, optional): Name of the Database. Defaults to "main.db".
+        host (str, optional): address the server listens on. Defaults to default_host.
+        port (int, optional): port the server listens on. Defaults to default_port.
+        workers (int, optional): number of worker threads and read-only connections. Defaults to default_workers.
+        user_id (int, optional): serve only the habits of this user (multi-tenant databases only). Defaults to None (all habits).
+    """
+    server = HabitServer(name, workers, user_id=user_id)
+    print(f"Serving {name} on http://{host}:{port} with {workers} workers, stop with Ctrl+C.")
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
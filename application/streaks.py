@@ -0,0 +1,222 @@
+from collections import namedtuple
+from datetime import timedelta, datetime
+
+# define the timespan in hours which has to be between two checkoffs and assign it with default 4 hours
+delta_hour_daily = delta_hour_weekly = delta_hour_monthly = 4
+
+
+class StreakResult(namedtuple("StreakResult", ["count", "status", "current", "maximum", "last_checkoff", "periodicity"])):
+    """A class to represent the streak of a habit, calculated once and passed to the printers and the CLI.
+    The first two items are the streak and the status calculation_of_streaks returned as tuple before (count, status),
+    so result[0] and result[1] keep working.
+
+    Attributes
+    ----------
+    count : int
+        maximum streak or current streak, depending on the bool_max_count the result was calculated with
+    status : int
+        status of the last checkoff (1: in time, 2: checked off already, 3: broken the habit, -1: no checkoff so far)
+    current : int
+        current streak
+    maximum : int
+        maximum streak
+    last_checkoff : int or str
+        last checkoff as stored in the database, None if there is no checkoff so far
+    periodicity : str
+        periodicity of the habit
+    """
+    __slots__ = ()
+
+
+class Periodicity:
+    """A class to represent a periodicity of habits. Every checkoff is mapped to the integer ordinal of its period, so checkoffs
+    in consecutive periods have consecutive ordinals and a streak is a run of consecutive ordinals. A period is length days
+    or length months, counted from 0001-01-01 (date.toordinal) or from January of the year 0 and shifted by offset,
+    e.g. weeks starting on monday are 7 days shifted by -1 (the ordinal 1 is a monday).
+
+    Attributes
+    ----------
+    name : str
+        name of the periodicity
+    unit : str
+        unit of the periods ("day" or "month")
+    length : int
+        number of units of a period
+    offset : int
+        number of units the periods are shifted by
+    delta_hours : int
+        default timespan in hours which has to be between the checkoffs of consecutive periods
+    ordinal : function
+        returns the ordinal of the period of a checkoff in datetime-format
+
+    Methods
+    -------
+    step(starting_date, checkoff, count, status, delta_hours):
+        applies a single checkoff to the streak of a habit.
+    days():
+        returns the average number of days of a period.
+    """
+    __slots__ = ("name", "unit", "length", "offset", "delta_hours", "ordinal")
+
+    def __init__(self, name: str, unit: str, length=1, offset=0, delta_hours=4):
+        """Constructs all the necessary attributes for the Periodicity object.
+
+        Args:
+            name (str): name of the periodicity
+            unit (str): unit of the periods ("day" or "month")
+            length (int, optional): number of units of a period. Defaults to 1.
+            offset (int, optional): number of units the periods are shifted by. Defaults to 0.
+            delta_hours (int, optional): timespan in hours between the checkoffs of consecutive periods. Defaults to 4.
+
+        Raises:
+            ValueError: if the unit is unknown or the length isn't positive
+        """
+        if unit not in ("day", "month"):
+            raise ValueError(f"Unknown unit {unit!r} of the periodicity {name}, choose day or month.")
+        if length < 1:
+            raise ValueError(f"The length of the periodicity {name} has to be at least 1.")
+        self.name = name
+        self.unit = unit
+        self.length = length
+        self.offset = offset
+        self.delta_hours = delta_hours
+
+        # define the ordinal once, so mapping a checkoff needs no branch on the unit:
+        if unit == "day":
+            self.ordinal = lambda moment: (moment.toordinal() + offset) // length
+        else:
+            self.ordinal = lambda moment: (moment.year * 12 + moment.month - 1 + offset) // length
+
+
+    def step(self, starting_date: datetime, checkoff: datetime, count: int, status: int, delta_hours=None) -> tuple:
+        """Applies a single checkoff to the streak of a habit.
+            The checkoff is considered in time if it is in the period after the last counted checkoff and a timespan greater
+            than delta_hours is between the checkoffs (status=1). If the checkoffs happen in the same period or less than delta_hours
+            apart, the habit is considered to be already checked off in the respective timespan (status=2). If a period was
+            skipped, the habit is considered to be broken (status=3). An earlier checkoff doesn't change the streak.
+
+        Args:
+            starting_date (datetime): last checkoff that counted for the streak, None if there is no checkoff so far
+            checkoff (datetime): next checkoff of the habit
+            count (int): current streak before the checkoff
+            status (int): status before the checkoff
+            delta_hours (int, optional): Time between the respective checkoffs to be considered as a streak in hours.
+                Defaults to the delta_hours of the periodicity.
+
+        Returns:
+            tuple: starting_date, current streak and status after the checkoff (starting_date, count, status)
+        """
+
+        # the first checkoff of a habit always starts a new streak:
+        if starting_date is None:
+            return checkoff, 1, 1
+
+        # define the number of periods between the last counted and the next checkoff:
+        gap = self.ordinal(checkoff) - self.ordinal(starting_date)
+
+        # checks if the checkoffs are in the same period or closer than delta_hours (checked off already):
+        if gap == 0 or (gap == 1 and checkoff - starting_date < timedelta(hours=self.delta_hours if delta_hours is None else delta_hours)):
+            return starting_date, count, 2
+
+        # checks if the checkoff is in the next period (checked off in time):
+        elif gap == 1:
+            return checkoff, count + 1, 1
+
+        # checks if at least a period was skipped, therefore broke the habit:
+        elif gap > 1:
+            return checkoff, 1, 3
+
+        # else the checkoff doesn't change the streak:
+        return starting_date, count, status
+
+
+    def days(self) -> float:
+        """
+        Returns the average number of days of a period (a month has 365.25 / 12 days).
+        """
+        return float(self.length) if self.unit == "day" else self.length * 365.25 / 12
+
+
+# define the registered periodicities by name, the list of their names for the menus and commands in the order
+# of registration, the step function and the default timespan in hours of every periodicity:
+periodicities = {}
+choice_for_periodicity = []
+streak_steps = {}
+streak_delta_hours = {}
+
+
+def register_periodicity(name: str, unit: str, length=1, offset=0, delta_hours=4) -> Periodicity:
+    """This function registers a periodicity, so habits can be created with it and their streaks are calculated by its
+    period ordinals, e.g. register_periodicity("every 3 days", "day", 3). A registered periodicity is replaced.
+
+    Args:
+        name (str): name of the periodicity
+        unit (str): unit of the periods ("day" or "month")
+        length (int, optional): number of units of a period. Defaults to 1.
+        offset (int, optional): number of units the periods are shifted by. Defaults to 0.
+        delta_hours (int, optional): timespan in hours between the checkoffs of consecutive periods. Defaults to 4.
+
+    Returns:
+        Periodicity: the registered periodicity
+    """
+    periodicity = Periodicity(name, unit, length, offset, delta_hours)
+    if name not in periodicities:
+        choice_for_periodicity.append(name)
+    periodicities[name] = periodicity
+    streak_steps[name] = periodicity.step
+    streak_delta_hours[name] = delta_hours
+    return periodicity
+
+
+# register the default periodicities, weeks start on monday (the ordinal 1 of 0001-01-01 is a monday):
+register_periodicity("daily", "day", delta_hours=delta_hour_daily)
+register_periodicity("weekly", "day", 7, -1, delta_hours=delta_hour_weekly)
+register_periodicity("biweekly", "day", 14, -1)
+register_periodicity("monthly", "month", delta_hours=delta_hour_monthly)
+register_periodicity("quarterly", "month", 3)
+register_periodicity("yearly", "month", 12)
+
+# define the step functions of the periodicities daily, weekly and monthly by their former names
+step_daily, step_weekly, step_monthly = streak_steps["daily"], streak_steps["weekly"], streak_steps["monthly"]
+
+
+def fold_streak(step, checkoffs, delta_hours: int, starting_date=None, count=0, count_max=0, status=0) -> tuple:
+    """This function applies the step function of a periodicity to all checkoffs in chronological order.
+    The streak can be continued from a former result by passing its starting_date, count, count_max and status.
+
+    Args:
+        step (function): step function of the periodicity (streak_steps[periodicity])
+        checkoffs (iterable): checkoffs of the habit in datetime-format and chronological order
+        delta_hours (int): Time between the respective checkoffs to be considered as a streak in hours
+        starting_date (datetime, optional): last checkoff that counted for the streak. Defaults to None.
+        count (int, optional): current streak. Defaults to 0.
+        count_max (int, optional): maximum streak. Defaults to 0.
+        status (int, optional): current status. Defaults to 0.
+
+    Returns:
+        tuple: starting_date, current streak, maximum streak and status (starting_date, count, count_max, status)
+    """
+
+    # iterates over the checkoffs and updates the streak with every checkoff:
+    for checkoff in checkoffs:
+        starting_date, count, status = step(starting_date, checkoff, count, status, delta_hours)
+
+        # checks if current count is greater equal the maximum count, if so, update the max_count value:
+        if count >= count_max:
+            count_max = count
+
+    return starting_date, count, count_max, status
+
+
+def calculate_streak(periodicity: str, checkoffs) -> tuple:
+    """This function calculates the streak of a habit without any access to the database.
+
+    Args:
+        periodicity (str): periodicity of the habit (a registered periodicity, e.g. "daily", "weekly" or "monthly")
+        checkoffs (iterable): checkoffs of the habit in datetime-format and chronological order
+
+    Returns:
+        tuple: current streak, maximum streak and status (count, count_max, status)
+    """
+    _, count, count_max, status = fold_streak(streak_steps[periodicity], checkoffs, streak_delta_hours[periodicity])
+    return count, count_max, status
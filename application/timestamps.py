@@ -0,0 +1,104 @@
+from datetime import timedelta, datetime
+import sqlite3
+
+# define the format in which timestamps are stored as strings inside the database
+date_formatter = "%Y-%m-%d %X"
+
+# define the start of the integer timestamps. Integer timestamps are the seconds since 1970-01-01 00:00:00 of the
+# local wall clock, so they describe the same time as the strings "YYYY-MM-DD hh:mm:ss" they replace
+epoch_start = datetime(1970, 1, 1)
+
+
+def parse_checkoff(checkoff) -> datetime:
+    """This function converts a single timestamp stored inside the database into datetime-format.
+    Integer timestamps are added to epoch_start, strings are parsed with datetime.fromisoformat (much faster than strptime).
+
+    Args:
+        checkoff (int or str): timestamp as integer seconds or as string "YYYY-MM-DD hh:mm:ss"
+
+    Returns:
+        datetime: timestamp in datetime-format
+    """
+    if isinstance(checkoff, int):
+        return epoch_start + timedelta(seconds=checkoff)
+    return datetime.fromisoformat(checkoff)
+
+
+def parse_checkoffs(checkoffs) -> list:
+    """This function converts timestamps stored inside the database into datetime-format.
+
+    Args:
+        checkoffs (iterable): timestamps as integer seconds or as strings in chronological order
+
+    Returns:
+        list: timestamps in datetime-format [datetime.datetime(YYYY, MM, DD, hh, mm)]
+    """
+    return [parse_checkoff(checkoff) for checkoff in checkoffs]
+
+
+def to_epoch(timestamp) -> int:
+    """This function converts a timestamp into integer seconds since epoch_start.
+
+    Args:
+        timestamp (datetime, str or int): timestamp in datetime-format, as string "YYYY-MM-DD hh:mm:ss" or as integer seconds
+
+    Returns:
+        int: timestamp as integer seconds
+    """
+    if isinstance(timestamp, int):
+        return timestamp
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return (timestamp - epoch_start) // timedelta(seconds=1)
+
+
+def to_storage(timestamp, epoch_timestamps: bool):
+    """This function converts a timestamp into the format in which it is stored inside the database.
+
+    Args:
+        timestamp (datetime, str or int): timestamp in datetime-format, as string or as integer seconds
+        epoch_timestamps (bool): if True: the database stores integer seconds, if False: the database stores strings
+
+    Returns:
+        int or str: timestamp as integer seconds or as string "YYYY-MM-DD hh:mm:ss"
+    """
+    if epoch_timestamps:
+        return to_epoch(timestamp)
+    if isinstance(timestamp, int):
+        return str(parse_checkoff(timestamp))
+    return str(timestamp)
+
+
+def format_checkoff(checkoff) -> str:
+    """This function formats a timestamp stored inside the database as string to be printed.
+
+    Args:
+        checkoff (int or str): timestamp as integer seconds or as string "YYYY-MM-DD hh:mm:ss"
+
+    Returns:
+        str: timestamp as string "YYYY-MM-DD hh:mm:ss"
+    """
+    if isinstance(checkoff, int):
+        return str(parse_checkoff(checkoff))
+    return checkoff
+
+
+def timestamps_are_epoch(db: sqlite3.Connection) -> bool:
+    """This function checks if the connected database stores timestamps as integer seconds
+    (the column checkoff of the table habit_log is declared as INTEGER).
+    The result is remembered by connections with the attribute epoch_timestamps (CachedConnection), so the schema is only
+    read once per connection and not with every write. migrate_to_epoch_timestamps updates the remembered result.
+
+    Args:
+        db (sqlite3.Connection): Connection to Database
+
+    Returns:
+        bool: True if timestamps are stored as integer seconds, False if they are stored as strings
+    """
+    epoch_timestamps = getattr(db, "epoch_timestamps", None)
+    if epoch_timestamps is None:
+        columns = db.execute("PRAGMA table_info(habit_log)").fetchall()
+        epoch_timestamps = any(column[1] == "checkoff" and column[2].upper() == "INTEGER" for column in columns)
+        if hasattr(db, "epoch_timestamps"):
+            db.epoch_timestamps = epoch_timestamps
+    return epoch_timestamps
@@ -0,0 +1,103 @@
+from .streaks import periodicities, streak_steps, fold_streak
+from .timestamps import parse_checkoffs
+
+# numpy is optional, the vectorized engine is only available if it is installed:
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# define the number of seconds of a day and the ordinals of 1970-01-01 as day (date.toordinal) and as month (since the year 0):
+seconds_per_day = 86400
+epoch_day = 719163
+epoch_month = 1970 * 12
+
+
+def to_epoch_array(checkoffs) -> "np.ndarray":
+    """This function converts the checkoffs stored inside the database into an int64 array
+    of seconds since 1970-01-01 (in the local time the checkoffs were stored with).
+    Checkoffs stored as integer seconds are used directly, checkoffs stored as strings are parsed by numpy.
+
+    Args:
+        checkoffs (list): checkoffs as integer seconds or as strings in chronological order ["YYYY-MM-DD hh:mm:ss"]
+
+    Returns:
+        np.ndarray: checkoffs as int64 seconds
+    """
+    if isinstance(checkoffs[0], int):
+        return np.array(checkoffs, dtype=np.int64)
+    return np.array(checkoffs, dtype="datetime64[s]").astype(np.int64)
+
+
+def period_ordinals(periodicity: str, seconds: "np.ndarray") -> "np.ndarray":
+    """This function maps the checkoffs to the ordinal of their period, so checkoffs in consecutive periods have
+    consecutive ordinals. The ordinals are the same as the ordinals of the registered Periodicity.
+
+    Args:
+        periodicity (str): periodicity of the habit (a registered periodicity, e.g. "daily", "weekly" or "monthly")
+        seconds (np.ndarray): checkoffs as int64 seconds
+
+    Returns:
+        np.ndarray: ordinal of the period of every checkoff
+    """
+    period = periodicities[periodicity]
+    if period.unit == "day":
+        units = seconds // seconds_per_day + epoch_day
+    else:
+        units = seconds.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64) + epoch_month
+    return (units + period.offset) // period.length
+
+
+def fold_streak_vectorized(periodicity: str, checkoffs: list, delta_hours: int) -> tuple:
+    """This function calculates the streak of a habit with array operations instead of a loop over the checkoffs.
+    Every period of the habit counts with its first checkoff, further checkoffs of the period are already checked off (status=2).
+    A period following the former period continues the streak (status=1), a gap of periods breaks the habit (status=3).
+    The streaks are the runs of consecutive period ordinals.
+
+    If the first checkoff of a period is less than delta_hours after the first checkoff of the former period, the step functions
+    compare the following checkoffs with the former period. These rare histories as well as unordered checkoffs are calculated
+    with the function fold_streak, so the result is the same as with the step functions.
+
+    Args:
+        periodicity (str): periodicity of the habit (a registered periodicity)
+        checkoffs (list): checkoffs as integer seconds or as strings in chronological order ["YYYY-MM-DD hh:mm:ss"]
+        delta_hours (int): Time between the respective checkoffs to be considered as a streak in hours
+
+    Returns:
+        tuple: starting_date, current streak, maximum streak and status (starting_date, count, count_max, status)
+    """
+
+    # if there is no checkoff, there is no streak:
+    if len(checkoffs) == 0:
+        return None, 0, 0, 0
+
+    # convert the checkoffs once to seconds and map them to the ordinal of their period:
+    seconds = to_epoch_array(checkoffs)
+    ordinals = period_ordinals(periodicity, seconds)
+
+    # define the mask of the first checkoff of every period and the gaps between the periods:
+    first_of_period = np.empty(len(ordinals), dtype=bool)
+    first_of_period[0] = True
+    np.not_equal(ordinals[1:], ordinals[:-1], out=first_of_period[1:])
+    period_seconds = seconds[first_of_period]
+    period_gaps = np.diff(ordinals[first_of_period])
+
+    # use the step functions, if checkoffs are unordered or a period starts less than delta_hours after the former period:
+    if np.any(np.diff(seconds) < 0) or np.any((period_gaps == 1) & (np.diff(period_seconds) < delta_hours * 3600)):
+        return fold_streak(streak_steps[periodicity], parse_checkoffs(checkoffs), delta_hours)
+
+    # define the indexes of the periods which start a new streak and the length of every streak:
+    run_starts = np.flatnonzero(period_gaps != 1) + 1
+    run_lengths = np.diff(np.concatenate(([0], run_starts, [len(period_seconds)])))
+
+    # define the status of the last checkoff (already checked off, first checkoff, in time or broken the habit):
+    if not first_of_period[-1]:
+        status = 2
+    elif len(period_gaps) == 0 or period_gaps[-1] == 1:
+        status = 1
+    else:
+        status = 3
+
+    # the last counted checkoff is the first checkoff of the last period:
+    starting_date = period_seconds[-1].astype("datetime64[s]").item()
+    return starting_date, int(run_lengths[-1]), int(run_lengths.max()), status
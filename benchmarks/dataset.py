@@ -0,0 +1,152 @@
+"""Seeded generator of synthetic habit tracking databases for benchmarks.
+
+    python benchmarks/dataset.py synthetic.db --habits 1000 --years 3 --seed 7
+
+The same arguments (and seed) always generate the same habits and checkoffs.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+_relative_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(_relative_path)
+
+from application.database import create_connection
+from application.timestamps import to_storage, timestamps_are_epoch
+from application.cache import invalidate
+
+# define the default share of the periodicities, the end of the history and the rows written per executemany:
+default_mix = {"daily": 0.6, "weekly": 0.3, "monthly": 0.1}
+default_end = datetime(2022, 1, 1)
+chunk_size = 50000
+
+
+def period_starts(periodicity: str, start: datetime, end: datetime):
+    """This function yields the start of every period (day, ISO week or month) from start to end.
+    """
+    if periodicity == "daily":
+        period = start.replace(hour=0, minute=0, second=0)
+    elif periodicity == "weekly":
+        period = (start - timedelta(days=start.weekday())).replace(hour=0, minute=0, second=0)
+    else:
+        period = start.replace(day=1, hour=0, minute=0, second=0)
+    while period < end:
+        yield period
+        if periodicity == "daily":
+            period += timedelta(days=1)
+        elif periodicity == "weekly":
+            period += timedelta(days=7)
+        else:
+            period = (period + timedelta(days=32)).replace(day=1)
+
+
+def period_length(periodicity: str, period: datetime) -> int:
+    """This function returns the length of the period starting at period in seconds.
+    """
+    if periodicity == "daily":
+        return 86400
+    if periodicity == "weekly":
+        return 7 * 86400
+    return ((period + timedelta(days=32)).replace(day=1) - period) // timedelta(seconds=1)
+
+
+def expected_rows_per_habit(mix: dict, years: float, duplicate_rate: float, gap_rate: float) -> float:
+    """This function estimates the number of checkoffs of a habit, to choose the number of habits for a number of rows.
+    """
+    periods = {"daily": 365.25, "weekly": 52.18, "monthly": 12}
+    total = sum(mix.values())
+    return sum(share / total * periods[periodicity] * years for periodicity, share in mix.items()) * (1 - gap_rate) * (1 + duplicate_rate)
+
+
+def generate_checkoffs(rng: random.Random, periodicity: str, start: datetime, end: datetime, duplicate_rate: float, gap_rate: float):
+    """This function yields the checkoffs of a habit in chronological order. Every period is skipped with the probability gap_rate
+    (which breaks the streak), otherwise it is checked off once and a second time with the probability duplicate_rate.
+    """
+    for period in period_starts(periodicity, start, end):
+        if rng.random() < gap_rate:
+            continue
+        length = period_length(periodicity, period)
+        offsets = [rng.randrange(length)]
+        if rng.random() < duplicate_rate:
+            offsets.append(rng.randrange(length))
+        for offset in sorted(offsets):
+            checkoff = period + timedelta(seconds=offset)
+            if checkoff < end:
+                yield checkoff
+
+
+def generate_database(name: str, habits=100, mix=None, years=1.0, duplicate_rate=0.1, gap_rate=0.1, seed=0,
+        end=default_end, epoch_timestamps=False) -> dict:
+    """This function generates a database with synthetic habits and checkoffs. The habits and checkoffs only depend on the arguments.
+
+    Args:
+        name (str): name of the database, an existing database is extended
+        habits (int, optional): number of habits. Defaults to 100.
+        mix (dict, optional): share of every periodicity {"daily": 0.6, "weekly": 0.3, "monthly": 0.1}. Defaults to default_mix.
+        years (float, optional): years of history of every habit. Defaults to 1.0.
+        duplicate_rate (float, optional): probability of a second checkoff within a period. Defaults to 0.1.
+        gap_rate (float, optional): probability of a period without checkoff. Defaults to 0.1.
+        seed (int, optional): seed of the random numbers. Defaults to 0.
+        end (datetime, optional): end of the history. Defaults to default_end.
+        epoch_timestamps (bool, optional): if True: timestamps are stored as integer seconds. Defaults to False.
+
+    Returns:
+        dict: number of habits and checkoffs, duration and rows per second of the generation
+    """
+    mix = mix or default_mix
+    rng = random.Random(seed)
+    periodicities, weights = list(mix), list(mix.values())
+    start = end - timedelta(days=round(365.25 * years))
+    begin = time.perf_counter()
+
+    db = create_connection(name, epoch_timestamps=epoch_timestamps, query_cache_size=0)
+    epoch_timestamps = timestamps_are_epoch(db)
+    first_id = (db.execute("SELECT MAX(id) FROM habits").fetchone()[0] or 0) + 1
+    cur = db.cursor()
+    cur.execute("BEGIN")
+
+    # store the habits with their periodicity:
+    habit_rows = [(habit_id, f"Habit {habit_id}", rng.choices(periodicities, weights)[0], "", to_storage(start, epoch_timestamps))
+        for habit_id in range(first_id, first_id + habits)]
+    cur.executemany("INSERT INTO habits (id, name, periodicity, description, created) VALUES (?, ?, ?, ?, ?)", habit_rows)
+
+    # store the checkoffs of every habit in chunks:
+    rows = []
+    checkoffs = 0
+    for habit_id, habit_name, periodicity, _, _ in habit_rows:
+        for checkoff in generate_checkoffs(rng, periodicity, start, end, duplicate_rate, gap_rate):
+            rows.append((habit_id, habit_name, to_storage(checkoff, epoch_timestamps)))
+        if len(rows) >= chunk_size:
+            cur.executemany("INSERT INTO habit_log (habit_id, habit_name, checkoff) VALUES (?, ?, ?)", rows)
+            checkoffs += len(rows)
+            rows = []
+    cur.executemany("INSERT INTO habit_log (habit_id, habit_name, checkoff) VALUES (?, ?, ?)", rows)
+    checkoffs += len(rows)
+    db.commit()
+    invalidate(db, "habits", "habit_log")
+    db.close()
+
+    seconds = time.perf_counter() - begin
+    return {"habits": habits, "checkoffs": checkoffs, "seconds": round(seconds, 3),
+        "rows_per_second": round((habits + checkoffs) / seconds, 1) if seconds > 0 else 0.0}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a database with synthetic habits and checkoffs.")
+    parser.add_argument("name", help="name of the database")
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--daily", type=float, default=default_mix["daily"], help="share of daily habits")
+    parser.add_argument("--weekly", type=float, default=default_mix["weekly"], help="share of weekly habits")
+    parser.add_argument("--monthly", type=float, default=default_mix["monthly"], help="share of monthly habits")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1, help="probability of a second checkoff within a period")
+    parser.add_argument("--gap-rate", type=float, default=0.1, help="probability of a period without checkoff")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--epoch-timestamps", action="store_true", help="store timestamps as integer seconds")
+    args = parser.parse_args()
+    print(json.dumps(generate_database(args.name, args.habits, {"daily": args.daily, "weekly": args.weekly, "monthly": args.monthly},
+        args.years, args.duplicate_rate, args.gap_rate, args.seed, epoch_timestamps=args.epoch_timestamps)))
@@ -0,0 +1,102 @@
+"""Load generator for the HTTP server of the habit tracking application (python main.py serve).
+
+Opens a number of concurrent keep-alive connections, sends GET requests to the given paths in turns
+and prints the latency percentiles (p50, p99) and the throughput as JSON.
+
+    python benchmarks/loadgen.py --url http://127.0.0.1:8080 --concurrency 200 --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+# define the paths requested by default (habits, a streak and the longest streak of all):
+default_paths = ["/habits", "/habits/1/streak", "/longest?limit=3"]
+
+
+def percentile(values: list, share: float) -> float:
+    """This function returns the percentile of sorted values (nearest rank).
+
+    Args:
+        values (list): sorted values
+        share (float): percentile between 0 and 1 (e.g. 0.99)
+
+    Returns:
+        float: value of the percentile, 0.0 if there are no values
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(share * len(values)) - 1))]
+
+
+async def client(host: str, port: int, paths: list, requests: int, latencies: list, errors: list) -> None:
+    """This function sends requests over a single keep-alive connection and stores the latency of every response in seconds.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for number in range(requests):
+            path = paths[number % len(paths)]
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+
+            # read the status line, the headers and the body of the response:
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(url: str, paths: list, concurrency: int, requests: int) -> dict:
+    """This function runs the clients concurrently and returns the measured latencies and throughput.
+
+    Args:
+        url (str): address of the server (http://host:port)
+        paths (list): paths which are requested in turns
+        concurrency (int): number of concurrent connections
+        requests (int): total number of requests
+
+    Returns:
+        dict: number of requests and errors, duration, requests per second and latencies in milliseconds (p50, p99, max)
+    """
+    address = urlsplit(url)
+    latencies, errors = [], []
+    per_client = [requests // concurrency + (1 if number < requests % concurrency else 0) for number in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(address.hostname, address.port or 80, paths, count, latencies, errors)
+        for count in per_client if count))
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(len(latencies) / seconds, 1) if seconds > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the latency of the HTTP server of the habit tracking application.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="address of the server")
+    parser.add_argument("--concurrency", type=int, default=100, help="number of concurrent connections")
+    parser.add_argument("--requests", type=int, default=10000, help="total number of requests")
+    parser.add_argument("--path", action="append", dest="paths", help="path to request (can be repeated)")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.url, args.paths or default_paths, args.concurrency, args.requests)), indent=2))
@@ -0,0 +1,174 @@
+"""Benchmark runner of the analytics and database functions of the habit tracking application.
+
+Generates a synthetic database for every size (number of checkoffs), times every entry point and writes the results
+as JSON, so the results of two commits can be compared:
+
+    python benchmarks/run.py --sizes 1000 10000 100000 --output results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_relative_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(_relative_path)
+
+from dataset import generate_database, expected_rows_per_habit, default_mix, default_end
+from application.database import create_connection, get_all_habits, get_all_log_data, get_all_checkoffs
+from application.analytics import (
+    calculation_of_streaks,
+    calculate_streaks_of_all,
+    calculate_longest_streak_of_all,
+    calculate_completion_rates,
+    calculate_heatmap,
+    calculate_leaderboard,
+    set_streak_engine,
+)
+
+# define the default sizes (number of checkoffs) and the number of habits whose streak is calculated one by one:
+default_sizes = [1000, 10000, 100000]
+sample_habits = 50
+
+
+def measure(function, repeat: int) -> float:
+    """This function returns the shortest duration of repeat calls of the function in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def entry_points(db, habit_ids: list) -> dict:
+    """This function returns the benchmarked entry points as functions without arguments.
+    The streaks of single habits are calculated for a sample of habits, once from all checkoffs (cold) and once from the
+    stored streak states (warm). Completion rates and heatmaps are calculated for the last year of the generated checkoffs.
+    """
+    start, end = default_end - timedelta(days=365), default_end
+
+    def streaks_cold():
+        db.execute("DELETE FROM habit_streak")
+        db.commit()
+        for habit_id in habit_ids:
+            calculation_of_streaks(db, habit_id)
+
+    def streaks_warm():
+        for habit_id in habit_ids:
+            calculation_of_streaks(db, habit_id)
+
+    points = {
+        "get_all_habits": lambda: get_all_habits(db),
+        "get_all_log_data": lambda: [get_all_log_data(db, habit_id) for habit_id in habit_ids],
+        "get_all_checkoffs": lambda: [get_all_checkoffs(db, habit_id) for habit_id in habit_ids],
+        "calculation_of_streaks_cold": streaks_cold,
+        "calculation_of_streaks_warm": streaks_warm,
+        "calculate_streaks_of_all": lambda: calculate_streaks_of_all(db),
+        "calculate_longest_streak_of_all": lambda: calculate_longest_streak_of_all(db),
+        "calculate_leaderboard": lambda: calculate_leaderboard(db, 10),
+        "calculate_completion_rates": lambda: calculate_completion_rates(db, start, end),
+        "calculate_heatmap": lambda: calculate_heatmap(db, start, end),
+    }
+
+    # the printers are only benchmarked if beautifultable is installed, their output is discarded:
+    try:
+        from application.printers import print_all_habits, print_longest_streak_of_all, format_heatmap
+    except ImportError:
+        return points
+
+    def printed(function):
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                function(db)
+        return run
+
+    points["print_all_habits"] = printed(print_all_habits)
+    points["print_longest_streak_of_all"] = printed(print_longest_streak_of_all)
+
+    # the heatmaps of all habits are calculated and formatted as by the printer:
+    def heatmaps():
+        days, rows = calculate_heatmap(db, start, end)
+        return [format_heatmap(days, checkoffs) for _, _, checkoffs in rows]
+
+    points["format_heatmap_of_all"] = heatmaps
+    return points
+
+
+def git_commit() -> str:
+    """This function returns the commit of the working tree or "" if it isn't a git repository.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=_relative_path, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run(sizes: list, years: float, duplicate_rate: float, gap_rate: float, seed: int, repeat: int, engine: str,
+        epoch_timestamps: bool, directory: str) -> dict:
+    """This function generates a database for every size and times every entry point.
+
+    Returns:
+        dict: settings of the run and results [{"size": ..., "checkoffs": ..., "entry_point": ..., "seconds": ...}]
+    """
+    set_streak_engine(engine)
+    results = []
+    for size in sizes:
+        name = os.path.join(directory, f"benchmark_{size}.db")
+        if os.path.exists(name):
+            os.remove(name)
+
+        # generate the database with the number of habits, which gives about size checkoffs:
+        habits = max(1, round(size / expected_rows_per_habit(default_mix, years, duplicate_rate, gap_rate)))
+        generated = generate_database(name, habits, default_mix, years, duplicate_rate, gap_rate, seed, epoch_timestamps=epoch_timestamps)
+        results.append({"size": size, "habits": habits, "checkoffs": generated["checkoffs"], "entry_point": "generate_database",
+            "seconds": generated["seconds"]})
+
+        # time the entry points without query cache, so every call reads the database:
+        db = create_connection(name, query_cache_size=0)
+        habit_ids = [row[0] for row in db.execute("SELECT id FROM habits ORDER BY id LIMIT ?", [sample_habits])]
+        for entry_point, function in entry_points(db, habit_ids).items():
+            results.append({"size": size, "habits": habits, "checkoffs": generated["checkoffs"], "entry_point": entry_point,
+                "seconds": round(measure(function, repeat), 6)})
+        db.close()
+        os.remove(name)
+
+    return {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": {"years": years, "duplicate_rate": duplicate_rate, "gap_rate": gap_rate, "seed": seed, "repeat": repeat,
+            "engine": engine, "epoch_timestamps": epoch_timestamps, "sample_habits": sample_habits},
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analytics and database functions with synthetic databases.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes, help="numbers of checkoffs (e.g. 1000 ... 10000000)")
+    parser.add_argument("--years", type=float, default=2.0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--gap-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="the shortest of repeat runs is reported")
+    parser.add_argument("--engine", default="python", help="streak engine (python or numpy)")
+    parser.add_argument("--epoch-timestamps", action="store_true", help="store timestamps as integer seconds")
+    parser.add_argument("--directory", default=None, help="directory of the generated databases (default: temporary directory)")
+    parser.add_argument("--output", default=None, help="file the JSON results are written to (default: stdout)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        report = run(args.sizes, args.years, args.duplicate_rate, args.gap_rate, args.seed, args.repeat, args.engine,
+            args.epoch_timestamps, args.directory or directory)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
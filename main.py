@@ -18,13 +18,52 @@
 # - printers.py     In this module the print functions are initiated, which         #
 #                   provide for a clear arranged output in the console.             #
 # - default.py      Provides default data for habits and habit logs                 #
+# - streaks.py      This module contains the pure functions to calculate streaks,   #
+#                   which don't access the database.                                #
+# - vectorized.py   Optional engine to calculate streaks with numpy arrays.         #
+# - timestamps.py   Functions to convert timestamps between the formats in which    #
+#                   they are stored, calculated and printed.                        #
+# - cache.py        Cache of query results for the functions of database.py.        #
+# - catalog.py      Catalog of the habits shown in the menus of the CLI.            #
+# - importer.py     Bulk import of habits and checkoffs from CSV or JSONL files.    #
+# - connection.py   Connection manager with a WAL writer and a pool of readers.     #
+# - commands.py     Headless commands with JSON output for scripts and cron jobs.   #
+# - migrations.py   Versioned migrations of the schema of the database.             #
+# - server.py       HTTP server with JSON endpoints for habits and streaks.         #
+# - parallel.py     Calculation of the streaks of all habits with worker processes. #
+# - instrumentation.py  Opt-in counters of SQL statements, calls and                #
+#                       durations per action (HABIT_PROFILE, --profile).            #
+# - records.py      Immutable records of habits and checkoffs (tuples with slots).  #
+# - repository.py   Reads habits and checkoffs as records in bulk or as a stream.   #
 #####################################################################################
 
 
-from application.cli import cli
-from application.database import create_connection
+import sys
+from application.commands import build_parser, run_command
 
-# if current file is this one, create a connection to the database and start the cli:
+# if current file is this one, run the given command or start the interactive cli with the connection manager:
 if __name__ == "__main__":
-    db = create_connection()
-    cli(db)
+    args = build_parser().parse_args()
+
+    # record the SQL statements and the calls of the database and analytics functions, if requested:
+    if args.profile:
+        from application.instrumentation import enable
+        enable(args.profile)
+
+    # serve the habits over HTTP with the options which were given:
+    if args.command == "serve":
+        from application.server import run_server
+        run_server(args.db, user_id=args.user,
+            **{option: getattr(args, option) for option in ("host", "port", "workers") if getattr(args, option) is not None})
+        sys.exit(0)
+    if args.command is not None:
+        sys.exit(run_command(args))
+
+    # the interactive cli is only imported without a command, so commands don't load questionary and beautifultable:
+    from application.cli import cli
+    from application.connection import ConnectionManager
+    manager = ConnectionManager(args.db)
+    try:
+        cli(manager)
+    finally:
+        manager.close()
@@ -5,6 +5,9 @@ sys.path.append(_relative_path)
 
 from test_database_setup import TestApplication
 import unittest
+import multiprocessing
+import io
+from contextlib import redirect_stdout
 from application.analytics import (
     convert_date_and_time_for_calculation,
     calc_streak_daily,
@@ -12,7 +15,23 @@ from application.analytics import (
     calc_streak_monthly,
     calculation_of_streaks,
     calculate_longest_streak_of_all,
+    calculate_streaks_of_all,
+    rebuild_streak_state,
+    set_streak_engine,
+    calculation_of_streaks_between,
+    calculation_of_streaks_as_of,
+    calculate_streaks_of_all_between,
+    fold_checkoffs,
+    iter_running_streaks,
+    refresh_streak_history,
+    count_periods,
+    calculate_completion_rates,
+    calculate_heatmap,
+    calculate_leaderboard,
 )
+from application import vectorized
+from application.parallel import calculate_streaks_of_all_parallel, calculate_longest_streak_of_all_parallel, habit_chunks
+from application.commands import build_parser, command_checkout, command_list, command_history, command_longest, UnknownHabitError
 from application.database import (
     create_connection,
     get_all_habits,
@@ -21,9 +40,27 @@ from application.database import (
     get_habit_name,
     get_periods,
     get_all_log_data,
+    get_all_checkoffs,
+    get_periodicity_and_checkoffs,
+    get_fleet_statistics,
+    iter_log_data,
+    iter_checkoffs,
+    iter_periodicity_and_checkoffs,
+    iter_all_checkoffs,
+    iter_checkoffs_between,
+    iter_streak_history,
 )
+from application.streaks import StreakResult, calculate_streak, periodicities, register_periodicity, choice_for_periodicity, streak_steps, streak_delta_hours
+from application.migrations import migrate, get_schema_version, schema_version, is_multi_tenant
+from application.timestamps import timestamps_are_epoch, format_checkoff
+from application.habit import Habit, Log
 from application.cli import show_habit_names_in_cli
-from datetime import datetime
+from application.printers import format_heatmap, print_longest_streak_of_given_habit
+from collections import Counter
+from datetime import datetime, date, timedelta
+import sqlite3
+import tempfile
+import tracemalloc
 
 # setup the test database:
 TestApplication.setUp(unittest.TestCase)
@@ -113,6 +150,58 @@ class TestAnalyze(TestApplication):
             ],
         )
 
+    def test_log_order_and_index(self):
+        """Test that the habit log is read in chronological order through the index on (habit_id, checkoff).
+        """
+        # insert a checkoff that is older than all other checkoffs of the habit:
+        self.db.execute("INSERT INTO habit_log VALUES (NULL, 4, 'Work Out', '2021-11-01 08:00:00')")
+        self.db.commit()
+
+        # checks if the late inserted checkoff is returned first:
+        self.assertEqual(get_all_log_data(self.db, 4)[0][3], "2021-11-01 08:00:00")
+        self.assertEqual(get_all_checkoffs(self.db, 4)[0], "2021-11-01 08:00:00")
+        self.assertEqual(get_all_checkoffs(self.db, 4), sorted(get_all_checkoffs(self.db, 4)))
+
+        # checks if the query of the checkoffs is answered by the index only:
+        plan = self.db.execute(
+            "EXPLAIN QUERY PLAN SELECT checkoff FROM habit_log WHERE habit_id=? ORDER BY checkoff", [4]).fetchall()
+        self.assertIn("COVERING INDEX idx_habit_log_habit_checkoff", plan[0][3])
+
+    def test_schema_migrations(self):
+        """Test that only pending migrations are applied and a current database isn't changed.
+        """
+        # checks if a current database only reads its version:
+        self.assertEqual(get_schema_version(self.db), schema_version)
+        statements = []
+        self.db.set_trace_callback(statements.append)
+        self.assertEqual(migrate(self.db), 0)
+        self.db.set_trace_callback(None)
+        self.assertEqual(statements, ["PRAGMA user_version"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, "UTestLegacy.db")
+
+            # create a database like the ones created before the migrations were introduced (version 0):
+            legacy = sqlite3.connect(name)
+            legacy.execute("CREATE TABLE habits (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, periodicity TEXT, description TEXT, created TEXT, UNIQUE(id))")
+            legacy.execute("CREATE TABLE habit_log (log_id INTEGER PRIMARY KEY AUTOINCREMENT, habit_id INTEGER, habit_name TEXT, checkoff TEXT, UNIQUE(log_id), FOREIGN KEY (habit_id) REFERENCES habits(id))")
+            legacy.execute("INSERT INTO habits VALUES (1, 'Study', 'daily', '', '2021-11-11 00:00:00')")
+            legacy.execute("INSERT INTO habit_log VALUES (NULL, 1, 'Study', '2021-12-01 08:00:00')")
+            legacy.commit()
+
+            # checks if all migrations are applied and the data is kept:
+            db = create_connection(name)
+            self.assertEqual(get_schema_version(db), schema_version)
+            self.assertEqual(get_all_checkoffs(db, 1), ["2021-12-01 08:00:00"])
+            self.assertEqual(calculation_of_streaks(db, 1)[:2], (1, 1))
+            db.close()
+
+            # checks if a database with a newer schema is refused:
+            legacy.execute(f"PRAGMA user_version = {schema_version + 1}")
+            with self.assertRaises(ValueError):
+                migrate(legacy)
+            legacy.close()
+
     def test_calculte(self):
         """Test the module analyze with it's functions, to make sure that the functions calculate correctly.
         """
@@ -184,6 +273,20 @@ class TestAnalyze(TestApplication):
         self.assertEqual(calculation_of_streaks(self.db, 5, True)[0], calc_streak_monthly(self.db, 5, parse_date_monthly, True)[0])
 
 
+        # checks if the pure kernel calculates (count, count_max, status) without the database:
+        self.assertEqual(calculate_streak("daily", parse_date_daily_break_habit[1:]), (4, 9, 1))
+        self.assertEqual(calculate_streak("weekly", parse_date_weekly_break_habit[1:]), (2, 5, 1))
+        self.assertEqual(calculate_streak("monthly", []), (0, 0, 0))
+
+        # checks if periodicity and checkoffs are read with a single query:
+        self.assertEqual(get_periodicity_and_checkoffs(self.db, 5), ("monthly", get_all_checkoffs(self.db, 5)))
+        self.assertRaises(TypeError, get_periodicity_and_checkoffs, self.db, 99)
+
+        # checks if the result of calculation_of_streaks contains current streak, maximum streak and last checkoff:
+        streak = calculation_of_streaks(self.db, 2)
+        self.assertEqual((streak.current, streak.maximum, streak.status), (4, 9, 1))
+        self.assertEqual((streak.last_checkoff, streak.periodicity), (get_all_checkoffs(self.db, 2)[-1], "daily"))
+
         # checks the status of the checkoff:
         self.assertEqual(calculation_of_streaks(self.db, 1, False)[1], 1)
         self.assertEqual(calculation_of_streaks(self.db, 3, False)[1], 2)
@@ -198,6 +301,393 @@ class TestAnalyze(TestApplication):
             ),
         )
 
+        # checks if all habits are ranked by their maximum streak in a single pass:
+        self.assertEqual(
+            [(habit[0], habit[2]) for habit in calculate_streaks_of_all(self.db)],
+            [(1, 26), (2, 9), (3, 7), (4, 5), (5, 4)],
+        )
+        self.assertEqual(calculate_streaks_of_all(self.db)[0][3], str(datetime.fromtimestamp(1641038417)))
+
+    def test_epoch_timestamps(self):
+        """Test the migration of the test database to timestamps stored as integer seconds.
+        """
+        # calculate the streaks and ranking with timestamps stored as strings:
+        streaks_text = [calculation_of_streaks(self.db, habit_id, False)[:4] for habit_id in range(1, 6)]
+        ranking_text = calculate_streaks_of_all(self.db)
+        rates_text = calculate_completion_rates(self.db, datetime(2021, 11, 1), datetime(2022, 3, 1))
+        heatmap_text = calculate_heatmap(self.db, datetime(2021, 11, 1), datetime(2022, 3, 1))
+        self.assertFalse(timestamps_are_epoch(self.db))
+
+        # migrate the test database in place:
+        self.db.close()
+        self.db = create_connection("UTest.db", epoch_timestamps=True)
+
+        # checks if timestamps are stored as integers and are formatted as before:
+        self.assertTrue(timestamps_are_epoch(self.db))
+        self.assertEqual(type(get_all_checkoffs(self.db, 1)[0]), int)
+        self.assertEqual(format_checkoff(get_all_log_data(self.db, 1)[0][3]), "2021-12-02 14:56:34")
+        self.assertEqual(format_checkoff(get_habits_same_periods(self.db, "monthly")[0][2]), "2021-11-11 00:00:00")
+
+        # checks if streaks, ranking and converted dates are the same as before:
+        self.assertEqual([calculation_of_streaks(self.db, habit_id, False)[:4] for habit_id in range(1, 6)], streaks_text)
+        self.assertEqual(
+            [(habit[0], habit[2], format_checkoff(habit[3])) for habit in calculate_streaks_of_all(self.db)],
+            [(habit[0], habit[2], habit[3]) for habit in ranking_text])
+        self.assertIn(datetime(2021, 12, 2, 14, 56, 34), convert_date_and_time_for_calculation(self.db, 1))
+        self.assertEqual(calculate_completion_rates(self.db, datetime(2021, 11, 1), datetime(2022, 3, 1)), rates_text)
+        self.assertEqual(calculate_heatmap(self.db, datetime(2021, 11, 1), datetime(2022, 3, 1)), heatmap_text)
+
+        # checks if a new checkoff is stored as integer without reading the schema again and updates the streak state:
+        statements = []
+        self.db.set_trace_callback(statements.append)
+        Log(self.db, habit_id=1, habit_name="Study", log_date=datetime(2022, 1, 2, 12, 0, 0)).save()
+        self.db.set_trace_callback(None)
+        self.assertFalse([statement for statement in statements if "table_info" in statement])
+        self.assertEqual(get_all_checkoffs(self.db, 1)[-1], 1641124800)
+        self.assertEqual(calculation_of_streaks(self.db, 1, False)[:2], (27, 1))
+
+    def test_multi_tenant(self):
+        """Test the migration of the test database to a multi-tenant database and the queries scoped by user.
+        """
+        # calculate the ranking of the single-user database:
+        ranking = calculate_streaks_of_all(self.db)
+
+        # migrate the test database in place, the existing habits belong to the user 0:
+        self.db.close()
+        self.db = create_connection("UTest.db", multi_tenant=True)
+        self.assertTrue(is_multi_tenant(self.db))
+        self.assertEqual(calculate_streaks_of_all(self.db, 0), ranking)
+        self.assertEqual(len(get_all_habits(self.db)[0]), 5)
+
+        # store a habit of the user 7, its checkoffs are stored with the user of the habit:
+        habit = Habit(self.db, habit_name="Study", habit_periodicity="daily", user_id=7)
+        habit.save()
+        Log(self.db, habit_id=habit.habit_id, habit_name="Study", log_date=datetime(2022, 1, 1, 12, 0, 0)).save()
+        Log(self.db, habit_id=habit.habit_id, habit_name="Study", log_date=datetime(2022, 1, 2, 12, 0, 0)).save()
+        self.assertEqual(self.db.execute("SELECT DISTINCT user_id FROM habit_log WHERE habit_id=?", [habit.habit_id]).fetchall(), [(7,)])
+
+        # checks if the queries only return the habits of the user:
+        self.assertEqual(get_all_habit_name_and_id(self.db, user_id=7), [[habit.habit_id, "Study"]])
+        self.assertEqual(len(get_all_habits(self.db, 0)), 5)
+        self.assertEqual(len(get_habits_same_periods(self.db, "daily", 7)), 1)
+        self.assertEqual(calculate_longest_streak_of_all(self.db, 7), ([habit.habit_id], 2))
+        self.assertEqual(calculate_longest_streak_of_all(self.db, 0), calculate_longest_streak_of_all(self.db, None))
+
+        # checks if the queries of a single habit are scoped by the user:
+        self.assertEqual(calculation_of_streaks(self.db, habit.habit_id, user_id=7)[2:4], (2, 2))
+        self.assertEqual(get_habit_name(self.db, habit.habit_id, 7), "Study")
+        self.assertEqual(len(get_all_log_data(self.db, habit.habit_id, 7)), 2)
+        self.assertEqual(get_all_log_data(self.db, habit.habit_id, 0), [])
+        with self.assertRaises(TypeError):
+            calculation_of_streaks(self.db, habit.habit_id, user_id=0)
+        with self.assertRaises(TypeError):
+            get_periods(self.db, 1, 7)
+        with self.assertRaises(TypeError):
+            calculate_heatmap(self.db, datetime(2022, 1, 1), datetime(2022, 1, 3), 1, 7)
+
+        # checks if the rankings, completion rates and heatmaps of a range only contain the habits of the user:
+        self.assertEqual(calculate_streaks_of_all_between(self.db, datetime(2022, 1, 1), None, 7), [(habit.habit_id, "Study", 2, "2022-01-02 12:00:00")])
+        self.assertEqual(len(calculate_streaks_of_all_between(self.db, datetime(2022, 1, 1), None, 0)), 5)
+        self.assertEqual([rate[0] for rate in calculate_completion_rates(self.db, datetime(2022, 1, 1), datetime(2022, 1, 3), 7)], [habit.habit_id])
+        days, rows = calculate_heatmap(self.db, datetime(2022, 1, 1), datetime(2022, 1, 3), user_id=7)
+        self.assertEqual(rows, [(habit.habit_id, "Study", [1, 1])])
+
+        # checks if the checkoffs, ranges and histories of a habit are only read for its user:
+        self.assertEqual(get_all_checkoffs(self.db, habit.habit_id, 0), [])
+        self.assertEqual(list(iter_log_data(self.db, habit.habit_id, user_id=0)), [])
+        self.assertEqual(len(list(iter_running_streaks(self.db, habit.habit_id, 7))), 2)
+        self.assertEqual(calculation_of_streaks_as_of(self.db, habit.habit_id, datetime(2022, 1, 2), user_id=7).current, 1)
+        for function in (get_periodicity_and_checkoffs, calculation_of_streaks_between, refresh_streak_history):
+            with self.assertRaises(TypeError):
+                function(self.db, habit.habit_id, user_id=0)
+        self.assertEqual(refresh_streak_history(self.db, habit.habit_id, 7), 2)
+        self.assertEqual(list(iter_streak_history(self.db, habit.habit_id, user_id=0)), [])
+        self.assertEqual(calculate_streaks_of_all_parallel(self.db, workers=2, chunk_size=1, serial_threshold=0, user_id=7),
+            [(habit.habit_id, "Study", 2, "2022-01-02 12:00:00")])
+
+        # checks if the commands only see the habits of the user:
+        parser = build_parser()
+        with self.assertRaises(UnknownHabitError):
+            command_checkout(self.db, parser.parse_args(["checkout", "1", "--user", "7"]))
+        self.assertEqual(len(command_list(self.db, parser.parse_args(["list", "--user", "7"]))["habits"]), 1)
+        self.assertEqual(len(command_history(self.db, parser.parse_args(["history", "Study", "--user", "7"]))["history"]), 2)
+        self.assertEqual(command_longest(self.db, parser.parse_args(["longest", "--user", "7"]))["habit_ids"], [habit.habit_id])
+
+        # checks if the habits of a user are read from the tenant-leading index:
+        plan = self.db.execute("EXPLAIN QUERY PLAN SELECT id, name FROM habits WHERE user_id=? ORDER BY id", [7]).fetchall()
+        self.assertIn("idx_habits_user", plan[0][3])
+
+        # checks if the statistics of all users are calculated with a single query:
+        statistics = get_fleet_statistics(self.db)
+        self.assertEqual([user[:3] for user in statistics], [(0, 5, 85), (7, 1, 2)])
+        self.assertEqual(statistics[1][3], "2022-01-02 12:00:00")
+
+        # checks if the users are kept by the migration to integer timestamps:
+        self.db.close()
+        self.db = create_connection("UTest.db", epoch_timestamps=True, multi_tenant=True)
+        self.assertEqual(get_all_habit_name_and_id(self.db, 7), [[habit.habit_id, "Study"]])
+        Log(self.db, habit_id=habit.habit_id, habit_name="Study", log_date=datetime(2022, 1, 3, 12, 0, 0)).save()
+        self.assertEqual(get_fleet_statistics(self.db)[1][:3], (7, 1, 3))
+
+    def test_parallel_streaks(self):
+        """Test that the streaks calculated by worker processes are merged into the same ranking as the serial calculation.
+        """
+        self.assertEqual(habit_chunks([1, 2, 3, 5, 8], 2), [(1, 2), (3, 5), (8, 8)])
+
+        # checks if the parallel calculation returns the same ranking and longest streak:
+        Log(self.db, habit_id=4, habit_name="Work Out", log_date=datetime(2022, 1, 20, 12, 0, 0)).save()
+        ranking = calculate_streaks_of_all(self.db)
+        self.assertEqual(calculate_streaks_of_all_parallel(self.db, workers=2, chunk_size=2, serial_threshold=0), ranking)
+        self.assertEqual(calculate_longest_streak_of_all_parallel(self.db, workers=2, chunk_size=1, serial_threshold=0),
+            calculate_longest_streak_of_all(self.db))
+
+        # checks if a database smaller than the threshold is calculated serially:
+        self.assertEqual(calculate_streaks_of_all_parallel(self.db, workers=2), ranking)
+
+    def test_streaming_reads(self):
+        """Test that the streaming read functions return the same rows as the lists and that a long history is
+        calculated with constant memory.
+        """
+
+        # checks if the streams return the same rows with any number of rows fetched at once:
+        for habit_id in range(1, 6):
+            self.assertEqual(list(iter_log_data(self.db, habit_id, arraysize=3)), get_all_log_data(self.db, habit_id))
+            self.assertEqual(list(iter_checkoffs(self.db, habit_id, arraysize=1)), get_all_checkoffs(self.db, habit_id))
+            periodicity, checkoffs = iter_periodicity_and_checkoffs(self.db, habit_id, arraysize=2)
+            self.assertEqual((periodicity, list(checkoffs)), get_periodicity_and_checkoffs(self.db, habit_id))
+        self.assertRaises(TypeError, iter_periodicity_and_checkoffs, self.db, 99)
+        self.assertEqual(len(list(iter_all_checkoffs(self.db, arraysize=7))), 85)
+
+        # store a daily habit with a history of 30000 days:
+        db = create_connection(":memory:", query_cache_size=0)
+        Habit(db, habit_name="Meditate", habit_periodicity="daily").save()
+        db.executemany("INSERT INTO habit_log (habit_id, habit_name, checkoff) VALUES (1, 'Meditate', ?)",
+            ((str(datetime.fromordinal(657000 + day).replace(hour=12)),) for day in range(30000)))
+        db.commit()
+
+        # checks if the streak is calculated without keeping the history in memory (the list of checkoffs needs megabytes):
+        tracemalloc.start()
+        try:
+            streak = rebuild_streak_state(db, 1)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            db.close()
+        self.assertEqual(streak, (30000, 30000, 1))
+        self.assertLess(peak, 1000000)
+
+    def test_streak_ranges(self):
+        """Test the streaks within a range of time and as of a past time.
+        """
+        start, end = datetime(2021, 12, 10), datetime(2022, 1, 1)
+
+        # checks if only the checkoffs within the range are read (start inclusive, end exclusive):
+        checkoffs = list(iter_checkoffs_between(self.db, 1, start, end))
+        self.assertEqual(checkoffs, [checkoff for checkoff in get_all_checkoffs(self.db, 1) if "2021-12-10" <= checkoff < "2022-01-01"])
+        self.assertEqual(list(iter_checkoffs_between(self.db, 1)), get_all_checkoffs(self.db, 1))
+
+        # checks if the range is read from the index on (habit_id, checkoff):
+        plan = " ".join(row[3] for row in self.db.execute(
+            "EXPLAIN QUERY PLAN SELECT checkoff FROM habit_log WHERE habit_log.habit_id=? AND habit_log.checkoff >= ? "
+            "AND habit_log.checkoff < ? ORDER BY checkoff", [1, str(start), str(end)]))
+        self.assertIn("idx_habit_log_habit_checkoff (habit_id=? AND checkoff>? AND checkoff<?)", plan)
+
+        # checks if the streaks are calculated from the checkoffs of the range:
+        streak = calculation_of_streaks_between(self.db, 1, start, end)
+        self.assertEqual((streak.current, streak.maximum, streak.last_checkoff), (22, 22, checkoffs[-1]))
+        self.assertEqual(calculation_of_streaks_as_of(self.db, 1, start, True).count, 3)
+        self.assertEqual(calculation_of_streaks_between(self.db, 1)[:4], calculation_of_streaks(self.db, 1)[:4])
+        self.assertEqual(calculation_of_streaks_between(self.db, 1, datetime(2030, 1, 1)).status, -1)
+        self.assertRaises(TypeError, calculation_of_streaks_between, self.db, 99)
+
+        # checks if the ranking of a range contains all habits, habits without checkoffs in the range have no streak:
+        ranking = calculate_streaks_of_all_between(self.db, start, end)
+        self.assertEqual(ranking[0][:3], (1, "Study", 22))
+        self.assertEqual(len(ranking), 5)
+        self.assertEqual(calculate_streaks_of_all_between(self.db), calculate_streaks_of_all(self.db))
+
+    def test_streak_history(self):
+        """Test the streak after every checkoff, calculated in a single pass and stored as derived table.
+        """
+
+        # checks if every point is the streak of the checkoffs up to the point:
+        for habit_id in range(1, 6):
+            checkoffs = get_all_checkoffs(self.db, habit_id)
+            points = list(iter_running_streaks(self.db, habit_id))
+            self.assertEqual([point.checkoff for point in points], checkoffs)
+            for number, point in enumerate(points):
+                _, count, count_max, status = fold_checkoffs(get_periods(self.db, habit_id), checkoffs[:number + 1])
+                self.assertEqual(point[2:], (count, count_max, status))
+
+        # checks if the stored history is the same and only new checkoffs are calculated when it is refreshed:
+        self.assertEqual(refresh_streak_history(self.db, 1), len(get_all_checkoffs(self.db, 1)))
+        self.assertEqual(list(iter_streak_history(self.db, 1)), list(iter_running_streaks(self.db, 1)))
+        self.assertEqual(refresh_streak_history(self.db, 1), 0)
+        Log(self.db, habit_id=1, habit_name="Study", log_date=datetime(2022, 1, 2, 12, 0, 0)).save()
+        self.assertEqual(refresh_streak_history(self.db, 1), 1)
+        self.assertEqual(list(iter_streak_history(self.db, 1))[-1][2:], (27, 27, 1))
+
+        # checks if a checkoff in the past removes the following points, which are calculated again:
+        Log(self.db, habit_id=1, habit_name="Study", log_date=datetime(2021, 12, 5, 20, 0, 0)).save()
+        refresh_streak_history(self.db, 1)
+        self.assertEqual(list(iter_streak_history(self.db, 1)), list(iter_running_streaks(self.db, 1)))
+        self.assertRaises(TypeError, refresh_streak_history, self.db, 99)
+
+    def test_completion_and_heatmap(self):
+        """Test the completion rates and the calendar heatmap aggregated in SQL against the checkoffs of the habit log.
+        """
+
+        # checks if the periods are counted from the period of the first time to the period before the end:
+        self.assertEqual(count_periods("daily", datetime(2021, 11, 11, 12, 0, 0), datetime(2022, 1, 1)), 51)
+        self.assertEqual(count_periods("weekly", datetime(2021, 11, 11), datetime(2022, 1, 1)), 8)
+        self.assertEqual(count_periods("monthly", datetime(2021, 11, 30), datetime(2022, 2, 1)), 3)
+        self.assertEqual(count_periods("daily", datetime(2022, 1, 1), datetime(2022, 1, 1)), 0)
+
+        # define the completed periods of every habit in december 2021 from the habit log:
+        start, end = datetime(2021, 12, 1), datetime(2022, 1, 1)
+        periodicities = {habit.habit_id: habit.periodicity for habit in get_all_habits(self.db)}
+        checkoffs = [(habit_id, log.checkoff_at()) for habit_id in periodicities for log in get_all_log_data(self.db, habit_id)]
+        buckets = {
+            "daily": lambda checkoff: checkoff.date(),
+            "weekly": lambda checkoff: checkoff.isocalendar()[:2],
+            "monthly": lambda checkoff: (checkoff.year, checkoff.month)}
+        completed = {habit_id: len({buckets[periodicities[habit_id]](checkoff)
+            for log_habit_id, checkoff in checkoffs if log_habit_id == habit_id and start <= checkoff < end})
+            for habit_id in periodicities}
+
+        # checks if the completion rates are calculated with the same completed periods:
+        rates = calculate_completion_rates(self.db, start, end)
+        self.assertEqual([habit_id for habit_id, *_ in rates], [1, 2, 3, 4, 5])
+        self.assertEqual({habit_id: count for habit_id, _, _, count, _, _ in rates}, completed)
+        self.assertEqual([periods for *_, periods, _ in rates], [31, 31, 5, 5, 1])
+        self.assertEqual(rates[4][5], 1.0)
+
+        # checks if the heatmap counts the checkoffs of every day:
+        days, rows = calculate_heatmap(self.db, start, end)
+        self.assertEqual(days, [date(2021, 12, 1) + timedelta(days=offset) for offset in range(31)])
+        for habit_id, _, row in rows:
+            per_day = Counter(checkoff.date() for log_habit_id, checkoff in checkoffs
+                if log_habit_id == habit_id and start <= checkoff < end)
+            self.assertEqual(row, [per_day[day] for day in days])
+
+        # checks if the heatmap of a single habit is the same row and if the calendar has a row per weekday:
+        self.assertEqual(calculate_heatmap(self.db, start, end, 1)[1], rows[:1])
+        lines = format_heatmap(days, rows[0][2])
+        self.assertEqual(len(lines), 8)
+        self.assertTrue(lines[0].strip().startswith("Dec"))
+        self.assertEqual(lines[3][4], ".")
+
+    def test_leaderboard(self):
+        """Test the top k habits by their streak in days or periods selected in a single pass over the checkoffs.
+        """
+
+        # define the streaks of all habits calculated one by one:
+        streaks = {habit_id: calculation_of_streaks(self.db, habit_id) for habit_id in range(1, 6)}
+        days = {"daily": 1, "weekly": 7, "monthly": 365.25 / 12}
+
+        # checks if the leaderboard is read with a single query and ranks the habits by their maximum streak in days:
+        statements = []
+        self.db.set_trace_callback(statements.append)
+        leaderboard = calculate_leaderboard(self.db, 3)
+        self.db.set_trace_callback(None)
+        self.assertEqual(len(statements), 1)
+        ranking = sorted(streaks, key=lambda habit_id: -streaks[habit_id].maximum * days[streaks[habit_id].periodicity])
+        self.assertEqual([entry.habit_id for entry in leaderboard], ranking[:3])
+        for entry in leaderboard:
+            self.assertEqual(entry.streak, streaks[entry.habit_id].maximum)
+            self.assertEqual(entry.days, round(entry.streak * days[entry.periodicity], 1))
+            self.assertEqual(entry.last_checkoff, streaks[entry.habit_id].last_checkoff)
+
+        # checks if the monthly streak ranks above the longer daily streak in days, but not in periods:
+        self.assertEqual(leaderboard[0].periodicity, "monthly")
+        self.assertEqual(calculate_leaderboard(self.db, 1, normalized=False)[0].habit_id, 1)
+
+        # checks if the current streak and the periodicity are used and habits with the same streak stay ordered by id:
+        current = calculate_leaderboard(self.db, 5, by="current", normalized=False, periodicity="daily")
+        self.assertEqual([(entry.habit_id, entry.streak) for entry in current],
+            sorted([(habit_id, streaks[habit_id].current) for habit_id in (1, 2)], key=lambda item: -item[1]))
+        self.assertEqual(calculate_leaderboard(self.db, 5, periodicity="yearly"), [])
+        self.assertRaises(ValueError, calculate_leaderboard, self.db, 5, "longest")
+
+    def test_periodicities(self):
+        """Test the streaks of the registered periodicities calculated from consecutive period ordinals.
+        """
+
+        # checks if weeks start on monday and are counted on at the turn of the year (2021-01-01 is in week 53 of 2020):
+        weekly = periodicities["weekly"]
+        self.assertEqual(weekly.ordinal(datetime(2021, 12, 27)), weekly.ordinal(datetime(2022, 1, 2, 23, 59)))
+        self.assertEqual(weekly.ordinal(datetime(2022, 1, 3)) - weekly.ordinal(datetime(2022, 1, 2)), 1)
+        self.assertEqual(calculate_streak("weekly", [datetime(2020, 12, 22, 8), datetime(2021, 1, 1, 8), datetime(2021, 1, 5, 8)]), (3, 3, 1))
+        self.assertEqual(calculate_streak("monthly", [datetime(2021, 12, 5), datetime(2022, 1, 5), datetime(2023, 1, 5)]), (1, 2, 3))
+
+        # checks if the other default periodicities continue, repeat and break streaks by their periods:
+        self.assertEqual(calculate_streak("biweekly", [datetime(2022, 1, 10), datetime(2022, 1, 23), datetime(2022, 1, 24)]), (2, 2, 1))
+        self.assertEqual(calculate_streak("quarterly", [datetime(2021, 11, 1), datetime(2022, 3, 31), datetime(2022, 4, 1)]), (3, 3, 1))
+        self.assertEqual(calculate_streak("yearly", [datetime(2020, 6, 1), datetime(2021, 1, 1), datetime(2021, 12, 31)]), (2, 2, 2))
+        self.assertEqual(calculate_streak("yearly", [datetime(2020, 6, 1), datetime(2022, 1, 1)]), (1, 1, 3))
+        self.assertEqual(count_periods("quarterly", datetime(2021, 11, 11), datetime(2022, 7, 1)), 3)
+
+        # checks if the strike is told in days or months for the three former periodicities and in periods for the others:
+        for periodicity, maximum, strike in [("weekly", 3, "a 21 day strike"), ("monthly", 2, "a 2 month strike"),
+                ("yearly", 2, "a strike of 2 yearly periods"), ("biweekly", 1, "a strike of 1 biweekly period")]:
+            output = io.StringIO()
+            with redirect_stdout(output):
+                print_longest_streak_of_given_habit("Read", StreakResult(maximum, 1, 1, maximum, "2022-01-03 08:00:00", periodicity))
+            self.assertIn(f"You have reached {strike} in your habit Read.", output.getvalue())
+        self.assertRaises(ValueError, register_periodicity, "hourly", "hour")
+
+        # checks if a registered periodicity can be chosen and is calculated like the default ones:
+        register_periodicity("every 3 days", "day", 3)
+        try:
+            self.assertEqual(choice_for_periodicity[-1], "every 3 days")
+            self.assertEqual(calculate_streak("every 3 days", [datetime(2022, 1, day) for day in (1, 3, 6, 7, 13)]), (1, 3, 3))
+
+            # checks if the completed periods counted in SQL use the same ordinals:
+            habit = Habit(self.db, habit_name="Laundry", habit_periodicity="every 3 days", habit_created="2022-01-01 00:00:00")
+            habit.save()
+            for day in (1, 3, 6, 7, 13):
+                Log(self.db, habit_id=habit.habit_id, habit_name="Laundry", log_date=datetime(2022, 1, day, 10)).save()
+            rates = calculate_completion_rates(self.db, datetime(2022, 1, 1), datetime(2022, 1, 16))
+            ordinal = periodicities["every 3 days"].ordinal
+            self.assertEqual(rates[-1][3:5], (
+                len({ordinal(datetime(2022, 1, day)) for day in (1, 3, 6, 7, 13)}),
+                ordinal(datetime(2022, 1, 15)) - ordinal(datetime(2022, 1, 1)) + 1))
+            self.assertEqual(calculation_of_streaks(self.db, habit.habit_id, True)[:2], (3, 3))
+
+            # checks if worker processes, which don't inherit the registry (spawn), calculate the registered periodicity:
+            self.assertEqual(calculate_streaks_of_all_parallel(self.db, workers=2, chunk_size=3, serial_threshold=0,
+                mp_context=multiprocessing.get_context("spawn")), calculate_streaks_of_all(self.db))
+        finally:
+            del periodicities["every 3 days"], streak_steps["every 3 days"], streak_delta_hours["every 3 days"]
+            choice_for_periodicity.remove("every 3 days")
+
+    @unittest.skipIf(vectorized.np is None, "numpy is not installed")
+    def test_streak_engine_numpy(self):
+        """Test that the vectorized streak engine calculates the same streaks as the step functions.
+        """
+
+        # calculate the streaks of all habits with both engines:
+        streaks_python = [rebuild_streak_state(self.db, habit_id) for habit_id in range(1, 6)]
+        set_streak_engine("numpy")
+        try:
+            streaks_numpy = [rebuild_streak_state(self.db, habit_id) for habit_id in range(1, 6)]
+            ranking_numpy = calculate_streaks_of_all(self.db)
+        finally:
+            set_streak_engine("python")
+
+        # checks if both engines return the same streaks and ranking:
+        self.assertEqual(streaks_numpy, streaks_python)
+        self.assertEqual(ranking_numpy, calculate_streaks_of_all(self.db))
+
+        # checks if the vectorized period ordinals are the ordinals of the periodicities:
+        moments = [datetime(2020, 12, 31, 23, 0), datetime(2021, 1, 1, 1, 0), datetime(2021, 3, 31, 12, 0), datetime(2022, 1, 3, 0, 0)]
+        seconds = vectorized.to_epoch_array([moment.strftime("%Y-%m-%d %H:%M:%S") for moment in moments])
+        for name, periodicity in periodicities.items():
+            self.assertEqual(vectorized.period_ordinals(name, seconds).tolist(), [periodicity.ordinal(moment) for moment in moments])
+
+        # checks if unknown engines are rejected:
+        self.assertRaises(ValueError, set_streak_engine, "fortran")
+
 
 # close and delete the test database
 TestApplication.tearDown(unittest.TestCase)
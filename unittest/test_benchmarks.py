@@ -0,0 +1,53 @@
+import os
+import sys
+_relative_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(_relative_path)
+sys.path.append(os.path.join(_relative_path, "benchmarks"))
+
+import unittest
+import tempfile
+from dataset import generate_database, expected_rows_per_habit, default_mix
+from application.database import create_connection
+
+class TestDataset(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Setup a temporary directory for the generated databases
+        """
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        """
+        Delete the generated databases
+        """
+        self.directory.cleanup()
+
+    def generate(self, name: str, **arguments) -> tuple:
+        """Generates a database and returns the result of the generation with all habits and checkoffs.
+        """
+        name = os.path.join(self.directory.name, name)
+        result = generate_database(name, **arguments)
+        db = create_connection(name, query_cache_size=0)
+        habits = db.execute("SELECT id, name, periodicity FROM habits ORDER BY id").fetchall()
+        checkoffs = db.execute("SELECT habit_id, checkoff FROM habit_log ORDER BY log_id").fetchall()
+        db.close()
+        return result, habits, checkoffs
+
+    def test_generate_database(self):
+        """Test if the same seed generates the same database with about the expected number of checkoffs.
+        """
+        result, habits, checkoffs = self.generate("first.db", habits=20, years=1.0, seed=3)
+        _, same_habits, same_checkoffs = self.generate("second.db", habits=20, years=1.0, seed=3)
+        _, _, other_checkoffs = self.generate("third.db", habits=20, years=1.0, seed=4)
+        self.assertEqual((habits, checkoffs), (same_habits, same_checkoffs))
+        self.assertNotEqual(checkoffs, other_checkoffs)
+        self.assertEqual((result["habits"], result["checkoffs"]), (20, len(checkoffs)))
+        self.assertAlmostEqual(len(checkoffs) / (20 * expected_rows_per_habit(default_mix, 1.0, 0.1, 0.1)), 1.0, delta=0.25)
+
+        # checks if a history without gaps and duplicates has one checkoff per day:
+        _, _, checkoffs = self.generate("daily.db", habits=2, mix={"daily": 1.0}, years=1.0, duplicate_rate=0.0, gap_rate=0.0)
+        self.assertEqual(len(checkoffs), 2 * 365)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+_relative_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(_relative_path)
+
+from test_database_setup import TestApplication
+import unittest
+import io
+import json
+import tempfile
+import subprocess
+from application.commands import build_parser, run_command, command_streak, command_longest, command_list, command_checkout, CommandError
+
+TestApplication.setUp(unittest.TestCase)
+
+class TestCommands(TestApplication):
+    def test_commands(self):
+        """Test the results of the headless commands with the test data.
+        """
+        parser = build_parser()
+
+        # checks if habits are resolved by name or id and the streak is returned:
+        streak = command_streak(self.db, parser.parse_args(["streak", "Study"]))
+        self.assertEqual(streak, command_streak(self.db, parser.parse_args(["streak", "1"])))
+        self.assertEqual((streak["habit_id"], streak["periodicity"], streak["maximum"]), (1, "daily", 26))
+        with self.assertRaises(CommandError):
+            command_streak(self.db, parser.parse_args(["streak", "Juggle"]))
+
+        # checks if the longest streak of all and the habits are returned:
+        longest = command_longest(self.db, parser.parse_args(["longest", "--limit", "2"]))
+        self.assertEqual((longest["longest_streak"], longest["habit_ids"], len(longest["ranking"])), (26, [1], 2))
+        longest = command_longest(self.db, parser.parse_args(["longest", "--limit", "0"]))
+        self.assertEqual((longest["longest_streak"], longest["habit_ids"], longest["ranking"]), (26, [1], []))
+        for command in (["longest", "--limit", "-1"], ["leaderboard", "--limit", "-1"]):
+            with self.assertRaises(SystemExit):
+                parser.parse_args(command)
+        self.assertEqual(len(command_list(self.db, parser.parse_args(["list"]))["habits"]), 5)
+        self.assertEqual(len(command_list(self.db, parser.parse_args(["list", "--periodicity", "weekly"]))["habits"]), 2)
+
+        # checks if a checkoff at the given time continues the streak:
+        result = command_checkout(self.db, parser.parse_args(["checkout", "Study", "--at", "2022-01-02 10:00:00"]))
+        self.assertEqual(result["streak"]["last_checkoff"], "2022-01-02 10:00:00")
+        with self.assertRaises(CommandError):
+            command_checkout(self.db, parser.parse_args(["checkout", "Study", "--at", "tomorrow"]))
+
+    def test_run_command(self):
+        """Test that commands write JSON and report errors with exit code 1.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, "UTestCommands.db")
+            output = io.StringIO()
+            self.assertEqual(run_command(build_parser().parse_args(["--db", name, "list"]), output), 0)
+            self.assertEqual(json.loads(output.getvalue()), {"habits": []})
+
+            output = io.StringIO()
+            self.assertEqual(run_command(build_parser().parse_args(["--db", name, "streak", "Study"]), output), 1)
+            self.assertIn("error", json.loads(output.getvalue()))
+
+            # checks if errors of the database are reported as JSON instead of a traceback:
+            output = io.StringIO()
+            self.assertEqual(run_command(build_parser().parse_args(["--db", directory, "list"]), output), 1)
+            self.assertIn("OperationalError", json.loads(output.getvalue())["error"])
+
+        # checks if the headless commands don't load the interactive cli:
+        loaded = subprocess.run([sys.executable, "-c", "import sys, application.commands; print(sorted({'questionary', 'beautifultable'} & set(sys.modules)))"],
+            cwd=_relative_path, capture_output=True, text=True).stdout
+        self.assertEqual(loaded.strip(), "[]")
+
+
+# close and delete the test database
+TestApplication.tearDown(unittest.TestCase)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import sys
+_relative_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(_relative_path)
+
+import unittest
+import sqlite3
+import tempfile
+from application.connection import ConnectionManager
+from datetime import datetime
+from application.habit import Habit, Log
+from application.database import get_all_habits, get_streak_state
+from application.analytics import calculation_of_streaks, refresh_streak_history
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Setup a connection manager of a temporary database
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.manager = ConnectionManager(os.path.join(self.directory.name, "UTestPool.db"), pool_size=2,
+            cache_size=-2000, mmap_size=0, synchronous="full", busy_timeout=1000)
+
+    def tearDown(self) -> None:
+        """
+        Close the connections and delete the temporary database
+        """
+        self.manager.close()
+        self.directory.cleanup()
+
+    def test_writer_and_readers(self):
+        """Test the settings of the connections and that readers see the committed writes of the writer.
+        """
+        with self.manager.writer() as db:
+            self.assertEqual(db.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(db.execute("PRAGMA synchronous").fetchone()[0], 2)
+            self.assertEqual(db.execute("PRAGMA busy_timeout").fetchone()[0], 1000)
+            Habit(db, habit_name="Study", habit_periodicity="daily").save()
+
+        # checks if a reader sees the habit and can't write to the database:
+        with self.manager.reader() as db:
+            self.assertEqual(db.execute("PRAGMA cache_size").fetchone()[0], -2000)
+            self.assertEqual(len(get_all_habits(db)), 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                db.execute("DELETE FROM habits")
+
+            # checks if the reader sees writes of the writer while it is checked out:
+            with self.manager.writer() as writer:
+                Habit(writer, habit_name="Sleep", habit_periodicity="daily").save()
+            self.assertEqual(len(get_all_habits(db)), 2)
+
+    def test_pool_is_bounded(self):
+        """Test that the pool hands out at most pool_size readers and reuses readers which were checked in.
+        """
+        first = self.manager.checkout_reader()
+        second = self.manager.checkout_reader()
+        with self.assertRaises(TimeoutError):
+            self.manager.checkout_reader(timeout=0.01)
+
+        # checks if a reader which was checked in is handed out again:
+        self.manager.checkin_reader(second)
+        self.assertIs(self.manager.checkout_reader(timeout=0.01), second)
+        self.manager.checkin_reader(first)
+        self.manager.checkin_reader(second)
+
+        # checks if invalid settings are refused:
+        with self.assertRaises(ValueError):
+            ConnectionManager(os.path.join(self.directory.name, "UTestPool.db"), pool_size=0)
+        with self.assertRaises(ValueError):
+            ConnectionManager(os.path.join(self.directory.name, "UTestPool.db"), synchronous="sometimes")
+
+    def test_streak_through_reader(self):
+        """Test that the streak of a habit is read through the pool without storing the streak state with the reader.
+        """
+        with self.manager.writer() as db:
+            habit = Habit(db, habit_name="Study", habit_periodicity="daily")
+            habit.save()
+            for day in (1, 2, 3):
+                Log(db, habit_id=habit.habit_id, habit_name="Study", log_date=datetime(2021, 12, day, 12)).save()
+            db.execute("DELETE FROM habit_streak")
+            db.commit()
+
+        # checks if the reader calculates the missing state without writing it:
+        with self.manager.reader() as db:
+            streak = calculation_of_streaks(db, habit.habit_id)
+            self.assertEqual((streak.current, streak.maximum), (3, 3))
+            self.assertEqual(get_streak_state(db, habit.habit_id)[1], None)
+            self.assertEqual(refresh_streak_history(db, habit.habit_id), 0)
+
+        # checks if the writer stores the state:
+        with self.manager.writer() as db:
+            self.assertEqual(calculation_of_streaks(db, habit.habit_id), streak)
+            self.assertEqual(get_streak_state(db, habit.habit_id)[1:3], (3, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
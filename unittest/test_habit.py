@@ -7,9 +7,13 @@ from application.habit import Habit
 from test_database_setup import TestApplication
 import unittest
 from application.cli import show_habit_names_in_cli
+from application.catalog import HabitCatalog
 from application.habit import Habit, Log
 from datetime import datetime
-from application.database import get_all_habits, get_all_log_data
+from application.database import get_all_habits, get_all_habit_name_and_id, get_all_log_data, get_streak_state
+import sqlite3
+from application.analytics import calculation_of_streaks, rebuild_streak_state
+from application.repository import HabitRepository
 
 TestApplication.setUp(unittest.TestCase)
 
@@ -42,6 +46,162 @@ class TestHabit(TestApplication):
         temp_habit.delete()
         self.assertEqual(len(get_all_habits(self.db)), 5)
 
+    def test_streak_state(self):
+        """Test that Log.save() updates the stored streak state the same way as a rebuild from all checkoffs.
+        """
+
+        # build the streak state of the daily habit "Sleep more than 8 hours" from all checkoffs:
+        self.assertEqual(calculation_of_streaks(self.db, 2, False)[:2], (4, 1))
+        self.assertEqual(get_streak_state(self.db, 2)[1:4], (4, 9, 1))
+
+        # check off the habit the next days, one obsolete and one after breaking the habit:
+        for timestamp, streak in [(1641193545, (5, 1)), (1641196545, (5, 2)), (1641279945, (6, 1)), (1641539145, (1, 3))]:
+            Log(self.db, habit_id=2, habit_name="Sleep more than 8 hours", log_date=datetime.fromtimestamp(timestamp)).save()
+
+            # checks if the state was updated in place and is not stale:
+            state = get_streak_state(self.db, 2)
+            self.assertEqual(state[4], state[6])
+            self.assertEqual(calculation_of_streaks(self.db, 2, False)[:2], streak)
+            self.assertEqual(state[1:4], rebuild_streak_state(self.db, 2))
+
+        # checks if a checkoff older than the state removes the state, which is rebuilt afterwards:
+        Log(self.db, habit_id=2, habit_name="Sleep more than 8 hours", log_date=datetime.fromtimestamp(1638446445)).save()
+        self.assertIsNone(get_streak_state(self.db, 2)[1])
+        self.assertEqual(calculation_of_streaks(self.db, 2, True)[:2], (9, 3))
+
+        # checks if a back-dated checkoff of another connection makes the state stale, although the latest checkoff is the same:
+        streak = calculation_of_streaks(self.db, 2, False)
+        other = sqlite3.connect("UTest.db")
+        other.execute("INSERT INTO habit_log (habit_id, habit_name, checkoff) VALUES (2, 'Sleep more than 8 hours', '2022-01-06 08:00:00')")
+        other.commit()
+        other.close()
+        self.assertNotEqual(calculation_of_streaks(self.db, 2, False)[:2], streak[:2])
+        self.assertEqual(get_streak_state(self.db, 2)[1:4], rebuild_streak_state(self.db, 2))
+
+        # checks if a log of another connection isn't hidden by a following Log.save():
+        other = sqlite3.connect("UTest.db")
+        other.execute("INSERT INTO habit_log (habit_id, habit_name, checkoff) VALUES (2, 'Sleep more than 8 hours', '2022-01-08 08:00:00')")
+        other.commit()
+        other.close()
+        Log(self.db, habit_id=2, habit_name="Sleep more than 8 hours", log_date=datetime.fromtimestamp(1641712000)).save()
+        self.assertIsNone(get_streak_state(self.db, 2)[1])
+
+        # checks if a habit with a periodicity which isn't registered removes the state and finishes the transaction:
+        calculation_of_streaks(self.db, 2, False)
+        self.db.execute("UPDATE habits SET periodicity='hourly' WHERE id=2")
+        self.db.commit()
+        Log(self.db, habit_id=2, habit_name="Sleep more than 8 hours", log_date=datetime.fromtimestamp(1641800000)).save()
+        self.assertFalse(self.db.in_transaction)
+        self.assertIsNone(get_streak_state(self.db, 2)[1])
+        self.db.execute("UPDATE habits SET periodicity='daily' WHERE id=2")
+        self.db.commit()
+
+        # checks if deleting the log removes the state:
+        Log(self.db, habit_id=2).delete()
+        self.assertEqual(get_streak_state(self.db, 2)[1:], (None, None, None, None, None, None))
+        self.assertEqual(calculation_of_streaks(self.db, 2, False)[:2], (0, -1))
+
+    def test_habit_catalog(self):
+        """Test that the habit catalog of the CLI is loaded once and updated in place.
+        """
+        catalog = HabitCatalog(self.db)
+        self.assertFalse(catalog.is_empty())
+        self.assertEqual(catalog.choices(), show_habit_names_in_cli(self.db))
+
+        # checks if the prebuilt choices are reused while the catalog doesn't change:
+        self.assertIs(catalog.choices(), catalog.choices())
+
+        # checks if a created habit is added with the id it was stored with:
+        temp_habit = Habit(self.db, habit_name="Read - Novels", habit_periodicity="daily")
+        temp_habit.save()
+        catalog.add(temp_habit.habit_id, temp_habit.habit_name)
+        self.assertEqual(catalog.choices()[-2:], ["6 - Read - Novels", "Back"])
+        self.assertEqual(catalog.resolve("6 - Read - Novels"), (6, "Read - Novels"))
+        self.assertEqual(catalog.choices(), show_habit_names_in_cli(self.db))
+
+        # checks if a deleted habit is removed:
+        temp_habit.delete()
+        catalog.remove("6")
+        self.assertEqual(catalog.choices(), show_habit_names_in_cli(self.db))
+
+    def test_query_cache(self):
+        """Test that repeated reads are returned from the query cache and writes invalidate only the written table.
+        """
+        cache = self.db.query_cache
+
+        # checks if the second read is returned from the cache:
+        habits = get_all_habits(self.db)
+        log_data = get_all_log_data(self.db, 1)
+        hits = cache.hits
+        self.assertEqual(get_all_habits(self.db), habits)
+        self.assertEqual(get_all_log_data(self.db, 1), log_data)
+        self.assertEqual(cache.hits, hits + 2)
+
+        # checks if a caller which changes a returned result doesn't change the cached result:
+        names = get_all_habit_name_and_id(self.db)
+        get_all_habit_name_and_id(self.db).append("junk")
+        get_all_habit_name_and_id(self.db)[0].append("junk")
+        self.assertEqual(get_all_habit_name_and_id(self.db), names)
+
+        # checks if saving a log only invalidates results of the habit log:
+        hits = cache.hits
+        Log(self.db, habit_id=1, habit_name="Study", log_date=datetime.fromtimestamp(1641124817)).save()
+        self.assertEqual(get_all_habits(self.db), habits)
+        self.assertEqual(cache.hits, hits + 1)
+        self.assertEqual(len(get_all_log_data(self.db, 1)), len(log_data) + 1)
+
+        # checks if saving a habit invalidates results of the habits:
+        Habit(self.db, habit_name="Read", habit_periodicity="daily").save()
+        self.assertEqual(len(get_all_habits(self.db)), 6)
+
+        # checks if writes which aren't announced to the cache remove all results:
+        habits = get_all_habits(self.db)
+        self.db.execute("DELETE FROM habits WHERE name='Read'")
+        self.assertEqual(len(get_all_habits(self.db)), 5)
+        self.db.commit()
+
+        # checks if commits of another connection (e.g. another process) remove all results:
+        other = sqlite3.connect("UTest.db")
+        other.execute("INSERT INTO habits (name, periodicity, description, created) VALUES ('Swim', 'weekly', '', '2022-01-01 00:00:00')")
+        other.commit()
+        other.close()
+        self.assertEqual(len(get_all_habits(self.db)), 6)
+        self.db.execute("DELETE FROM habits WHERE name='Swim'")
+        self.db.commit()
+
+        # checks if the cache is bounded and evicts the least recently used result:
+        cache.maxsize = 2
+        get_all_log_data(self.db, 1)
+        get_all_log_data(self.db, 2)
+        get_all_log_data(self.db, 3)
+        self.assertNotIn(("get_all_log_data", 1), cache.results)
+        self.assertIn(("get_all_log_data", 3), cache.results)
+
+    def test_repository(self):
+        """Test that the repository returns the habits and checkoffs as immutable records without dict.
+        """
+        repository = HabitRepository(self.db, arraysize=4)
+
+        # checks if the records can be read by name and by position:
+        habit = repository.habit(1)
+        self.assertEqual((habit.name, habit.periodicity, habit[3]), ("Study", "daily", "Study for University"))
+        self.assertEqual(habit.created_at(), datetime.fromtimestamp(1636585200))
+        self.assertEqual(repository.habits(), get_all_habits(self.db))
+        self.assertRaises(TypeError, repository.habit, 99)
+
+        # checks if the checkoffs are streamed in chronological order:
+        checkoffs = repository.load_checkoffs(1)
+        self.assertEqual(checkoffs, get_all_log_data(self.db, 1))
+        self.assertEqual((checkoffs[0].habit_name, checkoffs[0].checkoff_at()), ("Study", datetime(2021, 12, 2, 14, 56, 34)))
+        self.assertEqual(sum(1 for _ in repository.iter_all_checkoffs()), 85)
+        self.assertEqual([record.habit_id for record in repository.iter_all_checkoffs()], sorted(record.habit_id for record in repository.iter_all_checkoffs()))
+
+        # checks if records, habits and logs can't get further attributes (no dict per object):
+        for record in (habit, checkoffs[0], Habit(self.db), Log(self.db)):
+            self.assertFalse(hasattr(record, "__dict__"))
+        with self.assertRaises(AttributeError):
+            habit.name = "Sleep"
+
 
 # close and delete the test database
 TestApplication.tearDown(unittest.TestCase)
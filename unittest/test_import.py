@@ -0,0 +1,121 @@
+import os
+import sys
+_relative_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(_relative_path)
+
+from test_database_setup import TestApplication
+import unittest
+import json
+import tempfile
+from application.importer import import_habits, import_checkoffs, parse_timestamp
+from application.database import get_all_habits, get_all_log_data, get_streak_state
+from application.analytics import calculation_of_streaks, rebuild_streak_state
+from datetime import datetime
+
+TestApplication.setUp(unittest.TestCase)
+
+class TestImport(TestApplication):
+    def write_file(self, suffix: str, text: str) -> str:
+        """Writes a temporary file, which is removed after the test.
+        """
+        file = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8")
+        file.write(text)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_import_habits(self):
+        """Test the bulk import of habits from a CSV file.
+        """
+        path = self.write_file(".csv",
+            "name,periodicity,description,created\n"
+            "Read,daily,Read a book,2021-11-11 00:00:00\n"
+            "Swim,weekly,,\n"
+            "Juggle,hourly,,\n"
+            ",daily,,\n"
+            "Call Friends,monthly,,2021-13-01\n")
+
+        # checks if valid habits are imported and invalid habits are rejected with their line:
+        report = import_habits(self.db, path, chunk_size=1)
+        self.assertEqual(report.imported, 2)
+        self.assertEqual([line for line, reason in report.rejected], [4, 5, 6])
+        self.assertGreater(report.rows_per_second(), 0)
+        self.assertEqual(len(get_all_habits(self.db)), 7)
+        self.assertEqual(get_all_habits(self.db)[5][1:], ("Read", "daily", "Read a book", "2021-11-11 00:00:00"))
+
+        # checks if unsupported files are refused:
+        with self.assertRaises(ValueError):
+            import_habits(self.db, "habits.txt")
+
+    def test_import_habits_with_mixed_types(self):
+        """Test that JSONL habits with values of the wrong type are rejected with their line instead of aborting the import.
+        """
+        lines = [
+            json.dumps({"name": "Stretch", "periodicity": "daily", "description": "Before breakfast"}),
+            json.dumps({"name": 5, "periodicity": "daily"}),
+            json.dumps({"name": "Paint", "periodicity": ["weekly"]}),
+            json.dumps({"name": "Bake", "periodicity": "weekly", "description": {"text": "bread"}}),
+            json.dumps({"name": "Hike", "periodicity": "monthly", "description": ["mountains"]}),
+            json.dumps({"name": "Knit", "periodicity": "monthly", "created": [2021, 11, 11]}),
+            json.dumps({"name": "Write", "periodicity": "weekly", "created": 1636585200}),
+        ]
+        path = self.write_file(".jsonl", "\n".join(lines) + "\n")
+
+        # checks if the valid habits of all chunks are imported and the others are rejected with their line:
+        report = import_habits(self.db, path, chunk_size=2)
+        self.assertEqual(report.imported, 2)
+        self.assertEqual([line for line, reason in report.rejected], [2, 3, 4, 5, 6])
+        self.assertEqual([habit.name for habit in get_all_habits(self.db)][-2:], ["Stretch", "Write"])
+
+        # checks if a habit of a checkoff has to be given as string:
+        path = self.write_file(".jsonl", json.dumps({"habit": ["Study"], "checkoff": "2022-01-02 12:00:00"}) + "\n")
+        self.assertEqual(import_checkoffs(self.db, path).rejected[0][0], 1)
+
+    def test_import_checkoffs(self):
+        """Test the bulk import of checkoffs from a JSONL file and the rebuild of the streak states.
+        """
+        rebuild_streak_state(self.db, 1)
+        count = len(get_all_log_data(self.db, 1))
+        lines = [
+            json.dumps({"habit": "Study", "checkoff": "2022-01-02 12:00:00"}),
+            json.dumps({"habit_id": 1, "checkoff": "2022-01-03T12:00:00"}),
+            json.dumps({"habit": "Study", "checkoff": "2021-11-30 12:00:00"}),
+            json.dumps({"habit": "Swim", "checkoff": "2022-01-03 12:00:00"}),
+            json.dumps({"habit_id": 99, "checkoff": "2022-01-03 12:00:00"}),
+            json.dumps({"habit": "Study", "checkoff": "yesterday"}),
+            "{broken",
+            "",
+            json.dumps({"habit": "Visit Family", "checkoff": 1641038417}),
+        ]
+        path = self.write_file(".jsonl", "\n".join(lines) + "\n")
+
+        # checks if valid checkoffs are imported by name or id and invalid checkoffs are rejected with their line:
+        report = import_checkoffs(self.db, path, chunk_size=2)
+        self.assertEqual(report.imported, 4)
+        self.assertEqual([line for line, reason in report.rejected], [4, 5, 6, 7])
+        self.assertEqual(len(get_all_log_data(self.db, 1)), count + 3)
+        self.assertEqual(get_all_log_data(self.db, 1)[-1][2:], ("Study", "2022-01-03 12:00:00"))
+
+        # checks if the streak state of the habit is removed and rebuilt with the imported checkoffs:
+        self.assertEqual(get_streak_state(self.db, 1)[1], None)
+        streak = calculation_of_streaks(self.db, 1)
+        self.assertEqual(streak.last_checkoff, "2022-01-03 12:00:00")
+        self.assertEqual(get_streak_state(self.db, 1)[1:4], (streak.current, streak.maximum, streak.status))
+
+    def test_parse_timestamp(self):
+        """Test the validation of imported timestamps.
+        """
+        self.assertEqual(parse_timestamp("2021-12-01 08:30:00"), datetime(2021, 12, 1, 8, 30))
+        self.assertEqual(parse_timestamp(1641038417), datetime.fromtimestamp(1641038417))
+        self.assertEqual(parse_timestamp("1641038417"), datetime.fromtimestamp(1641038417))
+        with self.assertRaises(ValueError):
+            parse_timestamp("2021-12-32")
+        with self.assertRaises(ValueError):
+            parse_timestamp(None)
+
+
+# close and delete the test database
+TestApplication.tearDown(unittest.TestCase)
+
+if __name__ == "__main__":
+    unittest.main()
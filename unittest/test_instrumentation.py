@@ -0,0 +1,70 @@
+import os
+import sys
+_relative_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(_relative_path)
+
+import unittest
+import io
+import json
+from application import instrumentation
+from application.instrumentation import set_action, summary, write_summary
+from application.database import create_connection, default_habit_data, iter_log_data
+from application.analytics import calculate_longest_streak_of_all
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Enable the instrumentation and setup an in-memory database with the default habits
+        """
+        instrumentation.enable("json")
+        set_action("setup")
+        self.db = create_connection(":memory:", query_cache_size=0)
+        default_habit_data(self.db)
+
+    def tearDown(self) -> None:
+        """
+        Close the database and disable the instrumentation
+        """
+        self.db.close()
+        instrumentation.disable()
+        set_action("startup")
+
+    def test_summary(self):
+        """Test if the statements, calls and rows are recorded for the action which issued them.
+        """
+        set_action("longest")
+        self.assertEqual(calculate_longest_streak_of_all(self.db), ([1], 26))
+        result = summary()
+
+        # checks if the nested calls are recorded but only the outermost call is counted for the action:
+        action = result["longest"]
+        self.assertEqual(action["calls"], 1)
+        self.assertEqual(action["functions"]["calculate_longest_streak_of_all"], {"calls": 1, "rows": 1,
+            "seconds": action["seconds"]})
+        self.assertEqual(action["functions"]["calculate_streaks_of_all"]["rows"], 5)
+        self.assertEqual(action["functions"]["iter_all_checkoffs"]["calls"], 1)
+        self.assertGreaterEqual(action["statements"], 1)
+        self.assertGreater(result["setup"]["statements"], action["statements"])
+
+        # checks if the summary is written as JSON:
+        output = io.StringIO()
+        write_summary(output)
+        self.assertEqual(json.loads(output.getvalue())["longest"]["calls"], 1)
+
+        # checks if the rows of a stream are counted while it is consumed:
+        set_action("stream")
+        stream = iter_log_data(self.db, 1)
+        self.assertEqual(summary()["stream"]["functions"]["iter_log_data"]["rows"], 0)
+        rows = list(stream)
+        self.assertEqual(summary()["stream"]["functions"]["iter_log_data"]["calls"], 1)
+        self.assertEqual(summary()["stream"]["functions"]["iter_log_data"]["rows"], len(rows))
+        self.assertEqual((summary()["stream"]["calls"], summary()["stream"]["rows"]), (1, len(rows)))
+
+        # checks if nothing is recorded after the instrumentation is disabled:
+        instrumentation.disable()
+        calculate_longest_streak_of_all(self.db)
+        self.assertEqual(summary(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
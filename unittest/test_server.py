@@ -0,0 +1,120 @@
+import os
+import sys
+_relative_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(_relative_path)
+
+import unittest
+import asyncio
+import json
+import tempfile
+from application.server import HabitServer, HttpError, read_request
+from application.database import create_connection, default_habit_data
+
+class TestServer(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Setup a server of a temporary database with the default habits
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        name = os.path.join(self.directory.name, "UTestServer.db")
+        db = create_connection(name)
+        default_habit_data(db)
+        db.close()
+        self.server = HabitServer(name, workers=2)
+
+    def tearDown(self) -> None:
+        """
+        Stop the workers and delete the temporary database
+        """
+        self.server.close()
+        self.directory.cleanup()
+
+    def request(self, method: str, target: str, body=None) -> tuple:
+        """Answers a request in a worker thread like the server does.
+        """
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        return self.server.executor.submit(self.server.handle, method, target, data).result()
+
+    def test_endpoints(self):
+        """Test the endpoints of the habits and streaks.
+        """
+        status, result = self.request("GET", "/habits?periodicity=weekly")
+        self.assertEqual((status, len(result["habits"])), (200, 2))
+        status, result = self.request("GET", "/habits/Study/streak")
+        self.assertEqual((status, result["habit_id"], result["maximum"]), (200, 1, 26))
+        status, result = self.request("GET", "/habits/Visit%20Family/streak")
+        self.assertEqual((status, result["habit_id"], result["habit_name"]), (200, 5, "Visit Family"))
+        status, result = self.request("GET", "/longest?limit=1")
+        self.assertEqual((status, result["habit_ids"], len(result["ranking"])), (200, [1], 1))
+
+        # checks if a habit is created and checked off:
+        status, result = self.request("POST", "/habits", {"name": "Read", "periodicity": "daily"})
+        self.assertEqual((status, result["habit_id"]), (201, 6))
+        status, result = self.request("POST", "/habits/6/checkoffs", {"at": "2022-01-01 10:00:00"})
+        self.assertEqual((status, result["streak"]["current"], result["streak"]["last_checkoff"]), (201, 1, "2022-01-01 10:00:00"))
+
+        # checks if invalid requests are answered with their status code:
+        for method, target, body, status in [
+                ("GET", "/habits/Juggle/streak", None, 404),
+                ("GET", "/nothing", None, 404),
+                ("DELETE", "/habits", None, 405),
+                ("POST", "/habits", {"name": "Swim", "periodicity": "hourly"}, 400),
+                ("POST", "/habits/6/checkoffs", {"at": "tomorrow"}, 400),
+                ("POST", "/habits/6/checkoffs", {"at": 1e20}, 400),
+                ("GET", "/longest?limit=many", None, 400)]:
+            with self.assertRaises(HttpError) as error:
+                self.request(method, target, body)
+            self.assertEqual(error.exception.status, status)
+
+    def test_read_request(self):
+        """Test the parsing of requests with and without body.
+        """
+        async def parse(data: bytes):
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return await read_request(reader)
+
+        self.assertEqual(asyncio.run(parse(b'POST /habits HTTP/1.1\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}')),
+            ("POST", "/habits", {"content-length": "2", "connection": "close"}, b"{}"))
+        self.assertIsNone(asyncio.run(parse(b"")))
+        with self.assertRaises(HttpError):
+            asyncio.run(parse(b"nonsense\r\n\r\n"))
+
+        # checks if negative or non-numeric lengths of the body are refused with 400:
+        for length in (b"-1", b"ten"):
+            with self.assertRaises(HttpError) as error:
+                asyncio.run(parse(b"POST /habits HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}"))
+            self.assertEqual(error.exception.status, 400)
+
+    def test_unexpected_error(self):
+        """Test that an unexpected error of a request is answered with 500 instead of closing the connection.
+        """
+        class Writer:
+            def __init__(self):
+                self.data = b""
+            def write(self, data: bytes):
+                self.data += data
+            async def drain(self):
+                pass
+            def close(self):
+                pass
+
+        def fail(method, target, body):
+            raise RuntimeError("unexpected")
+
+        async def respond(data: bytes) -> bytes:
+            reader, writer = asyncio.StreamReader(), Writer()
+            reader.feed_data(data)
+            reader.feed_eof()
+            await self.server.respond(reader, writer)
+            return writer.data
+
+        self.server.handle = fail
+        response = asyncio.run(respond(b"GET /habits HTTP/1.1\r\nConnection: close\r\n\r\n"))
+        self.assertTrue(response.startswith(b"HTTP/1.1 500 Internal Server Error"))
+        self.assertEqual(json.loads(response.split(b"\r\n\r\n", 1)[1]), {"error": "internal error: RuntimeError"})
+
+
+if __name__ == "__main__":
+    unittest.main()